@@ -0,0 +1,224 @@
+"""
+Lists every feasible alternative for one game of the schedule: the free gameslots it could move to, and the games it
+could trade gameslots with. Each alternative comes with its effect on the schedule metrics. The schedule for the seed in
+`config.yml` is generated (or restored from the cache) first. The game is given by a team and its date. Example:
+
+    uv run -m versizzle.alternatives "St. Walter A" 2/10/2024 --division 7/8G
+"""
+
+import argparse
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from versizzle import fingerprint, scheduler, utils
+from versizzle.blackout import Blackout
+from versizzle.config import load_config
+from versizzle.gameslot import Gameslot
+from versizzle.matchup import Matchup
+from versizzle.progress import reporter
+from versizzle.seed_store import RANKABLE_METRICS
+from versizzle.utils import unwrap
+from versizzle.window_constraint import WindowConstraint
+
+
+@dataclass
+class Alternative:
+    """
+    A gameslot that a game could move to. If the gameslot is taken, `other_matchup` is the game there, which would take
+    the original gameslot in exchange. `metric_changes` maps each schedule metric the change would affect to the amount
+    it would change by.
+    """
+
+    gameslot: Gameslot
+    other_matchup: Matchup | None
+    metric_changes: dict[str, float]
+
+
+class AlternativeFinder:
+    """
+    Finds the alternatives for games of the schedule currently loaded in the scheduler module.
+
+    Rather than checking every constraint for every gameslot, the finder indexes the gameslots and blackouts by date
+    once. The window constraints only depend on the date, so they are checked once per date for the game, and only the
+    blackouts of a gameslot's own date are checked for it. Each team's games are already indexed by date, which makes
+    each window check proportional to the window size.
+    """
+
+    def __init__(self, window_constraints: list[WindowConstraint]):
+        self.window_constraints = window_constraints
+
+        self.gameslots_by_date: dict[date, list[Gameslot]] = defaultdict(list)
+        for g in sorted(scheduler.gameslots, key=lambda g: (g.date, g.time, g.location.name)):
+            self.gameslots_by_date[g.date].append(g)
+
+        self.blackouts_by_date: dict[date, list[Blackout]] = defaultdict(list)
+        for b in scheduler.blackouts:
+            self.blackouts_by_date[b.date].append(b)
+
+    def find_alternatives(self, matchup: Matchup) -> list[Alternative]:
+        """Returns the alternatives for the game in chronological order. A preassigned game has none."""
+
+        if matchup.is_preassigned:
+            return []
+
+        original_gameslot = unwrap(matchup.selected_gameslot)
+        original_metrics = get_rankable_metrics()
+        alternatives = []
+
+        matchup.deselect_gameslot()
+
+        for gameslots_on_date in self.gameslots_by_date.values():
+            fits_date = self.fits_window_constraints(matchup, gameslots_on_date[0])
+
+            for gameslot in gameslots_on_date:
+                if gameslot == original_gameslot or gameslot.is_preassigned or self.is_blacked_out(matchup, gameslot):
+                    continue
+
+                other_matchup = gameslot.selected_matchup
+                if other_matchup is None:
+                    if fits_date:
+                        metric_changes = self.evaluate([(matchup, gameslot)], original_metrics)
+                        alternatives.append(Alternative(gameslot, None, metric_changes))
+                elif not other_matchup.is_preassigned and self.can_swap(
+                    matchup, other_matchup, original_gameslot, fits_date
+                ):
+                    other_matchup.deselect_gameslot()
+                    metric_changes = self.evaluate(
+                        [(matchup, gameslot), (other_matchup, original_gameslot)], original_metrics
+                    )
+                    other_matchup.select_gameslot(gameslot)
+                    alternatives.append(Alternative(gameslot, other_matchup, metric_changes))
+
+        matchup.select_gameslot(original_gameslot)
+
+        return alternatives
+
+    def can_swap(self, matchup: Matchup, other_matchup: Matchup, original_gameslot: Gameslot, fits_date: bool) -> bool:
+        """
+        Takes a game that has left its original gameslot, and another game. Returns whether the game can take the other
+        game's gameslot while the other game takes the original gameslot. `fits_date` says whether the game fits the
+        window constraints on the other game's date, which only needs checking again if the games share a team.
+        """
+
+        gameslot = unwrap(other_matchup.selected_gameslot)
+        if self.is_blacked_out(other_matchup, original_gameslot):
+            return False
+
+        shares_team = bool({matchup.team_a, matchup.team_b} & {other_matchup.team_a, other_matchup.team_b})
+        if not fits_date and not shares_team:
+            return False
+
+        other_matchup.deselect_gameslot()
+
+        feasible = not shares_team or self.fits_window_constraints(matchup, gameslot)
+        if feasible:
+            matchup.select_gameslot(gameslot)
+            feasible = self.fits_window_constraints(other_matchup, original_gameslot)
+            matchup.deselect_gameslot()
+
+        other_matchup.select_gameslot(gameslot)
+        return feasible
+
+    def evaluate(
+        self, placements: list[tuple[Matchup, Gameslot]], original_metrics: dict[str, float]
+    ) -> dict[str, float]:
+        """
+        Takes games that have left their gameslots, and a gameslot for each. Temporarily places the games there, and
+        returns how much each metric that changes would change by.
+        """
+
+        for matchup, gameslot in placements:
+            matchup.select_gameslot(gameslot)
+
+        metrics = get_rankable_metrics()
+
+        for matchup, _ in placements:
+            matchup.deselect_gameslot()
+
+        return {
+            metric: round(value - original_metrics[metric], 1)
+            for metric, value in metrics.items()
+            if value != original_metrics[metric]
+        }
+
+    def fits_window_constraints(self, matchup: Matchup, gameslot: Gameslot) -> bool:
+        return all(w.is_satisfied_by_selection(matchup, gameslot) for w in self.window_constraints)
+
+    def is_blacked_out(self, matchup: Matchup, gameslot: Gameslot) -> bool:
+        return any(
+            b.prohibits_matchup_in_slot(matchup, gameslot) for b in self.blackouts_by_date.get(gameslot.date, [])
+        )
+
+
+def get_rankable_metrics() -> dict[str, float]:
+    """Returns the rankable metrics of the current schedule."""
+
+    result = scheduler.get_seed_result(0)
+    return {metric: getattr(result, metric) for metric in RANKABLE_METRICS}
+
+
+def describe_metric_changes(metric_changes: dict[str, float]) -> str:
+    if not metric_changes:
+        return "no change"
+
+    return ", ".join(f"{metric} {change:+g}" for metric, change in metric_changes.items())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="versizzle.alternatives", description="List the alternatives for a game.")
+    parser.add_argument("team", help="name of one of the teams in the game")
+    parser.add_argument("date", help="date of the game, like 2/10/2024")
+    parser.add_argument("--division", help="division of the team, if several divisions have a team by that name")
+    args = parser.parse_args()
+
+    config = load_config()
+    reporter.configure(config["log_level"], config["progress"])
+    window_constraints = [WindowConstraint(w["days"], w["max_games"]) for w in config["window_constraints"]]
+
+    result = scheduler.generate_schedule(
+        input_dir_path=config["input_dir"],
+        output_dir_path=config["output_dir"],
+        random_seed=config["seed"],
+        window_constraints=window_constraints,
+        scarce_location_names=config["scarce_locations"],
+        is_test_run_for_seed=True,
+        local_search_seconds=config["local_search"]["seconds"],
+        ejection_chain_depth=config["backup_repair"]["max_chain_depth"],
+        backup_order=config["backup_order"],
+        home_balancing=config["home_balancing"],
+        config_hash=fingerprint.hash_config(config),
+        cache_dir_path=config["cache_dir"],
+        sub_seed=config.get("sub_seed"),
+    )
+
+    if result is None or not result.succeeded:
+        raise Exception("Failed to find a schedule")
+
+    game_date = datetime.strptime(args.date, "%m/%d/%Y").date()
+    games = [
+        m
+        for team in scheduler.teams.values()
+        if team.name == args.team and args.division in (None, team.division)
+        for m in team.games_by_date.get(game_date, [])
+    ]
+
+    if len(games) != 1:
+        raise Exception(f"Expected 1 game for {args.team} on {args.date}, but found {len(games)}")
+
+    matchup = games[0]
+    alternatives = AlternativeFinder(window_constraints).find_alternatives(matchup)
+
+    print()
+    print(f"Alternatives for {matchup} at {matchup.selected_gameslot}:")
+    print()
+
+    table: list[list[object]] = [
+        ["Gameslot", "Change", "Effect on metrics"],
+        ["--------", "------", "-----------------"],
+    ]
+    for alternative in alternatives:
+        change = "move" if alternative.other_matchup is None else f"swap with {alternative.other_matchup}"
+        table.append([alternative.gameslot, change, describe_metric_changes(alternative.metric_changes)])
+
+    utils.pretty_print_table(table)
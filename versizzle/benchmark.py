@@ -0,0 +1,285 @@
+"""
+Measures the performance of the scheduler on the example seasons in `examples`. Each example is scheduled with a fixed
+set of seeds and fixed settings, so that runs on different versions of the code can be compared. For each example, it
+reports the success rate, and the median (p50) and 95th percentile (p95) of the run time, of the time of each phase,
+of the backup selection dead ends and, with `--memory`, of the peak memory. Example:
+
+    uv run -m versizzle.benchmark --save benchmark.json
+    uv run -m versizzle.benchmark --baseline benchmark.json
+
+With `--baseline`, every figure is compared with the one saved in the baseline file, and the regressions are listed. The
+exit code is 1 if there are any, so the benchmark can guard an optimization. The settings don't come from `config.yml`,
+since the figures are only comparable if every run uses the same ones.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import shutil
+import tempfile
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from versizzle import utils
+from versizzle.profiler import profiler
+from versizzle.window_constraint import WindowConstraint
+
+EXAMPLES_DIR_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+
+# The settings of every benchmark run. They match the ones in the `config.yml` that ships with the repo.
+WINDOW_CONSTRAINTS = [(1, 1), (4, 2)]
+SCARCE_LOCATION_NAMES = ["Eastview Middle School", "St. Philip", "Christ the King", "St. Matthew"]
+
+# A figure only counts as a regression if it got worse by more than the tolerance, and, for times, by more than this
+# many seconds, since the shortest phases are mostly noise.
+MIN_REGRESSION_SECONDS = 0.05
+
+
+@dataclass
+class RunResult:
+    """The outcome of scheduling one example with one seed."""
+
+    succeeded: bool
+    profile: dict | None = None
+    peak_memory_bytes: int | None = None
+    error: str | None = None
+
+
+@dataclass
+class ExampleBenchmark:
+    """The runs of one example, and the figures that summarize them."""
+
+    name: str
+    runs: list[RunResult] = field(default_factory=list)
+
+    def get_figures(self) -> dict[str, float]:
+        """
+        Returns the figures of the example by name, like "phase preferred selection p95 seconds". Runs that raised an
+        exception have no profile, so they only count towards the success rate.
+        """
+
+        figures: dict[str, float] = {"success rate": sum(r.succeeded for r in self.runs) / len(self.runs)}
+
+        # Each list of values is keyed by the name of the figure and its unit.
+        values_by_figure: dict[tuple[str, str], list[float]] = defaultdict(list)
+        for profile in (r.profile for r in self.runs if r.profile is not None):
+            values_by_figure["total", "seconds"].append(profile["total"]["wall_seconds"])
+            values_by_figure["backup dead ends", ""].append(profile["counters"].get("backup_dead_ends", 0))
+            # A phase that only some runs reach (like backup selection) gets figures from the runs that did.
+            for phase in profile["phases"]:
+                values_by_figure[f"phase {phase['name']}", "seconds"].append(phase["wall_seconds"])
+
+        for r in self.runs:
+            if r.peak_memory_bytes is not None:
+                values_by_figure["peak memory", "MB"].append(round(r.peak_memory_bytes / 1_000_000, 1))
+
+        for (name, unit), values in values_by_figure.items():
+            for percentile in 50, 95:
+                figures[f"{name} p{percentile} {unit}".rstrip()] = round(get_percentile(values, percentile), 6)
+
+        return figures
+
+
+def get_percentile(values: list[float], percentile: int) -> float:
+    """Returns the given percentile of the values, using the nearest-rank method."""
+
+    ordered_values = sorted(values)
+    return ordered_values[max(0, math.ceil(percentile / 100 * len(ordered_values)) - 1)]
+
+
+def get_example_names() -> list[str]:
+    if not os.path.isdir(EXAMPLES_DIR_PATH):
+        raise Exception(
+            f"Can't find the examples at {EXAMPLES_DIR_PATH}. The benchmark runs from a checkout of the repo, which "
+            + "has them next to the versizzle package."
+        )
+
+    return sorted(
+        name for name in os.listdir(EXAMPLES_DIR_PATH) if os.path.isdir(os.path.join(EXAMPLES_DIR_PATH, name))
+    )
+
+
+@contextlib.contextmanager
+def prepare_input_dir(example_name: str):
+    """
+    Yields an input directory with the example's files. Some examples have no preassignments, and ship without a
+    `preassignments.csv`, so one with only the header is added for them.
+    """
+
+    with tempfile.TemporaryDirectory() as input_dir_path:
+        example_dir_path = os.path.join(EXAMPLES_DIR_PATH, example_name)
+        for file_name in os.listdir(example_dir_path):
+            shutil.copy(os.path.join(example_dir_path, file_name), input_dir_path)
+
+        preassignments_file_path = os.path.join(input_dir_path, "preassignments.csv")
+        if not os.path.exists(preassignments_file_path):
+            with open(preassignments_file_path, "w") as file:
+                file.write("date,time,location,division,team a,team b\n")
+
+        yield input_dir_path
+
+
+def run_example(input_dir_path: str, seed: int, track_memory: bool) -> RunResult:
+    """
+    Schedules the example once and profiles the run. With `track_memory`, only the peak memory of the run is kept,
+    since tracking memory slows the run down too much for its times to mean anything.
+    """
+
+    # Declaring import here so that the command line can list the benchmark's options without importing the scheduler.
+    from versizzle import scheduler
+
+    window_constraints = [WindowConstraint(days, max_games) for days, max_games in WINDOW_CONSTRAINTS]
+    profiler.enable(track_memory)
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = scheduler.generate_schedule(
+                input_dir_path=input_dir_path,
+                output_dir_path="",
+                random_seed=seed,
+                window_constraints=window_constraints,
+                scarce_location_names=SCARCE_LOCATION_NAMES,
+                is_test_run_for_seed=True,
+            )
+    except Exception as e:
+        return RunResult(succeeded=False, error=str(e))
+    finally:
+        profile = profiler.get_profile()
+        profiler.disable()
+
+    succeeded = result is not None and result.succeeded
+    if track_memory:
+        return RunResult(succeeded, peak_memory_bytes=profile["total"]["peak_memory_bytes"])
+    return RunResult(succeeded, profile=profile)
+
+
+def run_benchmark(example_names: list[str], seeds: list[int], track_memory: bool) -> list[ExampleBenchmark]:
+    benchmarks = []
+
+    for example_name in example_names:
+        benchmark = ExampleBenchmark(example_name)
+
+        with prepare_input_dir(example_name) as input_dir_path:
+            for seed in seeds:
+                run = run_example(input_dir_path, seed, track_memory=False)
+                if track_memory:
+                    run.peak_memory_bytes = run_example(input_dir_path, seed, track_memory=True).peak_memory_bytes
+
+                outcome = "succeeded" if run.succeeded else f"failed{f' ({run.error})' if run.error else ''}"
+                seconds = f" in {run.profile['total']['wall_seconds']:.2f} seconds" if run.profile else ""
+                print(f"{example_name} with seed {seed} {outcome}{seconds}.")
+                benchmark.runs.append(run)
+
+        benchmarks.append(benchmark)
+
+    return benchmarks
+
+
+def find_regressions(
+    figures_by_example: dict[str, dict[str, float]],
+    baseline_figures_by_example: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    """
+    Compares the figures with the baseline's, and describes each one that got worse. A lower success rate is always a
+    regression. Every other figure is worse when it is higher by more than the tolerance, a fraction of the baseline.
+    Figures that only one side has are skipped.
+    """
+
+    regressions = []
+
+    for example_name, figures in figures_by_example.items():
+        baseline_figures = baseline_figures_by_example.get(example_name, {})
+
+        for figure, value in figures.items():
+            if figure not in baseline_figures:
+                continue
+            baseline_value = baseline_figures[figure]
+
+            if figure == "success rate":
+                is_regression = value < baseline_value
+            else:
+                is_regression = value > baseline_value * (1 + tolerance)
+                if figure.endswith("seconds"):
+                    is_regression = is_regression and value - baseline_value > MIN_REGRESSION_SECONDS
+
+            if is_regression:
+                regressions.append(f"{example_name}: {figure} went from {baseline_value:g} to {value:g}")
+
+    return regressions
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    # The examples are only listed once the benchmark runs, so that building the parser reads no files.
+    parser.add_argument("--examples", nargs="*", default=None, help="examples to run (default: all)")
+    parser.add_argument("--seeds", type=int, default=5, help="number of seeds to run per example (default: 5)")
+    parser.add_argument("--first-seed", type=int, default=1, help="first seed (default: 1)")
+    parser.add_argument("--memory", action="store_true", help="also measure peak memory, with a second run per seed")
+    parser.add_argument("--save", help="file to save the figures to, for use as a baseline later")
+    parser.add_argument("--baseline", help="file of saved figures to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="fraction by which a figure may get worse before it is flagged (default: 0.2)",
+    )
+
+
+def main(args: argparse.Namespace):
+    """Runs the benchmark with the parsed command line arguments. Exits with code 1 if there are regressions."""
+
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    example_names = get_example_names()
+    for example_name in args.examples or []:
+        if example_name not in example_names:
+            raise Exception(f"Unknown example '{example_name}'. Choose from: {', '.join(example_names)}")
+
+    benchmarks = run_benchmark(args.examples or example_names, seeds, args.memory)
+    figures_by_example = {b.name: b.get_figures() for b in benchmarks}
+
+    baseline_figures_by_example: dict[str, dict[str, float]] = {}
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        baseline_figures_by_example = baseline["examples"]
+        if baseline["seeds"] != seeds:
+            print(
+                f"Warning: the baseline was run with seeds {baseline['seeds']}, so its figures may not be comparable."
+            )
+
+    for example_name, figures in figures_by_example.items():
+        baseline_figures = baseline_figures_by_example.get(example_name, {})
+
+        print()
+        print(f"{example_name}:")
+        table: list[list[object]] = [["figure", "value", "baseline"], ["------", "-----", "--------"]]
+        for figure, value in figures.items():
+            table.append([figure, f"{value:g}", f"{baseline_figures[figure]:g}" if figure in baseline_figures else "-"])
+        utils.pretty_print_table(table)
+
+    if args.save is not None:
+        with open(args.save, "w") as file:
+            json.dump({"seeds": seeds, "examples": figures_by_example}, file, indent=2)
+        print()
+        print(f"Saved the figures to {args.save}")
+
+    if args.baseline is not None:
+        regressions = find_regressions(figures_by_example, baseline_figures_by_example, args.tolerance)
+
+        print()
+        if not regressions:
+            print("No regressions.")
+        else:
+            print(f"Found {len(regressions)} regressions:")
+            for regression in regressions:
+                print(regression)
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="versizzle.benchmark", description="Benchmark the scheduler on the examples.")
+    add_arguments(parser)
+    main(parser.parse_args())
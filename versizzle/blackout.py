@@ -3,6 +3,7 @@ from datetime import date, time
 from versizzle import utils
 from versizzle.gameslot import Gameslot
 from versizzle.matchup import Matchup
+from versizzle.profiler import profiler
 from versizzle.team import Team
 
 
@@ -18,6 +19,8 @@ class Blackout:
         self.team_name = team_name
 
     def prohibits_matchup_in_slot(self, matchup: Matchup, gameslot: Gameslot) -> bool:
+        if profiler.enabled:
+            profiler.count("blackout_checks")
         return self.prohibits_team_in_slot(matchup.team_a, gameslot) or self.prohibits_team_in_slot(
             matchup.team_b, gameslot
         )
@@ -0,0 +1,221 @@
+"""
+The command line of versizzle. Each subcommand reads `config.yml`, or the file given with `--config`, and any field of
+it can be overridden with `--set`. Examples:
+
+    uv run -m versizzle schedule --seed 14
+    uv run -m versizzle seed-search --first-seed 1 --last-seed 500 --log-level quiet
+    uv run -m versizzle validate out/schedule.csv --input examples/basketball_2024
+    uv run -m versizzle bench --examples basketball_2024 --seeds 3
+    uv run -m versizzle --config fall.yml --set local_search.seconds=30
+
+Without a subcommand, it runs the seed search if the config has a `seed_search` field, and otherwise generates the
+schedule for the config's `seed`, as it always has. The scheduler itself is only imported once a subcommand that needs
+it runs (`validate` does too, to read the schedule the way the scheduler writes it), so that `--help` starts quickly.
+"""
+
+import argparse
+import os
+
+from versizzle.config import load_config
+from versizzle.profiler import profiler
+from versizzle.progress import LOG_LEVELS, PROGRESS_FORMATS, reporter
+
+
+def add_common_arguments(parser: argparse.ArgumentParser, default: object = None):
+    """
+    Adds the options every subcommand shares. They are added to the subcommands with a default of `SUPPRESS`, so that
+    they can be given before or after the subcommand without the subcommand's defaults replacing them.
+    """
+
+    parser.add_argument("--config", default=default or "config.yml", help="config file (default: config.yml)")
+    parser.add_argument("--input", default=default, help="input directory (default: input_dir in config)")
+    parser.add_argument("--output", default=default, help="output directory (default: output_dir in config)")
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=default or [],
+        metavar="FIELD=VALUE",
+        help="override a field of the config, like local_search.seconds=30 (can be repeated)",
+    )
+    parser.add_argument(
+        "--log-level", choices=LOG_LEVELS, default=default, help="how much to report (default: log_level in config)"
+    )
+    parser.add_argument(
+        "--progress", choices=PROGRESS_FORMATS, default=default, help="how to report it (default: progress in config)"
+    )
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="versizzle", description="Generate a schedule, or run a seed search.")
+    add_common_arguments(parser)
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+
+    schedule_parser = subparsers.add_parser("schedule", help="generate the schedule for one seed")
+    schedule_parser.add_argument("--seed", type=int, help="seed to schedule with (default: seed in config)")
+    schedule_parser.add_argument(
+        "--sub-seed", type=int, help="sub-seed of the backup phase (default: sub_seed in config)"
+    )
+
+    seed_search_parser = subparsers.add_parser("seed-search", help="try a range of seeds and record how each did")
+    seed_search_parser.add_argument("--first-seed", type=int, help="first seed (default: seed_search in config)")
+    seed_search_parser.add_argument("--last-seed", type=int, help="last seed (default: seed_search in config)")
+
+    validate_parser = subparsers.add_parser("validate", help="check a schedule against the input files")
+    validate_parser.add_argument("schedule", help="schedule.csv or pasteable.txt of the schedule to check")
+
+    # Declaring import here so that the benchmark's options are listed by `--help`. The benchmark module is light, and
+    # only imports the scheduler and lists the examples once it runs, so building the parser reads no files.
+    from versizzle import benchmark
+
+    bench_parser = subparsers.add_parser("bench", help="benchmark the scheduler on the examples")
+    benchmark.add_arguments(bench_parser)
+
+    for subparser in schedule_parser, seed_search_parser, validate_parser:
+        add_common_arguments(subparser, default=argparse.SUPPRESS)
+
+    return parser
+
+
+def get_config(args: argparse.Namespace) -> dict:
+    """
+    Loads the config the arguments point to. The options of the command line are applied as overrides, before the
+    defaults are filled in, so that the defaults that depend on other fields (like `log_level`) see them.
+    """
+
+    overrides = list(args.set)
+    if args.input is not None:
+        overrides.append(f"input_dir={args.input}")
+    if args.output is not None:
+        overrides.append(f"output_dir={args.output}")
+
+    if args.command == "schedule":
+        overrides.append("seed_search=null")
+        if args.seed is not None:
+            overrides.append(f"seed={args.seed}")
+        if args.sub_seed is not None:
+            overrides.append(f"sub_seed={args.sub_seed}")
+    elif args.command == "seed-search":
+        if args.first_seed is not None:
+            overrides.append(f"seed_search.first_seed={args.first_seed}")
+        if args.last_seed is not None:
+            overrides.append(f"seed_search.last_seed={args.last_seed}")
+
+    config = load_config(args.config, overrides)
+
+    if args.command == "seed-search":
+        seed_search_config = config.get("seed_search", {})
+        if "first_seed" not in seed_search_config or "last_seed" not in seed_search_config:
+            raise Exception("Give --first-seed and --last-seed, or a `seed_search` field in the config")
+
+    return config
+
+
+def run_schedule(config: dict):
+    # Declaring imports here so that only the subcommands that schedule import the scheduler.
+    from versizzle import decomposition, fingerprint, scheduler
+    from versizzle.window_constraint import WindowConstraint
+
+    if config["decomposition"] is not None:
+        decomposition.generate_decomposed_schedule(
+            config["input_dir"],
+            config["output_dir"],
+            config["seed"],
+            [WindowConstraint(w["days"], w["max_games"]) for w in config["window_constraints"]],
+            config["scarce_locations"],
+            num_processes=config["decomposition"].get("processes"),
+            local_search_seconds=config["local_search"]["seconds"],
+            ejection_chain_depth=config["backup_repair"]["max_chain_depth"],
+            backup_order=config["backup_order"],
+            home_balancing=config["home_balancing"],
+            config_hash=fingerprint.hash_config(config),
+            cache_dir_path=config["cache_dir"],
+            sub_seed=config.get("sub_seed"),
+        )
+        return
+
+    scheduler.generate_schedule(
+        config["input_dir"],
+        config["output_dir"],
+        config["seed"],
+        [WindowConstraint(w["days"], w["max_games"]) for w in config["window_constraints"]],
+        config["scarce_locations"],
+        local_search_seconds=config["local_search"]["seconds"],
+        ejection_chain_depth=config["backup_repair"]["max_chain_depth"],
+        backup_order=config["backup_order"],
+        home_balancing=config["home_balancing"],
+        config_hash=fingerprint.hash_config(config),
+        cache_dir_path=config["cache_dir"],
+        sub_seed=config.get("sub_seed"),
+    )
+
+
+def run_seed_search(config: dict):
+    # Declaring imports here so that only the subcommands that schedule import the scheduler.
+    from versizzle import fingerprint, scheduler
+    from versizzle.seed_ranking import SeedRanking
+    from versizzle.window_constraint import WindowConstraint
+
+    seed_search_config = config["seed_search"]
+
+    seed_ranking = None
+    if "ranking" in seed_search_config:
+        ranking_config = seed_search_config["ranking"]
+        seed_ranking = SeedRanking(ranking_config["method"], ranking_config["weights"], ranking_config.get("top", 1))
+
+    scheduler.do_test_run_for_seeds(
+        seed_search_config["first_seed"],
+        seed_search_config["last_seed"],
+        config["input_dir"],
+        config["output_dir"],
+        [WindowConstraint(w["days"], w["max_games"]) for w in config["window_constraints"]],
+        config["scarce_locations"],
+        fingerprint.hash_config(config),
+        local_search_seconds=config["local_search"]["seconds"],
+        ejection_chain_depth=config["backup_repair"]["max_chain_depth"],
+        backup_order=config["backup_order"],
+        home_balancing=config["home_balancing"],
+        cache_dir_path=config["cache_dir"],
+        early_abort=seed_search_config.get("early_abort"),
+        seed_ranking=seed_ranking,
+        backup_sub_seeds=seed_search_config.get("backup_sub_seeds", 0),
+    )
+
+
+def main(argv: list[str] | None = None):
+    args = get_parser().parse_args(argv)
+
+    if args.command == "bench":
+        # Declaring import here, as in `get_parser`.
+        from versizzle import benchmark
+
+        benchmark.main(args)
+        return
+
+    config = get_config(args)
+
+    reporter.configure(args.log_level or config["log_level"], args.progress or config["progress"])
+
+    if args.command == "validate":
+        # Declaring import here so that only the validator imports it.
+        from versizzle import validation
+
+        problems = validation.check_schedule_file(args.schedule, config)
+        validation.print_problems(problems)
+        if problems:
+            raise SystemExit(1)
+        return
+
+    reporter.message(f"Found config: {config}")
+
+    # The output directory may be a new one given with `--output`.
+    os.makedirs(config["output_dir"], exist_ok=True)
+
+    if config["profile"] is not None:
+        profiler.enable(track_memory=config["profile"].get("track_memory", False))
+
+    if "seed_search" in config:
+        run_seed_search(config)
+    else:
+        if "seed" not in config:
+            raise Exception("Give --seed, or a `seed` field in the config")
+        run_schedule(config)
@@ -1,16 +1,80 @@
+"""
+Reads `config.yml`. Nothing is read on import, so that worker processes and library users that are handed their
+settings directly don't pay for parsing YAML or depend on the current directory.
+"""
+
 import yaml
 
-with open("config.yml") as file:
-    config = yaml.safe_load(file)
 
-if "input_dir" not in config:
-    raise Exception("config.yml should include an `input_dir` field")
+def load_config(file_path: str = "config.yml", overrides: list[str] | None = None) -> dict:
+    """
+    Reads the config file, applies the overrides and fills in the defaults. Each override is like
+    `local_search.seconds=30`, where the value is parsed as YAML and the dots lead into nested fields.
+    """
+
+    with open(file_path) as file:
+        config = yaml.safe_load(file)
+
+    for override in overrides or []:
+        apply_override(config, override)
+
+    # An empty `seed_search` field, like one overridden with `seed_search=null`, turns the seed search off.
+    if "seed_search" in config and config["seed_search"] is None:
+        del config["seed_search"]
+
+    if "input_dir" not in config:
+        raise Exception(f"{file_path} should include an `input_dir` field")
+
+    if "output_dir" not in config:
+        raise Exception(f"{file_path} should include an `output_dir` field")
+
+    if "window_constraints" not in config:
+        config["window_constraints"] = []
+
+    if "scarce_locations" not in config:
+        config["scarce_locations"] = []
+    elif isinstance(config["scarce_locations"], str) and config["scarce_locations"] != "auto":
+        raise Exception(f"`scarce_locations` in {file_path} should be a list of locations, or 'auto'")
+
+    if "local_search" not in config:
+        config["local_search"] = {"seconds": 0}
+
+    if "backup_repair" not in config:
+        config["backup_repair"] = {"max_chain_depth": 0}
+
+    if "backup_order" not in config:
+        config["backup_order"] = "fewest_backup_gameslots"
+
+    if "home_balancing" not in config:
+        config["home_balancing"] = "greedy"
+
+    if "cache_dir" not in config:
+        config["cache_dir"] = None
+
+    if "decomposition" not in config:
+        config["decomposition"] = None
+
+    if "profile" not in config:
+        config["profile"] = None
+
+    if "log_level" not in config:
+        # A seed search runs the scheduler many times, so by default it leaves out the input files and the progress of
+        # each phase.
+        config["log_level"] = "normal" if "seed_search" in config else "verbose"
+
+    if "progress" not in config:
+        config["progress"] = "text"
+
+    return config
 
-if "output_dir" not in config:
-    raise Exception("config.yml should include an `output_dir` field")
 
-if "window_constraints" not in config:
-    config["window_constraints"] = []
+def apply_override(config: dict, override: str):
+    key, separator, value = override.partition("=")
+    if not separator:
+        raise Exception(f"Override '{override}' should look like 'field=value'")
 
-if "scarce_locations" not in config:
-    config["scarce_locations"] = []
+    *parent_keys, last_key = key.split(".")
+    parent = config
+    for k in parent_keys:
+        parent = parent.setdefault(k, {})
+    parent[last_key] = yaml.safe_load(value)
@@ -0,0 +1,310 @@
+"""
+Keeps a schedule in memory and answers what-if questions about it over HTTP on localhost, such as whether a game can
+move to another gameslot. The schedule for the seed in `config.yml` is generated (or restored from the cache) once at
+startup, so each question only costs the checks it needs. Example:
+
+    uv run -m versizzle.daemon --port 8765
+    curl 'localhost:8765/matchups?team=St.%20Matthew'
+    curl 'localhost:8765/options?matchup=12&date=2024-01-16&location=St.%20Matthew'
+    curl -X POST 'localhost:8765/move?matchup=12&gameslot=345'
+    curl -X POST 'localhost:8765/save'
+
+Matchups and gameslots are identified by their index in the ingested lists, as shown by `/matchups` and `/gameslots`.
+Moves change the schedule in memory only, until `/save` writes the output files.
+"""
+
+import argparse
+import json
+from datetime import date
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from versizzle import fingerprint, scheduler, utils
+from versizzle.alternatives import AlternativeFinder, describe_metric_changes
+from versizzle.config import load_config
+from versizzle.gameslot import Gameslot
+from versizzle.matchup import Matchup
+from versizzle.progress import reporter
+from versizzle.window_constraint import WindowConstraint
+
+
+class WhatIfService:
+    """
+    Answers questions about the schedule currently loaded in the scheduler module, and applies moves to it. A move is
+    feasible under the same rules the scheduler follows: preassigned games and gameslots stay put, blackouts are
+    respected, and no window constraint is violated.
+    """
+
+    def __init__(self, window_constraints: list[WindowConstraint], output_dir_path: str, seed: int):
+        self.window_constraints = window_constraints
+        self.output_dir_path = output_dir_path
+        self.seed = seed
+
+        self.matchup_indexes: dict[Matchup, int] = {m: i for i, m in enumerate(scheduler.matchups)}
+        self.gameslot_indexes: dict[Gameslot, int] = {g: i for i, g in enumerate(scheduler.gameslots)}
+        self.alternative_finder = AlternativeFinder(window_constraints)
+
+    def get_move_problems(self, matchup: Matchup, gameslot: Gameslot) -> list[str]:
+        """Returns the reasons the matchup can't move to the gameslot, or an empty list if it can."""
+
+        problems = []
+
+        if matchup.selected_gameslot == gameslot:
+            return ["the matchup is already in this gameslot"]
+        if matchup.is_preassigned:
+            problems.append("the matchup is preassigned")
+        if gameslot.is_preassigned:
+            problems.append("the gameslot is preassigned")
+        if gameslot.selected_matchup is not None:
+            problems.append(f"the gameslot is taken by {gameslot.selected_matchup}")
+
+        for b in scheduler.blackouts:
+            if b.prohibits_matchup_in_slot(matchup, gameslot):
+                problems.append(f"blackout {b}")
+
+        problems.extend(self.get_window_constraint_problems(matchup, gameslot))
+
+        return problems
+
+    def get_window_constraint_problems(self, matchup: Matchup, gameslot: Gameslot) -> list[str]:
+        """Checks the window constraints as if the matchup had left its current gameslot for the given one."""
+
+        original_gameslot = matchup.selected_gameslot
+        if original_gameslot is not None:
+            matchup.deselect_gameslot()
+
+        problems = [
+            f"more than {w.max_games_in_window} games in {w.window_size} days"
+            for w in self.window_constraints
+            if not w.is_satisfied_by_selection(matchup, gameslot)
+        ]
+
+        if original_gameslot is not None:
+            matchup.select_gameslot(original_gameslot)
+
+        return problems
+
+    def get_swap_problems(self, matchup: Matchup, other_matchup: Matchup) -> list[str]:
+        """Returns the reasons the two matchups can't swap gameslots, or an empty list if they can."""
+
+        gameslot, other_gameslot = matchup.selected_gameslot, other_matchup.selected_gameslot
+        if gameslot is None or other_gameslot is None:
+            return ["both matchups must have a gameslot"]
+        if matchup == other_matchup:
+            return ["a matchup can't swap with itself"]
+
+        # Each matchup is checked with the other one out of the way, since they would trade places.
+        other_matchup.deselect_gameslot()
+        problems = [f"{matchup}: {p}" for p in self.get_move_problems(matchup, other_gameslot)]
+        other_matchup.select_gameslot(other_gameslot)
+
+        matchup.deselect_gameslot()
+        problems += [f"{other_matchup}: {p}" for p in self.get_move_problems(other_matchup, gameslot)]
+        matchup.select_gameslot(gameslot)
+
+        return problems
+
+    def move(self, matchup: Matchup, gameslot: Gameslot) -> list[str]:
+        """Moves the matchup to the gameslot if it can. Returns the reasons it can't, if any."""
+
+        problems = self.get_move_problems(matchup, gameslot)
+        if not problems:
+            matchup.deselect_gameslot()
+            matchup.select_gameslot(gameslot)
+
+        return problems
+
+    def swap(self, matchup: Matchup, other_matchup: Matchup) -> list[str]:
+        """Swaps the gameslots of the two matchups if it can. Returns the reasons it can't, if any."""
+
+        problems = self.get_swap_problems(matchup, other_matchup)
+        if not problems:
+            gameslot, other_gameslot = matchup.selected_gameslot, other_matchup.selected_gameslot
+            matchup.deselect_gameslot()
+            other_matchup.deselect_gameslot()
+            matchup.select_gameslot(other_gameslot)  # pyright: ignore[reportArgumentType]
+            other_matchup.select_gameslot(gameslot)  # pyright: ignore[reportArgumentType]
+
+        return problems
+
+    def describe_matchup(self, matchup: Matchup) -> dict:
+        gameslot = matchup.selected_gameslot
+        return {
+            "matchup": self.matchup_indexes[matchup],
+            "division": matchup.division,
+            "team_a": matchup.team_a.name,
+            "team_b": matchup.team_b.name,
+            "is_preassigned": matchup.is_preassigned,
+            "gameslot": None if gameslot is None else self.describe_gameslot(gameslot),
+        }
+
+    def describe_gameslot(self, gameslot: Gameslot) -> dict:
+        return {
+            "gameslot": self.gameslot_indexes[gameslot],
+            "date": gameslot.date.isoformat(),
+            "pretty_date": utils.prettify_date(gameslot.date),
+            "time": utils.prettify_time(gameslot.time),
+            "location": gameslot.location.name,
+            "is_preassigned": gameslot.is_preassigned,
+            "matchup": None if gameslot.selected_matchup is None else str(gameslot.selected_matchup),
+        }
+
+    def handle(self, method: str, path: str, query: dict[str, str]) -> dict | None:
+        """
+        Answers one request, or returns `None` if there is no such request. Raises `KeyError`, `ValueError` or
+        `IndexError` for a request with missing or bad parameters.
+        """
+
+        if method == "GET" and path == "/matchups":
+            return {
+                "matchups": [
+                    self.describe_matchup(m)
+                    for m in scheduler.matchups
+                    if query.get("team") in (None, m.team_a.name, m.team_b.name)
+                    and query.get("division") in (None, m.division)
+                ]
+            }
+
+        if method == "GET" and path == "/gameslots":
+            return {
+                "gameslots": [
+                    self.describe_gameslot(g)
+                    for g in self.filter_gameslots(query)
+                    if query.get("free") != "true" or g.selected_matchup is None
+                ]
+            }
+
+        if method == "GET" and path == "/check-move":
+            problems = self.get_move_problems(self.get_matchup(query["matchup"]), self.get_gameslot(query["gameslot"]))
+            return {"feasible": not problems, "problems": problems}
+
+        if method == "GET" and path == "/check-swap":
+            problems = self.get_swap_problems(self.get_matchup(query["matchup"]), self.get_matchup(query["other"]))
+            return {"feasible": not problems, "problems": problems}
+
+        if method == "GET" and path == "/options":
+            # Every gameslot matching the filters, and whether the matchup could move there or swap with its occupant.
+            matchup = self.get_matchup(query["matchup"])
+            options = []
+            for g in self.filter_gameslots(query):
+                if g.selected_matchup is None:
+                    problems = self.get_move_problems(matchup, g)
+                else:
+                    problems = self.get_swap_problems(matchup, g.selected_matchup)
+                options.append({**self.describe_gameslot(g), "feasible": not problems, "problems": problems})
+            return {"matchup": self.describe_matchup(matchup), "options": options}
+
+        if method == "GET" and path == "/alternatives":
+            matchup = self.get_matchup(query["matchup"])
+            alternatives = [
+                {
+                    **self.describe_gameslot(a.gameslot),
+                    "swap_with": None if a.other_matchup is None else self.matchup_indexes[a.other_matchup],
+                    "metric_changes": a.metric_changes,
+                    "summary": describe_metric_changes(a.metric_changes),
+                }
+                for a in self.alternative_finder.find_alternatives(matchup)
+            ]
+            return {"matchup": self.describe_matchup(matchup), "alternatives": alternatives}
+
+        if method == "GET" and path == "/metrics":
+            return scheduler.get_seed_result(self.seed).__dict__
+
+        if method == "POST" and path == "/move":
+            matchup = self.get_matchup(query["matchup"])
+            problems = self.move(matchup, self.get_gameslot(query["gameslot"]))
+            return {"moved": not problems, "problems": problems, "matchup": self.describe_matchup(matchup)}
+
+        if method == "POST" and path == "/swap":
+            matchup, other_matchup = self.get_matchup(query["matchup"]), self.get_matchup(query["other"])
+            problems = self.swap(matchup, other_matchup)
+            return {
+                "swapped": not problems,
+                "problems": problems,
+                "matchups": [self.describe_matchup(matchup), self.describe_matchup(other_matchup)],
+            }
+
+        if method == "POST" and path == "/save":
+            scheduler.write_output_files(self.output_dir_path)
+            return {"saved": self.output_dir_path}
+
+        return None
+
+    def filter_gameslots(self, query: dict[str, str]) -> list[Gameslot]:
+        gameslot_date = date.fromisoformat(query["date"]) if "date" in query else None
+        return [
+            g
+            for g in scheduler.gameslots
+            if gameslot_date in (None, g.date) and query.get("location") in (None, g.location.name)
+        ]
+
+    def get_matchup(self, index: str) -> Matchup:
+        return scheduler.matchups[int(index)]
+
+    def get_gameslot(self, index: str) -> Gameslot:
+        return scheduler.gameslots[int(index)]
+
+
+class WhatIfRequestHandler(BaseHTTPRequestHandler):
+    service: WhatIfService
+
+    def do_GET(self):
+        self.respond("GET")
+
+    def do_POST(self):
+        self.respond("POST")
+
+    def respond(self, method: str):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        try:
+            answer = self.service.handle(method, url.path, query)
+            status, body = (
+                (200, answer) if answer is not None else (404, {"error": f"no such request: {method} {url.path}"})
+            )
+        except (KeyError, ValueError, IndexError) as e:
+            status, body = 400, {"error": f"bad request: {e}"}
+
+        response = json.dumps(body, indent=2).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="versizzle.daemon", description="Answer what-if questions about a schedule.")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    args = parser.parse_args()
+
+    config = load_config()
+    reporter.configure(config["log_level"], config["progress"])
+    window_constraints = [WindowConstraint(w["days"], w["max_games"]) for w in config["window_constraints"]]
+
+    result = scheduler.generate_schedule(
+        input_dir_path=config["input_dir"],
+        output_dir_path=config["output_dir"],
+        random_seed=config["seed"],
+        window_constraints=window_constraints,
+        scarce_location_names=config["scarce_locations"],
+        is_test_run_for_seed=True,
+        local_search_seconds=config["local_search"]["seconds"],
+        ejection_chain_depth=config["backup_repair"]["max_chain_depth"],
+        backup_order=config["backup_order"],
+        home_balancing=config["home_balancing"],
+        config_hash=fingerprint.hash_config(config),
+        cache_dir_path=config["cache_dir"],
+        sub_seed=config.get("sub_seed"),
+    )
+
+    if result is None or not result.succeeded:
+        raise Exception("Failed to find a schedule to serve")
+
+    WhatIfRequestHandler.service = WhatIfService(window_constraints, config["output_dir"], config["seed"])
+
+    # The server handles one request at a time, so requests never see a schedule in the middle of a change.
+    server = HTTPServer(("localhost", args.port), WhatIfRequestHandler)
+    print(f"Serving what-if questions on localhost:{args.port}")
+    server.serve_forever()
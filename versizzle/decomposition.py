@@ -0,0 +1,334 @@
+"""
+Splits a league into independent parts and schedules each part on its own, in parallel. Two matchups depend on each
+other if they share a team, or if they could both be played in gameslots at the same date and time. Any matchup can be
+played at any location as a backup, so locations don't split a league; the blackouts do. For example, if the volleyball
+divisions are blacked out on the basketball dates and the basketball divisions on the volleyball dates, the two sports
+can be scheduled separately, and backtracking in one of them never has to undo anything in the other.
+
+The parts are the connected components of a graph with a node for each team and each date and time that has gameslots.
+Each team is joined to its opponents, and to each date and time at which one of its matchups is not blacked out. The
+gameslots at each date and time belong to that date and time's component. Each part is scheduled with the same seed and
+settings as the whole league would be, and the parts are put back together into one schedule. With `decomposition` in
+`config.yml`, the scheduler does this whenever the league splits. To see the parts, run:
+
+    uv run -m versizzle.decomposition
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from datetime import time as time_of_day
+from functools import partial
+
+from versizzle import ingestion, schedule_cache, scheduler, validation
+from versizzle.config import load_config
+from versizzle.gameslot import Gameslot
+from versizzle.progress import LogLevel, reporter
+from versizzle.scarcity import ScarceLocationNames
+from versizzle.team import Team
+from versizzle.window_constraint import WindowConstraint
+
+
+class DisjointSets:
+    """Union-find over the numbers from 0 up to a size, with path halving."""
+
+    def __init__(self, size: int):
+        self.parents = list(range(size))
+
+    def find(self, node: int) -> int:
+        while self.parents[node] != node:
+            self.parents[node] = self.parents[self.parents[node]]
+            node = self.parents[node]
+        return node
+
+    def union(self, node_1: int, node_2: int):
+        root_1 = self.find(node_1)
+        root_2 = self.find(node_2)
+        if root_1 != root_2:
+            self.parents[root_2] = root_1
+
+
+@dataclass
+class Component:
+    """
+    A part of the league that can be scheduled on its own. Its matchups and gameslots are identified by their index in
+    the ingested lists, in the order they were listed.
+    """
+
+    matchup_indexes: list[int]
+    gameslot_indexes: list[int]
+
+
+def find_components(league: ingestion.IngestionResult) -> list[Component]:
+    """
+    Returns the independent parts of the league, ordered by their first matchup. Gameslots that no matchup can use are
+    left out of every part.
+    """
+
+    # The nodes are numbered: first the teams, then the dates and times, then one node that stands for every date and
+    # time at once, so that the many matchups that no blackout touches are each joined to one node rather than to every
+    # date and time.
+    team_nodes = {team: i for i, team in enumerate(league.teams.values())}
+    gameslot_times = sorted({(g.date, g.time) for g in league.gameslots})
+    time_nodes = {gameslot_time: len(team_nodes) + i for i, gameslot_time in enumerate(gameslot_times)}
+    all_times_node = len(team_nodes) + len(time_nodes)
+
+    gameslot_times_by_date: dict[date, list[time_of_day]] = defaultdict(list)
+    for d, t in gameslot_times:
+        gameslot_times_by_date[d].append(t)
+    representative_gameslots: dict[tuple[date, time_of_day], Gameslot] = {}
+    for g in league.gameslots:
+        representative_gameslots.setdefault((g.date, g.time), g)
+
+    # The dates and times at which each team is blacked out.
+    blocked_times: dict[Team, set[tuple[date, time_of_day]]] = {team: set() for team in team_nodes}
+    for b in league.blackouts:
+        for t in gameslot_times_by_date.get(b.date, []):
+            gameslot = representative_gameslots[(b.date, t)]
+            for team in team_nodes:
+                if b.prohibits_team_in_slot(team, gameslot):
+                    blocked_times[team].add((b.date, t))
+
+    sets = DisjointSets(all_times_node + 1)
+    is_all_times_node_used = False
+
+    for team_a, team_b in {(m.team_a, m.team_b) for m in league.matchups}:
+        sets.union(team_nodes[team_a], team_nodes[team_b])
+
+        blocked = blocked_times[team_a] | blocked_times[team_b]
+        if not blocked:
+            sets.union(team_nodes[team_a], all_times_node)
+            is_all_times_node_used = True
+            continue
+
+        for gameslot_time, time_node in time_nodes.items():
+            if gameslot_time not in blocked:
+                sets.union(team_nodes[team_a], time_node)
+
+    if is_all_times_node_used:
+        for time_node in time_nodes.values():
+            sets.union(all_times_node, time_node)
+
+    # A preassignment's teams are joined to its date and time even if a blackout prohibits it, so that its part reports
+    # the blackout, as the whole league would.
+    for p in league.preassignments:
+        if (p.date, p.time) in time_nodes:
+            sets.union(team_nodes[p.team_a], time_nodes[(p.date, p.time)])
+
+    components_by_root: dict[int, Component] = {}
+    for i, m in enumerate(league.matchups):
+        root = sets.find(team_nodes[m.team_a])
+        components_by_root.setdefault(root, Component([], [])).matchup_indexes.append(i)
+
+    for i, g in enumerate(league.gameslots):
+        component = components_by_root.get(sets.find(time_nodes[(g.date, g.time)]))
+        if component is not None:
+            component.gameslot_indexes.append(i)
+
+    return list(components_by_root.values())
+
+
+def get_sub_league(league: ingestion.IngestionResult, component: Component) -> ingestion.IngestionResult:
+    """
+    Returns the part of the league in the component. The matchups and gameslots keep their order, so that each
+    preassignment picks the same matchup and gameslot as it would in the whole league. The objects are shared with the
+    league, so the part must be copied before it is scheduled, as `scheduler.load_league` does.
+    """
+
+    sub_league = ingestion.IngestionResult()
+    sub_league.matchups = [league.matchups[i] for i in component.matchup_indexes]
+    sub_league.gameslots = [league.gameslots[i] for i in component.gameslot_indexes]
+
+    sub_teams = {t for m in sub_league.matchups for t in (m.team_a, m.team_b)}
+    for key, team in league.teams.items():
+        if team in sub_teams:
+            sub_league.teams[key] = team
+            sub_league.divisions_to_counts[team.division] += 1
+
+    for g in sub_league.gameslots:
+        sub_league.gameslots_by_date_and_location.setdefault((g.date, g.location.name), []).append(g)
+
+    sub_league.locations = league.locations
+    sub_league.blackouts = league.blackouts
+    sub_league.preassignments = [p for p in league.preassignments if p.team_a in sub_teams]
+
+    return sub_league
+
+
+def schedule_component(
+    sub_league: ingestion.IngestionResult,
+    random_seed: int,
+    window_constraints: list[WindowConstraint],
+    scarce_location_names: ScarceLocationNames,
+    local_search_seconds: float,
+    ejection_chain_depth: int,
+    backup_order: str,
+    home_balancing: str,
+    sub_seed: int | None,
+) -> tuple[schedule_cache.CachedSchedule | None, float]:
+    """
+    Searches for a schedule of one part of the league. Returns the schedule (or `None` if the search failed) along with
+    how many seconds it took. The scheduler's own output is discarded, since many parts are scheduled at once.
+    """
+
+    start_time = time.monotonic()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = scheduler.generate_schedule(
+            input_dir_path="",
+            output_dir_path="",
+            random_seed=random_seed,
+            window_constraints=window_constraints,
+            scarce_location_names=scarce_location_names,
+            is_test_run_for_seed=True,
+            local_search_seconds=local_search_seconds,
+            ejection_chain_depth=ejection_chain_depth,
+            backup_order=backup_order,
+            home_balancing=home_balancing,
+            sub_seed=sub_seed,
+            ingestion_result=sub_league,
+        )
+
+    schedule = None
+    if result is not None and result.succeeded:
+        schedule = schedule_cache.capture_schedule(scheduler.matchups, scheduler.gameslots)
+
+    return schedule, time.monotonic() - start_time
+
+
+def merge_schedules(
+    league: ingestion.IngestionResult,
+    components: list[Component],
+    schedules: list[schedule_cache.CachedSchedule],
+) -> schedule_cache.CachedSchedule:
+    """Puts the schedules of the parts together into a schedule of the whole league."""
+
+    gameslot_indexes = [0] * len(league.matchups)
+    team_a_is_preferred_home = [False] * len(league.matchups)
+
+    for component, schedule in zip(components, schedules, strict=True):
+        for i, gameslot_index, is_team_a in zip(
+            component.matchup_indexes, schedule.gameslot_indexes, schedule.team_a_is_preferred_home, strict=True
+        ):
+            gameslot_indexes[i] = component.gameslot_indexes[gameslot_index]
+            team_a_is_preferred_home[i] = is_team_a
+
+    return schedule_cache.CachedSchedule(gameslot_indexes, team_a_is_preferred_home)
+
+
+def generate_decomposed_schedule(
+    input_dir_path: str,
+    output_dir_path: str,
+    random_seed: int,
+    window_constraints: list[WindowConstraint],
+    scarce_location_names: ScarceLocationNames,
+    num_processes: int | None = None,
+    local_search_seconds: float = 0,
+    ejection_chain_depth: int = 0,
+    backup_order: str = scheduler.DEFAULT_BACKUP_ORDER,
+    home_balancing: str = scheduler.DEFAULT_HOME_BALANCING,
+    config_hash: str = "",
+    cache_dir_path: str | None = None,
+    sub_seed: int | None = None,
+):
+    """
+    Generates a schedule by scheduling each independent part of the league on its own, up to `num_processes` parts at
+    once, and writes it to the output files. Each part uses the `sub_seed`, if any. If the league doesn't split, it is
+    scheduled as usual, using the cache in `cache_dir_path`; the parts of a league that splits aren't cached. Nothing is
+    written if some part has no valid schedule.
+    """
+
+    league = ingestion.ingest_files(input_dir_path, scarce_location_names)
+    components = find_components(league)
+
+    if len(components) <= 1:
+        reporter.message("The league doesn't split into independent parts, so it is scheduled as a whole.")
+        scheduler.generate_schedule(
+            input_dir_path,
+            output_dir_path,
+            random_seed,
+            window_constraints,
+            scarce_location_names,
+            local_search_seconds=local_search_seconds,
+            ejection_chain_depth=ejection_chain_depth,
+            backup_order=backup_order,
+            home_balancing=home_balancing,
+            config_hash=config_hash,
+            cache_dir_path=cache_dir_path,
+            sub_seed=sub_seed,
+            ingestion_result=league,
+        )
+        return
+
+    reporter.message(f"The league splits into {len(components)} independent parts.", LogLevel.QUIET)
+
+    run = partial(
+        schedule_component,
+        random_seed=random_seed,
+        window_constraints=window_constraints,
+        scarce_location_names=scarce_location_names,
+        local_search_seconds=local_search_seconds,
+        ejection_chain_depth=ejection_chain_depth,
+        backup_order=backup_order,
+        home_balancing=home_balancing,
+        sub_seed=sub_seed,
+    )
+
+    schedules = []
+    with multiprocessing.Pool(num_processes or os.cpu_count()) as pool:
+        sub_leagues = [get_sub_league(league, c) for c in components]
+        for i, (schedule, seconds) in enumerate(pool.imap(run, sub_leagues)):
+            outcome = "found a schedule" if schedule is not None else "failed"
+            reporter.message(
+                f"Part {i + 1} ({len(components[i].matchup_indexes)} matchups) {outcome} in {seconds:.1f} seconds."
+            )
+
+            if schedule is None:
+                reporter.message("Failed to find a schedule. Try relaxing your window constraints.", LogLevel.QUIET)
+                return
+            schedules.append(schedule)
+
+    scheduler.load_league(input_dir_path, window_constraints, scarce_location_names, league)
+    scheduler.restore_cached_schedule(merge_schedules(league, components, schedules))
+
+    problems = validation.validate_schedule(
+        scheduler.matchups, scheduler.blackouts, window_constraints, scheduler.preassignments
+    )
+    if problems:
+        raise Exception("The merged schedule is invalid:\n" + "\n".join(problems))
+
+    scheduler.write_output_files(output_dir_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="versizzle.decomposition", description="List the parts of the league that can be scheduled separately."
+    )
+    parser.parse_args()
+
+    config = load_config()
+    reporter.configure("quiet", config["progress"])
+    league = ingestion.ingest_files(config["input_dir"], config["scarce_locations"])
+    components = find_components(league)
+
+    if len(components) <= 1:
+        print("The league doesn't split into independent parts.")
+    else:
+        print(f"The league splits into {len(components)} independent parts.")
+    for i, component in enumerate(components):
+        matchups = [league.matchups[j] for j in component.matchup_indexes]
+        gameslots = [league.gameslots[j] for j in component.gameslot_indexes]
+        divisions = sorted({m.division for m in matchups})
+        dates = sorted({g.date for g in gameslots})
+
+        print()
+        print(f"Part {i + 1}: {len(matchups)} matchups in {len(gameslots)} gameslots")
+        print(f"    divisions: {', '.join(divisions)}")
+        if dates:
+            print(f"    dates: {len(dates)}, from {dates[0].isoformat()} to {dates[-1].isoformat()}")
@@ -0,0 +1,350 @@
+"""
+Spreads a seed search over several processes or machines. One coordinator hands out chunks of seeds over a socket, and
+any number of workers run them and stream the results back. The coordinator reads `config.yml` like a regular seed
+search, and records the results in the same `seeds.sqlite3` and `seeds.txt`. Workers only need the code; they get the
+input files and settings from the coordinator. Example:
+
+    uv run -m versizzle.distributed coordinator --host 0.0.0.0 --port 6000 --authkey secret
+    uv run -m versizzle.distributed worker coordinator-machine --port 6000 --authkey secret
+
+If a worker dies, the seeds it hadn't finished are handed to another worker. The coordinator and workers exchange
+pickles, which can run code when they are loaded, so the authkey is required and should be kept secret: anyone who knows
+it and can reach the port can run code on the other side.
+"""
+
+import argparse
+import os
+import queue
+import socket
+import tempfile
+import threading
+from collections import deque
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+
+from versizzle import fingerprint, ingestion, schedule_cache, scheduler
+from versizzle.config import load_config
+from versizzle.progress import LogLevel, SeedFinished, reporter
+from versizzle.seed_ranking import SeedRanking
+from versizzle.seed_store import SEED_FILE_HEADER, SeedResult, SeedStore
+from versizzle.window_constraint import WindowConstraint
+
+# A unit of work is a seed along with the sub-seeds of it that still need to be run.
+type WorkUnit = tuple[int, list[int | None]]
+
+
+class Coordinator:
+    """
+    Hands out the seeds of a seed search to workers and collects their results. Each worker connection is served by
+    its own thread, while the main thread records the results, so the seed store is only touched by one thread.
+    """
+
+    def __init__(self, config: dict, chunk_size: int):
+        self.config = config
+        self.chunk_size = chunk_size
+
+        self.input_dir_path: str = config["input_dir"]
+        self.output_dir_path: str = config["output_dir"]
+        self.config_hash = fingerprint.hash_config(config)
+        self.input_hash = fingerprint.hash_input_files(self.input_dir_path)
+        self.early_abort: dict = config["seed_search"].get("early_abort") or {}
+
+        self.seed_ranking = None
+        if "ranking" in config["seed_search"]:
+            ranking_config = config["seed_search"]["ranking"]
+            self.seed_ranking = SeedRanking(
+                ranking_config["method"], ranking_config["weights"], ranking_config.get("top", 1)
+            )
+
+        self.condition = threading.Condition()
+        self.pending_units: deque[WorkUnit] = deque()
+        self.num_unfinished_results = 0
+        self.best_num_preferred_phase_misses: int | None = None
+
+        self.worker_threads: list[threading.Thread] = []
+
+        # Worker threads put (result, schedule) pairs here for the main thread to record.
+        self.results: queue.Queue[tuple[SeedResult, schedule_cache.CachedSchedule | None]] = queue.Queue()
+
+    def get_job(self) -> dict:
+        """Returns everything a worker needs to run seeds: the input files and the scheduling settings."""
+
+        input_files = {}
+        for file_name in fingerprint.get_input_file_names(self.input_dir_path):
+            with open(f"{self.input_dir_path}/{file_name}", "rb") as file:
+                input_files[file_name] = file.read()
+
+        return {
+            "input_files": input_files,
+            "window_constraints": self.config["window_constraints"],
+            "scarce_locations": self.config["scarce_locations"],
+            "local_search_seconds": self.config["local_search"]["seconds"],
+            "ejection_chain_depth": self.config["backup_repair"]["max_chain_depth"],
+            "backup_order": self.config["backup_order"],
+            "home_balancing": self.config["home_balancing"],
+            "max_isolated_games": self.early_abort.get("max_isolated_games"),
+        }
+
+    def run(self, address: tuple[str, int], authkey: bytes):
+        seed_search = self.config["seed_search"]
+        backup_sub_seeds = seed_search.get("backup_sub_seeds", 0)
+        sub_seeds: list[int | None] = list(range(backup_sub_seeds)) if backup_sub_seeds else [None]
+
+        seed_store = SeedStore(self.output_dir_path + "/seeds.sqlite3")
+        finished_results: list[SeedResult] = []
+        skipped_results: list[SeedResult] = []
+
+        for i in range(seed_search["first_seed"], seed_search["last_seed"] + 1):
+            stored_results = [seed_store.get_result(self.input_hash, self.config_hash, i, s) for s in sub_seeds]
+            sub_seeds_to_run = []
+            for sub_seed, result in zip(sub_seeds, stored_results, strict=True):
+                if result is not None and not result.aborted:
+                    skipped_results.append(result)
+                else:
+                    sub_seeds_to_run.append(sub_seed)
+
+            if sub_seeds_to_run:
+                self.pending_units.append((i, sub_seeds_to_run))
+                self.num_unfinished_results += len(sub_seeds_to_run)
+
+        num_results = len(skipped_results) + self.num_unfinished_results
+        num_results_done = 0
+        for result in skipped_results:
+            num_results_done += 1
+            reporter.emit(
+                SeedFinished(
+                    result.get_label(), scheduler.get_seed_outcome(result, True), num_results_done, num_results
+                )
+            )
+            self.record_finished_result(result, None, finished_results)
+
+        job = self.get_job()
+        listener = Listener(address, authkey=authkey)
+        reporter.message(
+            f"Coordinator listening on {address[0]}:{address[1]} for {self.num_unfinished_results} results."
+        )
+        threading.Thread(target=self.accept_workers, args=(listener, job), daemon=True).start()
+
+        while self.num_unfinished_results > 0:
+            result, schedule = self.results.get()
+            seed_store.record_result(self.input_hash, self.config_hash, result)
+            num_results_done += 1
+            reporter.emit(
+                SeedFinished(
+                    result.get_label(), scheduler.get_seed_outcome(result, False), num_results_done, num_results
+                )
+            )
+            self.record_finished_result(result, schedule, finished_results)
+
+            with self.condition:
+                self.num_unfinished_results -= 1
+                self.condition.notify_all()
+
+        # Give the worker threads a moment to tell their workers that the search is complete.
+        listener.close()
+        for thread in list(self.worker_threads):
+            thread.join(timeout=5)
+        seed_store.close()
+
+        finished_results.sort(key=lambda r: (r.seed, -1 if r.sub_seed is None else r.sub_seed))
+        with open(self.output_dir_path + "/seeds.txt", "w") as f:
+            f.write(SEED_FILE_HEADER + "\n")
+            for result in finished_results:
+                f.write(result.to_seed_file_line() + "\n")
+
+        reporter.message("Seed search complete.")
+
+        if self.seed_ranking is not None:
+            scheduler.write_winning_seeds(
+                self.seed_ranking,
+                self.input_dir_path,
+                self.output_dir_path,
+                [WindowConstraint(w["days"], w["max_games"]) for w in self.config["window_constraints"]],
+                self.config["scarce_locations"],
+                self.config_hash,
+                self.config["local_search"]["seconds"],
+                self.config["backup_repair"]["max_chain_depth"],
+                self.config["backup_order"],
+                self.config["home_balancing"],
+                self.config["cache_dir"],
+            )
+
+    def record_finished_result(
+        self,
+        result: SeedResult,
+        schedule: schedule_cache.CachedSchedule | None,
+        finished_results: list[SeedResult],
+    ):
+        if not result.succeeded:
+            return
+
+        finished_results.append(result)
+
+        if self.seed_ranking is not None:
+            self.seed_ranking.consider(result, schedule)
+
+        with self.condition:
+            self.best_num_preferred_phase_misses = scheduler.get_best_num_preferred_phase_misses(
+                self.best_num_preferred_phase_misses, result
+            )
+
+    def accept_workers(self, listener: Listener, job: dict):
+        while True:
+            try:
+                connection = listener.accept()
+            except AuthenticationError:
+                reporter.message("Rejected a worker with the wrong authkey.", LogLevel.QUIET)
+                continue
+            except OSError:
+                return  # The listener was closed because the search is complete.
+
+            thread = threading.Thread(target=self.serve_worker, args=(connection, job), daemon=True)
+            self.worker_threads.append(thread)
+            thread.start()
+
+    def serve_worker(self, connection: Connection, job: dict):
+        """
+        Sends chunks of work to one worker until there is none left. If the worker disconnects partway through a chunk,
+        the sub-seeds it hadn't reported yet go back in the queue.
+        """
+
+        worker_name = "unknown worker"
+        chunk: list[WorkUnit] = []
+
+        try:
+            _, worker_name = connection.recv()
+            reporter.message(f"Worker {worker_name} connected.")
+            connection.send(("job", job))
+
+            while True:
+                chunk = self.take_chunk()
+                if not chunk:
+                    connection.send(("done",))
+                    break
+
+                with self.condition:
+                    max_non_preferred_matchups = scheduler.get_max_non_preferred_matchups(
+                        self.early_abort, self.best_num_preferred_phase_misses
+                    )
+                connection.send(("seeds", chunk, max_non_preferred_matchups))
+
+                while True:
+                    message = connection.recv()
+                    if message[0] == "chunk_done":
+                        break
+
+                    _, result, schedule = message
+                    for seed, sub_seeds in chunk:
+                        if seed == result.seed and result.sub_seed in sub_seeds:
+                            sub_seeds.remove(result.sub_seed)
+                    self.results.put((result, schedule))
+
+                chunk = []
+        except (EOFError, OSError):  # fmt: skip
+            unfinished_units = [(seed, sub_seeds) for seed, sub_seeds in chunk if sub_seeds]
+            reporter.message(
+                f"Lost worker {worker_name}. Requeueing {len(unfinished_units)} unfinished seeds.", LogLevel.QUIET
+            )
+            with self.condition:
+                self.pending_units.extendleft(reversed(unfinished_units))
+                self.condition.notify_all()
+        finally:
+            connection.close()
+
+    def take_chunk(self) -> list[WorkUnit]:
+        """
+        Returns the next chunk of work, waiting if there is none pending but other workers might still fail and requeue
+        theirs. Returns an empty chunk once every result is in.
+        """
+
+        with self.condition:
+            while not self.pending_units:
+                if self.num_unfinished_results == 0:
+                    return []
+                self.condition.wait()
+
+            return [self.pending_units.popleft() for _ in range(min(self.chunk_size, len(self.pending_units)))]
+
+
+def run_worker(address: tuple[str, int], authkey: bytes):
+    """
+    Connects to a coordinator and runs the seeds it hands out until there are none left. The input files are ingested
+    once, and each seed starts from a copy of the ingested league.
+    """
+
+    # A worker runs many seeds unattended, so the scheduler's own output for each of them is left out.
+    reporter.configure("quiet", "text")
+
+    connection = Client(address, authkey=authkey)
+    connection.send(("hello", f"{socket.gethostname()}:{os.getpid()}"))
+    _, job = connection.recv()
+
+    window_constraints = [WindowConstraint(w["days"], w["max_games"]) for w in job["window_constraints"]]
+
+    with tempfile.TemporaryDirectory() as input_dir_path:
+        for file_name, contents in job["input_files"].items():
+            with open(f"{input_dir_path}/{file_name}", "wb") as file:
+                file.write(contents)
+
+        ingestion_result = ingestion.ingest_files(input_dir_path, job["scarce_locations"])
+
+        while True:
+            message = connection.recv()
+            if message[0] == "done":
+                break
+
+            _, chunk, max_non_preferred_matchups = message
+            for seed, sub_seeds in chunk:
+                for result in scheduler.do_test_runs_for_seed(
+                    random_seed=seed,
+                    sub_seeds=sub_seeds,
+                    input_dir_path=input_dir_path,
+                    window_constraints=window_constraints,
+                    scarce_location_names=job["scarce_locations"],
+                    local_search_seconds=job["local_search_seconds"],
+                    ejection_chain_depth=job["ejection_chain_depth"],
+                    backup_order=job["backup_order"],
+                    home_balancing=job["home_balancing"],
+                    max_non_preferred_matchups=max_non_preferred_matchups,
+                    max_isolated_games=job["max_isolated_games"],
+                    ingestion_result=ingestion_result,
+                ):
+                    schedule = (
+                        schedule_cache.capture_schedule(scheduler.matchups, scheduler.gameslots)
+                        if result.succeeded
+                        else None
+                    )
+                    connection.send(("result", result, schedule))
+
+            connection.send(("chunk_done",))
+
+    connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="versizzle.distributed", description="Spread a seed search over workers.")
+    subparsers = parser.add_subparsers(dest="role", required=True)
+
+    coordinator_parser = subparsers.add_parser("coordinator", help="hand out the seed search in config.yml")
+    coordinator_parser.add_argument("--host", default="localhost", help="address to listen on (default: localhost)")
+    coordinator_parser.add_argument("--chunk-size", type=int, default=1, help="seeds per chunk of work (default: 1)")
+
+    worker_parser = subparsers.add_parser("worker", help="run seeds for a coordinator")
+    worker_parser.add_argument("host", help="address of the coordinator")
+
+    for subparser in coordinator_parser, worker_parser:
+        subparser.add_argument("--port", type=int, default=6000, help="port of the coordinator (default: 6000)")
+        subparser.add_argument("--authkey", required=True, help="shared secret of the coordinator and workers")
+
+    args = parser.parse_args()
+
+    if args.role == "coordinator":
+        config = load_config()
+        if "seed_search" not in config:
+            raise Exception("config.yml should include a `seed_search` field to run a distributed seed search")
+
+        reporter.configure(config["log_level"], config["progress"])
+
+        Coordinator(config, args.chunk_size).run((args.host, args.port), args.authkey.encode())
+    else:
+        run_worker((args.host, args.port), args.authkey.encode())
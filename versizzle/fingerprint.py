@@ -0,0 +1,56 @@
+import hashlib
+import json
+import os
+
+INPUT_FILE_NAMES = ["teams.csv", "matchups.csv", "gameslots.csv", "blackouts.csv", "preassignments.csv"]
+OPTIONAL_INPUT_FILE_NAMES = ["gameslot_rules.csv"]
+
+# Bump this whenever a change to the scheduler makes the same seed and config produce a different schedule, so that
+# cached schedules and recorded seed results from older versions are no longer used.
+SCHEDULER_VERSION = 2
+
+# Config fields that don't affect which schedule is generated for a given seed.
+NON_SCHEDULING_CONFIG_FIELDS = {
+    "input_dir",
+    "output_dir",
+    "seed",
+    "sub_seed",
+    "seed_search",
+    "cache_dir",
+    "profile",
+    "log_level",
+    "progress",
+}
+
+
+def get_input_file_names(directory_path: str) -> list[str]:
+    """Returns the names of the input files in the given directory, including the optional ones it has."""
+
+    return INPUT_FILE_NAMES + [n for n in OPTIONAL_INPUT_FILE_NAMES if os.path.exists(f"{directory_path}/{n}")]
+
+
+def hash_input_files(directory_path: str) -> str:
+    """Returns a hash of the contents of all the input files in the given directory."""
+
+    sha = hashlib.sha256()
+
+    for file_name in get_input_file_names(directory_path):
+        with open(f"{directory_path}/{file_name}", "rb") as file:
+            contents = file.read()
+
+        sha.update(file_name.encode())
+        sha.update(len(contents).to_bytes(8))
+        sha.update(contents)
+
+    return sha.hexdigest()
+
+
+def hash_config(config: dict) -> str:
+    """
+    Returns a hash of the config fields that affect which schedule is generated for a given seed, along with the
+    scheduler version.
+    """
+
+    scheduling_config = {k: v for k, v in config.items() if k not in NON_SCHEDULING_CONFIG_FIELDS}
+    scheduling_config["scheduler_version"] = SCHEDULER_VERSION
+    return hashlib.sha256(json.dumps(scheduling_config, sort_keys=True).encode()).hexdigest()
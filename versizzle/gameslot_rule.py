@@ -0,0 +1,70 @@
+from collections.abc import Iterator
+from datetime import date, datetime, time, timedelta
+
+WEEKDAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+class GameslotRule:
+    """
+    A run of gameslots at one location, like "Saturdays from 9:00AM to 4:00PM, hourly, from 9/10/2022 to 12/17/2022,
+    except 11/26/2022". Games start every `interval_minutes`, from the first time up to and including the last time,
+    on each of the weekdays (0 for Monday) between the first and last dates, other than the excluded dates.
+    """
+
+    def __init__(
+        self,
+        location_name: str,
+        weekdays: set[int],
+        first_date: date,
+        last_date: date,
+        first_time: time,
+        last_time: time,
+        interval_minutes: int,
+        excluded_dates: set[date],
+    ):
+        if first_date > last_date:
+            raise Exception("Tried to create gameslot rule with first date after last date")
+        if first_time > last_time:
+            raise Exception("Tried to create gameslot rule with first time after last time")
+        if interval_minutes <= 0:
+            raise Exception("Tried to create gameslot rule with an interval that isn't positive")
+
+        self.location_name = location_name
+        self.weekdays = weekdays
+        self.first_date = first_date
+        self.last_date = last_date
+        self.first_time = first_time
+        self.last_time = last_time
+        self.interval_minutes = interval_minutes
+        self.excluded_dates = excluded_dates
+
+    def get_times(self) -> list[time]:
+        """Returns the start times of the games on each day of the rule."""
+
+        times = []
+        start = datetime.combine(self.first_date, self.first_time)
+        end = datetime.combine(self.first_date, self.last_time)
+        while start <= end:
+            times.append(start.time())
+            start += timedelta(minutes=self.interval_minutes)
+
+        return times
+
+    def expand(self) -> Iterator[tuple[date, time]]:
+        """Yields the date and time of each gameslot of the rule, in order, without listing them all up front."""
+
+        times = self.get_times()
+        day = self.first_date
+        while day <= self.last_date:
+            if day.weekday() in self.weekdays and day not in self.excluded_dates:
+                for t in times:
+                    yield day, t
+            day += timedelta(days=1)
+
+    def __str__(self):
+        weekdays = "/".join(WEEKDAY_NAMES[d] for d in sorted(self.weekdays))
+        return (
+            f"< {weekdays} {self.first_time.isoformat('minutes')}-{self.last_time.isoformat('minutes')} every "
+            + f"{self.interval_minutes} minutes from {self.first_date.isoformat()} to {self.last_date.isoformat()} "
+            + f"at {self.location_name}, except {len(self.excluded_dates)} dates >"
+        )
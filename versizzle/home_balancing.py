@@ -0,0 +1,77 @@
+"""
+Chooses preferred home teams so that every team gets its share of home games whenever that is possible at all. A team
+wants at least half of its asymmetric matchups (rounded down) at home. Choosing a home team for each matchup, so that
+as many of those wants as possible are met, is a bipartite matching problem: each matchup is matched to one of its two
+teams, and each team can take as many matchups as it still needs. It is solved exactly with augmenting paths, which
+reassign earlier matchups to their other team when that makes room.
+"""
+
+import random
+from collections import defaultdict
+from collections.abc import Sequence
+
+from versizzle.matchup import Matchup
+from versizzle.team import Team
+
+
+class HomeOrientation:
+    """Matches matchups to the teams that need home games, one matchup at a time."""
+
+    def __init__(self, needs: dict[Team, int], rng: random.Random):
+        self.remaining_needs = dict(needs)
+        self.rng = rng
+
+        self.home_teams: dict[Matchup, Team] = {}
+        self.matchups_by_home_team: defaultdict[Team, list[Matchup]] = defaultdict(list)
+
+    def add(self, matchup: Matchup) -> bool:
+        """
+        Gives the matchup to a team that still needs home games, if it can, moving other matchups to their other team
+        to make room. Returns whether the matchup was given to a team.
+        """
+
+        return self.try_to_give(matchup, set())
+
+    def try_to_give(self, matchup: Matchup, visited_teams: set[Team]) -> bool:
+        teams = [matchup.team_a, matchup.team_b]
+        self.rng.shuffle(teams)
+
+        for team in teams:
+            if team in visited_teams:
+                continue
+            visited_teams.add(team)
+
+            if self.remaining_needs.get(team, 0) > 0:
+                self.remaining_needs[team] -= 1
+                self.give(matchup, team)
+                return True
+
+            # The team is full, but one of its matchups might move to its other team to make room.
+            for other_matchup in list(self.matchups_by_home_team[team]):
+                if self.try_to_give(other_matchup, visited_teams):
+                    self.give(matchup, team)
+                    return True
+
+        return False
+
+    def give(self, matchup: Matchup, team: Team):
+        previous_team = self.home_teams.get(matchup)
+        if previous_team is not None:
+            self.matchups_by_home_team[previous_team].remove(matchup)
+
+        self.home_teams[matchup] = team
+        self.matchups_by_home_team[team].append(matchup)
+
+
+def orient_matchups(matchups: Sequence[Matchup], needs: dict[Team, int], rng: random.Random) -> dict[Matchup, Team]:
+    """
+    Returns a home team for as many of the matchups as the needs call for, such that each team gets at most the number
+    of home games it needs, and as many needs as possible are met. The other matchups are left out; giving them to
+    either team can only help.
+    """
+
+    orientation = HomeOrientation(needs, rng)
+    for m in matchups:
+        orientation.add(m)
+
+    return orientation.home_teams
@@ -1,15 +1,21 @@
 import csv
+import os
 from collections import defaultdict
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import date, time
 
 from versizzle.blackout import Blackout
 from versizzle.gameslot import Gameslot
+from versizzle.gameslot_rule import WEEKDAY_NAMES, GameslotRule
 from versizzle.location import Location
 from versizzle.matchup import Matchup
 from versizzle.preassignment import Preassignment
+from versizzle.profiler import profiler
+from versizzle.progress import IngestionSummary, LogLevel, reporter
+from versizzle.scarcity import AUTO_SCARCE_LOCATIONS, ScarceLocationNames
 from versizzle.team import Team
+from versizzle.utils import parse_input_date, parse_input_time
 
 
 @dataclass
@@ -18,6 +24,8 @@ class IngestionResult:
     teams: dict[tuple[str, str], Team] = field(default_factory=dict)
     matchups: Sequence[Matchup] = field(default_factory=list)
     gameslots: list[Gameslot] = field(default_factory=list)
+    # The gameslots on each date at each location (by name), in the order they were listed.
+    gameslots_by_date_and_location: dict[tuple[date, str], list[Gameslot]] = field(default_factory=dict)
     locations: dict[str, Location] = field(default_factory=dict)
     blackouts: Sequence[Blackout] = field(default_factory=list)
     preassignments: list[Preassignment] = field(default_factory=list)
@@ -25,16 +33,29 @@ class IngestionResult:
 
 def ingest_files(
     directory_path: str,
-    scarce_location_names: list[str],
+    scarce_location_names: ScarceLocationNames,
 ) -> IngestionResult:
-    result = IngestionResult()
-    scarce_locations = set(scarce_location_names)
+    """
+    Reads the input files. With automatic scarce locations, no location is scarce yet; they are marked once the
+    scheduler knows the demand for each.
+    """
 
-    ingest_teams_file(directory_path, scarce_locations, result)
-    ingest_matchups_file(directory_path, result)
-    ingest_gameslots_file(directory_path, scarce_locations, result)
-    ingest_blackouts_file(directory_path, result)
-    ingest_preassignments_file(directory_path, result)
+    result = IngestionResult()
+    scarce_locations = set() if scarce_location_names == AUTO_SCARCE_LOCATIONS else set(scarce_location_names)
+
+    with profiler.phase("teams.csv"):
+        ingest_teams_file(directory_path, scarce_locations, result)
+    with profiler.phase("matchups.csv"):
+        ingest_matchups_file(directory_path, result)
+    with profiler.phase("gameslots.csv"):
+        ingest_gameslots_file(directory_path, scarce_locations, result)
+    if os.path.exists(f"{directory_path}/gameslot_rules.csv"):
+        with profiler.phase("gameslot_rules.csv"):
+            ingest_gameslot_rules_file(directory_path, scarce_locations, result)
+    with profiler.phase("blackouts.csv"):
+        ingest_blackouts_file(directory_path, result)
+    with profiler.phase("preassignments.csv"):
+        ingest_preassignments_file(directory_path, result)
 
     return result
 
@@ -44,18 +65,9 @@ def ingest_teams_file(
     scarce_location_names: set[str],
     result: IngestionResult,
 ) -> None:
-    file_path = f"{directory_path}/teams.csv"
-
-    with open(file_path, newline="") as file:
-        lines = list(csv.reader(file))
+    rows = read_rows(directory_path, "teams.csv", ["division", "team", "home location"])
 
-    if not lines:
-        raise Exception("teams.csv must contain at least 1 line (a header)")
-
-    if lines[0] != ["division", "team", "home location"]:
-        raise Exception("teams.csv should have 3 columns: 'division', 'team', and 'home location'")
-
-    for division, name, home_location_name in lines[1:]:
+    for division, name, home_location_name in rows:
         if home_location_name == "NONE":
             home_location = None
         else:
@@ -75,35 +87,25 @@ def ingest_teams_file(
         )
         result.divisions_to_counts[division] += 1
 
-    print("======================== ingested divisions: ========================")
-    for division, count in result.divisions_to_counts.items():
-        print(f"{division} ({count} teams)")
-
-    print()
-    print("======================== ingested teams: ========================")
-    for team in result.teams.values():
-        print(team)
-    print()
+    if reporter.shows(LogLevel.VERBOSE):
+        reporter.emit(
+            IngestionSummary(
+                "ingested divisions",
+                [f"{division} ({count} teams)" for division, count in result.divisions_to_counts.items()],
+            )
+        )
+        reporter.emit(IngestionSummary("ingested teams", [str(team) for team in result.teams.values()]))
 
 
 def ingest_matchups_file(
     directory_path: str,
     result: IngestionResult,
 ) -> None:
-    file_path = f"{directory_path}/matchups.csv"
-
-    with open(file_path, newline="") as file:
-        lines = list(csv.reader(file))
-
-    if not lines:
-        raise Exception("matchups.csv must contain at least 1 line (a header)")
-
-    if lines[0] != ["division", "team a", "team b"]:
-        raise Exception("matchups.csv should have 3 columns: 'division', 'team a', and 'team b'")
+    rows = read_rows(directory_path, "matchups.csv", ["division", "team a", "team b"])
 
     matchups: list[Matchup] = []
 
-    for division, team_a_name, team_b_name in lines[1:]:
+    for division, team_a_name, team_b_name in rows:
         team_a = result.teams[(division, team_a_name)]
         team_b = result.teams[(division, team_b_name)]
 
@@ -112,9 +114,8 @@ def ingest_matchups_file(
 
     result.matchups = matchups
 
-    print("======================== ingested matchups: ========================")
-    print_collection(result.matchups)
-    print()
+    if reporter.shows(LogLevel.VERBOSE):
+        reporter.emit(IngestionSummary("ingested matchups", summarize_collection(result.matchups)))
 
 
 def ingest_gameslots_file(
@@ -122,71 +123,116 @@ def ingest_gameslots_file(
     scarce_location_names: set[str],
     result: IngestionResult,
 ) -> None:
-    file_path = f"{directory_path}/gameslots.csv"
+    rows = read_rows(directory_path, "gameslots.csv", ["date", "time", "location"])
 
-    with open(file_path, newline="") as file:
-        lines = list(csv.reader(file))
+    for date_string, time_string, location_name in rows:
+        add_gameslot(
+            parse_input_date(date_string), parse_input_time(time_string), location_name, scarce_location_names, result
+        )
 
-    if not lines:
-        raise Exception("gameslots.csv must contain at least 1 line (a header)")
+    if reporter.shows(LogLevel.VERBOSE):
+        reporter.emit(IngestionSummary("ingested gameslots", summarize_collection(result.gameslots)))
+        reporter.emit(
+            IngestionSummary(
+                "ingested locations",
+                [f"{location} ({location.num_gameslots} gameslots)" for location in result.locations.values()],
+            )
+        )
 
-    if lines[0] != ["date", "time", "location"]:
-        raise Exception("gameslots.csv should have 3 columns: 'date', 'time', and 'location'")
 
-    for date_string, time_string, location_name in lines[1:]:
-        location = result.locations.get(location_name)
+def ingest_gameslot_rules_file(
+    directory_path: str,
+    scarce_location_names: set[str],
+    result: IngestionResult,
+) -> None:
+    """
+    Reads the optional `gameslot_rules.csv`, where each line stands for a run of gameslots at one location, like every
+    Saturday from 9:00AM to 4:00PM. Its gameslots are added to the ones from `gameslots.csv`, one rule at a time.
+    """
 
-        if location is None:
-            location = Location(
-                location_name,
-                location_name in scarce_location_names,
-            )
-            result.locations[location_name] = location
+    rows = read_rows(
+        directory_path,
+        "gameslot_rules.csv",
+        ["location", "days", "first date", "last date", "first time", "last time", "interval", "except"],
+    )
 
-        date_and_time = datetime.strptime(
-            f"{date_string} {time_string}",
-            "%m/%d/%Y %I:%M%p",
-        )
+    # Each rule, with the number of gameslots it added.
+    rules: list[tuple[GameslotRule, int]] = []
 
-        result.gameslots.append(
-            Gameslot(
-                date_and_time.date(),
-                date_and_time.time(),
-                location,
+    for (
+        location_name,
+        days,
+        first_date_string,
+        last_date_string,
+        first_time_string,
+        last_time_string,
+        interval,
+        excluded_date_strings,
+    ) in rows:
+        weekdays = set()
+        for day in days.split("/"):
+            if day not in WEEKDAY_NAMES:
+                raise Exception(f"Unknown day '{day}' in gameslot_rules.csv. Choose from: {', '.join(WEEKDAY_NAMES)}")
+            weekdays.add(WEEKDAY_NAMES.index(day))
+
+        rule = GameslotRule(
+            location_name,
+            weekdays,
+            parse_input_date(first_date_string),
+            parse_input_date(last_date_string),
+            parse_input_time(first_time_string),
+            parse_input_time(last_time_string),
+            int(interval),
+            set() if excluded_date_strings == "-" else {parse_input_date(d) for d in excluded_date_strings.split()},
+        )
+        num_gameslots = 0
+        for gameslot_date, gameslot_time in rule.expand():
+            add_gameslot(gameslot_date, gameslot_time, location_name, scarce_location_names, result)
+            num_gameslots += 1
+        rules.append((rule, num_gameslots))
+
+    if reporter.shows(LogLevel.VERBOSE):
+        reporter.emit(
+            IngestionSummary(
+                "ingested gameslot rules", [f"{rule} ({num_gameslots} gameslots)" for rule, num_gameslots in rules]
             )
         )
-        location.num_gameslots += 1
 
-    print("======================== ingested gameslots: ========================")
-    print_collection(result.gameslots)
-    print()
 
-    print("======================== ingested locations: ========================")
-    for location in result.locations.values():
-        print(f"{location} ({location.num_gameslots} gameslots)")
-    print()
+def add_gameslot(
+    gameslot_date: date,
+    gameslot_time: time,
+    location_name: str,
+    scarce_location_names: set[str],
+    result: IngestionResult,
+) -> None:
+    """Adds a gameslot, and its location if it's a new one. A gameslot listed twice would let two games share it."""
+
+    location = result.locations.get(location_name)
+
+    if location is None:
+        location = Location(
+            location_name,
+            location_name in scarce_location_names,
+        )
+        result.locations[location_name] = location
+
+    gameslot = Gameslot(gameslot_date, gameslot_time, location)
+
+    gameslots_on_date = result.gameslots_by_date_and_location.setdefault((gameslot_date, location_name), [])
+    if any(g.time == gameslot_time for g in gameslots_on_date):
+        raise Exception(f"Gameslot {gameslot} is listed more than once")
+    gameslots_on_date.append(gameslot)
+
+    result.gameslots.append(gameslot)
+    location.num_gameslots += 1
 
 
 def ingest_blackouts_file(
     directory_path: str,
     result: IngestionResult,
 ) -> None:
-    file_path = f"{directory_path}/blackouts.csv"
-
-    with open(file_path, newline="") as file:
-        lines = list(csv.reader(file))
-
-    if not lines:
-        raise Exception("blackouts.csv must contain at least 1 line (a header)")
-
-    if lines[0] != [
-        "date",
-        "start time",
-        "end time",
-        "division",
-        "team",
-    ]:
-        raise Exception("blackouts.csv should have 5 columns: 'date', 'start time', 'end time', 'division', and 'team'")
+    rows = read_rows(directory_path, "blackouts.csv", ["date", "start time", "end time", "division", "team"])
 
     blackouts: list[Blackout] = []
 
@@ -196,11 +242,11 @@ def ingest_blackouts_file(
         end_time_string,
         division,
         team_name,
-    ) in lines[1:]:
-        date = datetime.strptime(date_string, "%m/%d/%Y").date()
+    ) in rows:
+        date = parse_input_date(date_string)
 
-        start_time = None if start_time_string == "-" else datetime.strptime(start_time_string, "%I:%M%p").time()
-        end_time = None if end_time_string == "-" else datetime.strptime(end_time_string, "%I:%M%p").time()
+        start_time = None if start_time_string == "-" else parse_input_time(start_time_string)
+        end_time = None if end_time_string == "-" else parse_input_time(end_time_string)
 
         blackout_division = None if division == "ALL" else division
         blackout_team = None if team_name == "ALL" else team_name
@@ -217,34 +263,15 @@ def ingest_blackouts_file(
 
     result.blackouts = blackouts
 
-    print("======================== ingested blackouts: ========================")
-    print_collection(result.blackouts)
-    print()
+    if reporter.shows(LogLevel.VERBOSE):
+        reporter.emit(IngestionSummary("ingested blackouts", summarize_collection(result.blackouts)))
 
 
 def ingest_preassignments_file(
     directory_path: str,
     result: IngestionResult,
 ) -> None:
-    file_path = f"{directory_path}/preassignments.csv"
-
-    with open(file_path, newline="") as file:
-        lines = list(csv.reader(file))
-
-    if not lines:
-        raise Exception("preassignments.csv must contain at least 1 line (a header)")
-
-    if lines[0] != [
-        "date",
-        "time",
-        "location",
-        "division",
-        "team a",
-        "team b",
-    ]:
-        raise Exception(
-            "preassignments.csv should have 6 columns: 'date', 'time', 'location', 'division', 'team a', and 'team b'"
-        )
+    rows = read_rows(directory_path, "preassignments.csv", ["date", "time", "location", "division", "team a", "team b"])
 
     for (
         date_string,
@@ -253,9 +280,9 @@ def ingest_preassignments_file(
         division,
         team_a_name,
         team_b_name,
-    ) in lines[1:]:
-        date = datetime.strptime(date_string, "%m/%d/%Y").date()
-        time = datetime.strptime(time_string, "%I:%M%p").time()
+    ) in rows:
+        date = parse_input_date(date_string)
+        time = parse_input_time(time_string)
         location = result.locations[location_name]
         team_a = result.teams[(division, team_a_name)]
         team_b = result.teams[(division, team_b_name)]
@@ -271,16 +298,32 @@ def ingest_preassignments_file(
         )
 
 
-def print_collection(items: Sequence[object]) -> None:
-    if len(items) <= 20:
-        for item in items:
-            print(item)
-        return
+def read_rows(directory_path: str, file_name: str, header: list[str]) -> Iterator[list[str]]:
+    """
+    Checks the header of an input file, then yields its rows one at a time, so that a large file is never held in
+    memory as a whole.
+    """
+
+    with open(f"{directory_path}/{file_name}", newline="") as file:
+        reader = csv.reader(file)
+        first_line = next(reader, None)
 
-    for item in items[:10]:
-        print(item)
+        if first_line is None:
+            raise Exception(f"{file_name} must contain at least 1 line (a header)")
 
-    print(f"...{len(items) - 20} more...")
+        if first_line != header:
+            column_names = [f"'{column}'" for column in header]
+            raise Exception(
+                f"{file_name} should have {len(header)} columns: {', '.join(column_names[:-1])}, and {column_names[-1]}"
+            )
+
+        yield from reader
+
+
+def summarize_collection(items: Sequence[object]) -> list[str]:
+    """Returns a line for each item, or for the first and last 10 items if there are more than 20."""
+
+    if len(items) <= 20:
+        return [str(item) for item in items]
 
-    for item in items[-10:]:
-        print(item)
+    return [*map(str, items[:10]), f"...{len(items) - 20} more...", *map(str, items[-10:])]
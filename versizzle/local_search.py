@@ -0,0 +1,266 @@
+import math
+import random
+import time
+from collections.abc import Iterable, Sequence
+from datetime import date, timedelta
+
+from versizzle.gameslot import Gameslot
+from versizzle.location import Location
+from versizzle.matchup import Matchup
+from versizzle.profiler import profiler
+from versizzle.progress import reporter
+from versizzle.team import Team
+from versizzle.utils import unwrap
+from versizzle.window_constraint import WindowConstraint
+
+# Penalties that make up the score of a schedule. Lower scores are better.
+NON_PREFERRED_PENALTY = 10
+WEEKDAY_PENALTY = 2
+CONSECUTIVE_DAYS_PENALTY = 1
+ISOLATED_PENALTY = 4
+# Per home game that a team is short of half its asymmetric matchups (rounded down). Home team selection aims for that
+# share, so this outweighs any other single penalty, and a step that costs a team a home game it needs is almost never
+# kept.
+HOME_SHORTFALL_PENALTY = 20
+
+# Simulated annealing starts at this temperature and cools linearly to zero by the end of the time limit.
+INITIAL_TEMPERATURE = 2.0
+
+
+class LocalSearch:
+    """
+    Takes an already valid schedule and improves it with simulated annealing. Each step either moves a matchup to a free
+    gameslot or swaps the gameslots of two matchups. Steps are scored incrementally: only the penalties of the teams,
+    days and blocks touched by the step are recomputed. The best schedule seen is restored at the end, so local search
+    never makes a schedule invalid or worse than before.
+    """
+
+    def __init__(self, matchups: Sequence[Matchup], window_constraints: list[WindowConstraint], rng: random.Random):
+        self.matchups: list[Matchup] = [m for m in matchups if not m.is_preassigned]
+        self.window_constraints: list[WindowConstraint] = window_constraints
+        self.rng: random.Random = rng
+
+        self.candidate_slots: dict[Matchup, list[Gameslot]] = {}
+        self.candidate_slot_sets: dict[Matchup, set[Gameslot]] = {}
+        for m in self.matchups:
+            candidates = unwrap(m.preferred_gameslots) + unwrap(m.backup_gameslots)
+            self.candidate_slots[m] = candidates
+            self.candidate_slot_sets[m] = set(candidates)
+
+    def run(self, seconds: float):
+        if not self.matchups:
+            return
+
+        reporter.message(f"Local search started ({seconds} seconds).")
+
+        initial_score = self.get_score()
+        score = initial_score
+        best_score = initial_score
+        best_assignment = self.get_assignment()
+
+        start_time = time.monotonic()
+        deadline = start_time + seconds
+        temperature = INITIAL_TEMPERATURE
+        num_steps = 0
+        num_accepted = 0
+
+        while True:
+            if num_steps % 100 == 0:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                temperature = INITIAL_TEMPERATURE * (deadline - now) / seconds
+
+            num_steps += 1
+            delta = self.try_random_step(temperature)
+            if delta is None:
+                continue
+
+            num_accepted += 1
+            score += delta
+            if score < best_score:
+                best_score = score
+                best_assignment = self.get_assignment()
+
+        self.restore_assignment(best_assignment)
+
+        profiler.count("local_search_steps", num_steps)
+        profiler.count("local_search_accepted_steps", num_accepted)
+        reporter.message(f"Local search took {num_steps} steps and accepted {num_accepted} of them.")
+        reporter.message(f"Local search improved score: {initial_score} -> {best_score}")
+
+    def try_random_step(self, temperature: float) -> int | None:
+        """
+        Picks a random matchup and a random candidate gameslot for it. If the gameslot is free, tries moving the matchup
+        there. If the gameslot is taken by a matchup that could use our matchup's gameslot, tries swapping the two. The
+        step is kept according to the simulated annealing acceptance rule. Returns the change in score if the step was
+        kept, or `None` if it was not.
+        """
+
+        matchup = self.rng.choice(self.matchups)
+        original_slot = unwrap(matchup.selected_gameslot)
+        target_slot = self.rng.choice(self.candidate_slots[matchup])
+
+        if target_slot == original_slot:
+            return None
+
+        other_matchup = target_slot.selected_matchup
+        if other_matchup is not None and (
+            other_matchup.is_preassigned or original_slot not in self.candidate_slot_sets[other_matchup]
+        ):
+            return None
+
+        moved_matchups = [matchup] if other_matchup is None else [matchup, other_matchup]
+        score_before = self.get_local_score(moved_matchups, [original_slot, target_slot])
+
+        if not self.apply_step(matchup, other_matchup, original_slot, target_slot):
+            return None
+
+        delta = self.get_local_score(moved_matchups, [original_slot, target_slot]) - score_before
+
+        if delta <= 0 or (temperature > 0 and self.rng.random() < math.exp(-delta / temperature)):
+            return delta
+
+        self.undo_step(matchup, other_matchup, original_slot, target_slot)
+        return None
+
+    def apply_step(
+        self,
+        matchup: Matchup,
+        other_matchup: Matchup | None,
+        original_slot: Gameslot,
+        target_slot: Gameslot,
+    ) -> bool:
+        """
+        Moves `matchup` to `target_slot`, and `other_matchup` (if any) to `original_slot`. Returns `True` if this was
+        done. Returns `False` and leaves the assignments unchanged if it would violate a window constraint.
+        """
+
+        matchup.deselect_gameslot()
+        if other_matchup is not None:
+            other_matchup.deselect_gameslot()
+
+        if all(w.is_satisfied_by_selection(matchup, target_slot) for w in self.window_constraints):
+            matchup.select_gameslot(target_slot)
+
+            if other_matchup is None:
+                return True
+            if all(w.is_satisfied_by_selection(other_matchup, original_slot) for w in self.window_constraints):
+                other_matchup.select_gameslot(original_slot)
+                return True
+
+            matchup.deselect_gameslot()
+
+        matchup.select_gameslot(original_slot)
+        if other_matchup is not None:
+            other_matchup.select_gameslot(target_slot)
+        return False
+
+    def undo_step(
+        self,
+        matchup: Matchup,
+        other_matchup: Matchup | None,
+        original_slot: Gameslot,
+        target_slot: Gameslot,
+    ):
+        matchup.deselect_gameslot()
+        if other_matchup is not None:
+            other_matchup.deselect_gameslot()
+            other_matchup.select_gameslot(target_slot)
+        matchup.select_gameslot(original_slot)
+
+    def get_score(self) -> int:
+        """Returns the score of the whole schedule. This is only used once, to seed the incremental score."""
+
+        score = sum(get_matchup_penalty(m) for m in self.matchups)
+
+        team_dates: dict[Team, set[date]] = {}
+        blocks: set[tuple[Location, date]] = set()
+        for m in self.matchups:
+            gameslot = unwrap(m.selected_gameslot)
+            for team in m.team_a, m.team_b:
+                team_dates.setdefault(team, set()).update(team.games_by_date.keys())
+            blocks.add((gameslot.location, gameslot.date))
+
+        score += sum(get_consecutive_days_penalty(team, dates) for team, dates in team_dates.items())
+        score += sum(get_home_shortfall_penalty(team) for team in team_dates)
+        score += sum(get_isolated_penalty(location, date) for location, date in blocks)
+
+        return score
+
+    def get_local_score(self, moved_matchups: list[Matchup], touched_slots: list[Gameslot]) -> int:
+        """
+        Returns the part of the score that can change when `moved_matchups` move among `touched_slots`: the penalties
+        of the moved matchups themselves, the consecutive days and home games of their teams, and the isolation of the
+        touched blocks.
+        """
+
+        score = sum(get_matchup_penalty(m) for m in moved_matchups)
+
+        touched_dates = {g.date for g in touched_slots}
+        teams = {team for m in moved_matchups for team in (m.team_a, m.team_b)}
+        score += sum(get_consecutive_days_penalty(team, touched_dates) for team in teams)
+        score += sum(get_home_shortfall_penalty(team) for team in teams)
+
+        blocks = {(g.location, g.date) for g in touched_slots}
+        score += sum(get_isolated_penalty(location, date) for location, date in blocks)
+
+        return score
+
+    def get_assignment(self) -> dict[Matchup, Gameslot]:
+        return {m: unwrap(m.selected_gameslot) for m in self.matchups}
+
+    def restore_assignment(self, assignment: dict[Matchup, Gameslot]):
+        for m in self.matchups:
+            m.deselect_gameslot()
+        for m, gameslot in assignment.items():
+            m.select_gameslot(gameslot)
+
+
+def get_matchup_penalty(matchup: Matchup) -> int:
+    gameslot = unwrap(matchup.selected_gameslot)
+
+    penalty = 0
+    if not matchup.selected_gameslot_is_preferred:
+        penalty += NON_PREFERRED_PENALTY
+    if gameslot.date.weekday() not in [4, 5]:
+        # Weekday games count against both teams, matching the weekday metrics.
+        penalty += 2 * WEEKDAY_PENALTY
+
+    return penalty
+
+
+def get_consecutive_days_penalty(team: Team, dates: Iterable[date]) -> int:
+    """Returns the penalty for the consecutive game day pairs of `team` which include any of the given dates."""
+
+    pair_starts = set()
+    for d in dates:
+        pair_starts.add(d - timedelta(days=1))
+        pair_starts.add(d)
+
+    num_pairs = sum(
+        1 for d in pair_starts if team.games_by_date.get(d) and team.games_by_date.get(d + timedelta(days=1))
+    )
+
+    return num_pairs * CONSECUTIVE_DAYS_PENALTY
+
+
+def get_home_shortfall_penalty(team: Team) -> int:
+    """
+    Returns the penalty for the home games `team` is short of half its asymmetric matchups (rounded down), counting the
+    games that are actually at its home location.
+    """
+
+    num_home_games = sum(
+        1
+        for m in team.matchups
+        if m.team_a.home_location != m.team_b.home_location
+        and m.selected_gameslot is not None
+        and m.selected_gameslot.location == team.home_location
+    )
+
+    return max(0, team.num_asymmetric_matchups // 2 - num_home_games) * HOME_SHORTFALL_PENALTY
+
+
+def get_isolated_penalty(location: Location, date: date) -> int:
+    return ISOLATED_PENALTY if location.num_games_by_date[date] == 1 else 0
@@ -4,6 +4,9 @@ from versizzle.team import Team
 
 class Matchup:
     def __init__(self, team_a: Team, team_b: Team):
+        # Declaring import here to prevent circular import.
+        from versizzle.metrics import ScheduleMetrics
+
         if team_a.division != team_b.division:
             raise Exception("tried to create matchup between two teams of different divisions")
         if team_a.name == team_b.name:
@@ -29,6 +32,9 @@ class Matchup:
         self.selected_gameslot: Gameslot | None = None
         self.selected_gameslot_is_preferred: bool = False
 
+        # If set, this is notified of every gameslot selection and deselection
+        self.metrics: ScheduleMetrics | None = None
+
     def select_preferred_home_team(self, team: Team):
         if self.preferred_home_team is not None:
             raise Exception("Can't assign a preferred home team to a matchup that already has one")
@@ -66,12 +72,18 @@ class Matchup:
         gameslot.selected_matchup = self
         gameslot.location.num_games_by_date[gameslot.date] += 1
 
+        if self.metrics is not None:
+            self.metrics.record_selection(self, gameslot)
+
     def deselect_gameslot(self):
         if self.selected_gameslot is None:
             raise Exception("Tried to deselect gameslot when none is selected")
 
         prev_gameslot = self.selected_gameslot
 
+        if self.metrics is not None:
+            self.metrics.record_deselection(self, prev_gameslot)
+
         self.selected_gameslot = None
         self.selected_gameslot_is_preferred = False
         self.team_a.games_by_date[prev_gameslot.date].remove(self)
@@ -0,0 +1,189 @@
+from bisect import bisect_left, insort
+from collections import Counter
+from collections.abc import Iterable
+from datetime import date, timedelta
+
+from versizzle.gameslot import Gameslot
+from versizzle.team import Team
+
+
+class ScheduleMetrics:
+    """
+    Keeps the schedule metrics up to date as matchups select and deselect gameslots, so that they can be read at any
+    time without scanning the schedule. Matchups report their changes through `record_selection` and
+    `record_deselection`.
+    """
+
+    def __init__(self, teams: Iterable[Team]):
+        # Declaring import here to prevent circular import.
+        from versizzle.matchup import Matchup
+
+        self.teams: list[Team] = list(teams)
+
+        self.num_weekday_games_by_team: dict[Team, int] = {team: 0 for team in self.teams}
+        self.num_weekday_games_to_num_teams: Counter[int] = Counter({0: len(self.teams)})
+        self.total_weekday_games: int = 0
+
+        # Only teams with at least one asymmetric matchup have an asymmetric home fraction.
+        self.num_asymmetric_home_games_by_team: dict[Team, int] = {team: 0 for team in self.teams}
+        self.asymmetric_home_fractions_to_num_teams: Counter[float] = Counter(
+            0.0 for team in self.teams if team.num_asymmetric_matchups
+        )
+
+        self.num_consecutive_pairs_by_team: dict[Team, int] = {team: 0 for team in self.teams}
+        self.num_consecutive_pairs_to_num_teams: Counter[int] = Counter({0: len(self.teams)})
+
+        # Sorted dates of each team's games, and the number of times each gap between consecutive games occurs.
+        self.game_dates_by_team: dict[Team, list[date]] = {team: [] for team in self.teams}
+        self.gaps_to_counts: Counter[int] = Counter()
+
+        self.block_sizes_to_counts: Counter[int] = Counter()
+
+        self.non_preferred_matchups: set[Matchup] = set()
+
+    def record_selection(self, matchup, gameslot: Gameslot):
+        """Must be called right after the matchup has selected the gameslot."""
+
+        # Empty blocks are not counted.
+        block_size = gameslot.location.num_games_by_date[gameslot.date]
+        self._move_count(self.block_sizes_to_counts, block_size - 1 or None, block_size)
+
+        if not matchup.selected_gameslot_is_preferred:
+            self.non_preferred_matchups.add(matchup)
+
+        for team in matchup.team_a, matchup.team_b:
+            if gameslot.date.weekday() not in [4, 5]:
+                self._add_weekday_games(team, 1)
+            if matchup.team_a.home_location != matchup.team_b.home_location and gameslot.location == team.home_location:
+                self._add_asymmetric_home_games(team, 1)
+            if len(team.games_by_date[gameslot.date]) == 1:
+                # This is the team's first game on this date, so it may form new consecutive game day pairs.
+                self._add_consecutive_pairs(team, self._count_neighboring_game_days(team, gameslot.date))
+            self._add_game_date(team, gameslot.date)
+
+    def record_deselection(self, matchup, gameslot: Gameslot):
+        """Must be called right before the matchup deselects the gameslot."""
+
+        # Empty blocks are not counted.
+        block_size = gameslot.location.num_games_by_date[gameslot.date]
+        self._move_count(self.block_sizes_to_counts, block_size, block_size - 1 or None)
+
+        self.non_preferred_matchups.discard(matchup)
+
+        for team in matchup.team_a, matchup.team_b:
+            if gameslot.date.weekday() not in [4, 5]:
+                self._add_weekday_games(team, -1)
+            if matchup.team_a.home_location != matchup.team_b.home_location and gameslot.location == team.home_location:
+                self._add_asymmetric_home_games(team, -1)
+            if len(team.games_by_date[gameslot.date]) == 1:
+                # This is the team's last game on this date, so its consecutive game day pairs are going away.
+                self._add_consecutive_pairs(team, -self._count_neighboring_game_days(team, gameslot.date))
+            self._remove_game_date(team, gameslot.date)
+
+    def get_num_weekday_games_to_num_teams(self) -> dict[int, int]:
+        return dict(self.num_weekday_games_to_num_teams)
+
+    def get_asymmetric_home_fractions(self) -> list[float]:
+        """Returns the actual asymmetric home fraction of every team with asymmetric matchups, lowest first."""
+
+        return sorted(self.asymmetric_home_fractions_to_num_teams.elements())
+
+    def get_num_asymmetric_home_games(self, team: Team) -> int:
+        return self.num_asymmetric_home_games_by_team[team]
+
+    def get_block_sizes_to_counts(self) -> dict[int, int]:
+        return dict(self.block_sizes_to_counts)
+
+    def get_num_consecutive_pairs_to_num_teams(self) -> dict[int, int]:
+        return dict(self.num_consecutive_pairs_to_num_teams)
+
+    def get_game_dates(self, team: Team) -> list[date]:
+        return self.game_dates_by_team[team]
+
+    def get_largest_gaps(self, n: int) -> list[int]:
+        """Returns the `n` largest gaps (in days) between consecutive games of the same team, largest first."""
+
+        largest_gaps: list[int] = []
+        for gap in sorted(self.gaps_to_counts, reverse=True):
+            largest_gaps.extend([gap] * min(self.gaps_to_counts[gap], n - len(largest_gaps)))
+            if len(largest_gaps) == n:
+                break
+
+        return largest_gaps
+
+    def get_num_non_preferred_matchups(self) -> int:
+        return len(self.non_preferred_matchups)
+
+    def _add_weekday_games(self, team: Team, amount: int):
+        before = self.num_weekday_games_by_team[team]
+        self.num_weekday_games_by_team[team] = before + amount
+        self._move_count(self.num_weekday_games_to_num_teams, before, before + amount)
+        self.total_weekday_games += amount
+
+    def _add_asymmetric_home_games(self, team: Team, amount: int):
+        before = self.num_asymmetric_home_games_by_team[team]
+        self.num_asymmetric_home_games_by_team[team] = before + amount
+        self._move_count(
+            self.asymmetric_home_fractions_to_num_teams,
+            before / team.num_asymmetric_matchups,
+            (before + amount) / team.num_asymmetric_matchups,
+        )
+
+    def _add_consecutive_pairs(self, team: Team, amount: int):
+        before = self.num_consecutive_pairs_by_team[team]
+        self.num_consecutive_pairs_by_team[team] = before + amount
+        self._move_count(self.num_consecutive_pairs_to_num_teams, before, before + amount)
+
+    def _add_game_date(self, team: Team, game_date: date):
+        dates = self.game_dates_by_team[team]
+        i = bisect_left(dates, game_date)
+
+        if 0 < i < len(dates):
+            self._remove_gap(dates[i] - dates[i - 1])
+        if i > 0:
+            self._add_gap(game_date - dates[i - 1])
+        if i < len(dates):
+            self._add_gap(dates[i] - game_date)
+
+        insort(dates, game_date, lo=i)
+
+    def _remove_game_date(self, team: Team, game_date: date):
+        dates = self.game_dates_by_team[team]
+        i = bisect_left(dates, game_date)
+        del dates[i]
+
+        if i > 0:
+            self._remove_gap(game_date - dates[i - 1])
+        if i < len(dates):
+            self._remove_gap(dates[i] - game_date)
+        if 0 < i < len(dates):
+            self._add_gap(dates[i] - dates[i - 1])
+
+    def _add_gap(self, gap: timedelta):
+        self.gaps_to_counts[gap.days] += 1
+
+    def _remove_gap(self, gap: timedelta):
+        self._move_count(self.gaps_to_counts, gap.days, None)
+
+    @staticmethod
+    def _count_neighboring_game_days(team: Team, game_date: date) -> int:
+        return bool(team.games_by_date.get(game_date - timedelta(days=1))) + bool(
+            team.games_by_date.get(game_date + timedelta(days=1))
+        )
+
+    @staticmethod
+    def _move_count(counts: Counter, old_key, new_key):
+        """
+        Moves one occurrence from `old_key` to `new_key`, dropping keys whose count reaches zero. A key of `None` stands
+        for "nowhere", so an occurrence can be added or removed outright.
+        """
+
+        if old_key == new_key:
+            return
+
+        if old_key in counts:
+            counts[old_key] -= 1
+            if counts[old_key] == 0:
+                del counts[old_key]
+        if new_key is not None:
+            counts[new_key] += 1
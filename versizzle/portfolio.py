@@ -0,0 +1,185 @@
+"""
+Races several search strategies against each other, each with several seeds, and keeps the first valid schedule that
+any of them finds. This is the quickest way to get some valid schedule for a tight league, for example when a
+reschedule is needed in a hurry. The winner is written to the output files, and the settings that reproduce it are
+printed. Example:
+
+    uv run -m versizzle.portfolio --seeds 4 --processes 8
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass
+from functools import partial
+
+from versizzle import schedule_cache, scheduler
+from versizzle.config import load_config
+from versizzle.progress import LogLevel, reporter
+from versizzle.scarcity import ScarceLocationNames
+from versizzle.window_constraint import WindowConstraint
+
+
+@dataclass
+class Strategy:
+    """A way of searching for a schedule. Each field overrides the corresponding setting in `config.yml`."""
+
+    name: str
+    backup_order: str = scheduler.DEFAULT_BACKUP_ORDER
+    home_balancing: str = scheduler.DEFAULT_HOME_BALANCING
+    use_scarce_locations: bool = True
+    ejection_chain_depth: int = 0
+
+
+STRATEGIES = [
+    Strategy("default"),
+    Strategy("team load order", backup_order="team_load"),
+    Strategy("no scarce locations", use_scarce_locations=False),
+    Strategy("exact home balancing", home_balancing="exact"),
+    Strategy("ejection chains", ejection_chain_depth=2),
+    Strategy("team load order with ejection chains", backup_order="team_load", ejection_chain_depth=2),
+]
+
+
+@dataclass
+class Attempt:
+    strategy: Strategy
+    seed: int
+
+
+def run_attempt(
+    attempt: Attempt,
+    input_dir_path: str,
+    window_constraints: list[WindowConstraint],
+    scarce_location_names: ScarceLocationNames,
+    local_search_seconds: float,
+) -> tuple[Attempt, schedule_cache.CachedSchedule | None, float]:
+    """
+    Searches for a schedule with the attempt's strategy and seed. Returns the schedule (or `None` if the search failed)
+    along with how many seconds it took. The scheduler's own output is discarded, since many attempts run at once.
+    """
+
+    start_time = time.monotonic()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = scheduler.generate_schedule(
+            input_dir_path=input_dir_path,
+            output_dir_path="",
+            random_seed=attempt.seed,
+            window_constraints=window_constraints,
+            scarce_location_names=scarce_location_names if attempt.strategy.use_scarce_locations else [],
+            is_test_run_for_seed=True,
+            local_search_seconds=local_search_seconds,
+            ejection_chain_depth=attempt.strategy.ejection_chain_depth,
+            backup_order=attempt.strategy.backup_order,
+            home_balancing=attempt.strategy.home_balancing,
+        )
+
+    schedule = None
+    if result is not None and result.succeeded:
+        schedule = schedule_cache.capture_schedule(scheduler.matchups, scheduler.gameslots)
+
+    return attempt, schedule, time.monotonic() - start_time
+
+
+def race(
+    attempts: list[Attempt],
+    num_processes: int,
+    input_dir_path: str,
+    window_constraints: list[WindowConstraint],
+    scarce_location_names: ScarceLocationNames,
+    local_search_seconds: float,
+) -> tuple[Attempt, schedule_cache.CachedSchedule] | None:
+    """
+    Runs the attempts in parallel, in the given order, and returns the first one to find a schedule along with that
+    schedule. All other attempts are stopped as soon as one succeeds. Returns `None` if every attempt fails.
+    """
+
+    run = partial(
+        run_attempt,
+        input_dir_path=input_dir_path,
+        window_constraints=window_constraints,
+        scarce_location_names=scarce_location_names,
+        local_search_seconds=local_search_seconds,
+    )
+
+    # Leaving the pool's context terminates the attempts that are still running.
+    with multiprocessing.Pool(num_processes) as pool:
+        for attempt, schedule, seconds in pool.imap_unordered(run, attempts):
+            outcome = "found a schedule" if schedule is not None else "failed"
+            reporter.message(
+                f"Seed {attempt.seed} with strategy '{attempt.strategy.name}' {outcome} in {seconds:.1f} seconds."
+            )
+
+            if schedule is not None:
+                return attempt, schedule
+
+    return None
+
+
+if __name__ == "__main__":
+    config = load_config()
+    reporter.configure(config["log_level"], config["progress"])
+
+    parser = argparse.ArgumentParser(prog="versizzle.portfolio", description="Race search strategies for a schedule.")
+    parser.add_argument("--seeds", type=int, default=4, help="number of seeds to try per strategy (default: 4)")
+    parser.add_argument("--first-seed", type=int, default=config["seed"], help="first seed (default: seed in config)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="attempts to run at once")
+    args = parser.parse_args()
+
+    window_constraints = [WindowConstraint(w["days"], w["max_games"]) for w in config["window_constraints"]]
+    local_search_seconds = config["local_search"]["seconds"]
+
+    # Every strategy gets a go with the first seed before any strategy gets a second seed.
+    attempts = [
+        Attempt(strategy, seed)
+        for seed in range(args.first_seed, args.first_seed + args.seeds)
+        for strategy in STRATEGIES
+    ]
+
+    start_time = time.monotonic()
+    winner = race(
+        attempts,
+        args.processes,
+        config["input_dir"],
+        window_constraints,
+        config["scarce_locations"],
+        local_search_seconds,
+    )
+
+    if winner is None:
+        reporter.message("No strategy found a schedule. Try relaxing your window constraints.", LogLevel.QUIET)
+        raise SystemExit(1)
+
+    attempt, schedule = winner
+    strategy = attempt.strategy
+    reporter.message(f"Found a schedule in {time.monotonic() - start_time:.1f} seconds.")
+
+    scheduler.generate_schedule(
+        input_dir_path=config["input_dir"],
+        output_dir_path=config["output_dir"],
+        random_seed=attempt.seed,
+        window_constraints=window_constraints,
+        scarce_location_names=config["scarce_locations"] if strategy.use_scarce_locations else [],
+        local_search_seconds=local_search_seconds,
+        ejection_chain_depth=strategy.ejection_chain_depth,
+        backup_order=strategy.backup_order,
+        home_balancing=strategy.home_balancing,
+        schedule_to_restore=schedule,
+    )
+
+    lines = [
+        f"Wrote the schedule from seed {attempt.seed} with strategy '{strategy.name}'. To reproduce it, set:",
+        f"    seed: {attempt.seed}",
+        f"    backup_order: {strategy.backup_order}",
+        f"    home_balancing: {strategy.home_balancing}",
+        f"    backup_repair: {{max_chain_depth: {strategy.ejection_chain_depth}}}",
+    ]
+    if not strategy.use_scarce_locations:
+        lines.append("    scarce_locations: []")
+
+    # The settings are shown even with `--log-level quiet`, since they are the only way to get this schedule again.
+    reporter.message("\n".join(lines), LogLevel.QUIET)
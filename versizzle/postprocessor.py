@@ -1,4 +1,5 @@
 import datetime
+import random
 from collections import defaultdict
 from collections.abc import Sequence
 from itertools import permutations
@@ -7,8 +8,11 @@ from more_itertools import first_true
 
 from versizzle import utils
 from versizzle.gameslot import Gameslot
+from versizzle.local_search import LocalSearch
 from versizzle.location import Location
 from versizzle.matchup import Matchup
+from versizzle.profiler import profiler
+from versizzle.progress import LogLevel, PhaseCompleted, PhaseStarted, reporter
 from versizzle.utils import unwrap
 from versizzle.window_constraint import WindowConstraint
 
@@ -24,17 +28,29 @@ class PostProcessor:
         matchups: Sequence[Matchup],
         gameslots: list[Gameslot],
         window_constraints: list[WindowConstraint],
+        local_search_seconds: float = 0,
+        local_search_rng: random.Random | None = None,
     ):
         self.matchups: Sequence[Matchup] = matchups
         self.gameslots: list[Gameslot] = gameslots
         self.window_constraints: list[WindowConstraint] = window_constraints
+        self.local_search_seconds: float = local_search_seconds
+        self.local_search_rng: random.Random = local_search_rng or random.Random()
 
     def post_process(self):
-        print("Post-processing started.")
-        self.minimize_isolated_matchups()
-        self.remove_awkward_gaps()
-        self.place_younger_teams_at_start_of_evening_blocks()
-        print("Post-processing complete.")
+        reporter.emit(PhaseStarted("post-processing"))
+        with profiler.phase("isolated matchups"):
+            self.minimize_isolated_matchups()
+        if self.local_search_seconds > 0:
+            with profiler.phase("local search"):
+                LocalSearch(self.matchups, self.window_constraints, self.local_search_rng).run(
+                    self.local_search_seconds
+                )
+        with profiler.phase("awkward gaps"):
+            self.remove_awkward_gaps()
+        with profiler.phase("younger teams"):
+            self.place_younger_teams_at_start_of_evening_blocks()
+        reporter.emit(PhaseCompleted("post-processing"))
 
     def minimize_isolated_matchups(self):
         """
@@ -52,7 +68,7 @@ class PostProcessor:
         day.
         """
 
-        print("Minimizing isolated matchups.")
+        reporter.message("Minimizing isolated matchups.")
 
         initially_isolated_matchups = [m for m in self.matchups if m.is_isolated()]
         initial_num_isolated = len(initially_isolated_matchups)
@@ -67,7 +83,7 @@ class PostProcessor:
 
         final_num_isolated = len([m for m in self.matchups if m.is_isolated()])
 
-        print(f"Minimized isolated matchups: {initial_num_isolated} -> {final_num_isolated}")
+        reporter.message(f"Minimized isolated matchups: {initial_num_isolated} -> {final_num_isolated}")
 
     def try_push_matchup(self, matchup: Matchup):
         """
@@ -181,7 +197,7 @@ class PostProcessor:
         games. This method removes the gaps, making the games consecutive.
         """
 
-        print("Removing awkward gaps between games.")
+        reporter.message("Removing awkward gaps between games.")
 
         gameslots_by_block: dict[tuple[datetime.date, Location], list[Gameslot]]
         gameslots_by_block = defaultdict(list)
@@ -199,11 +215,13 @@ class PostProcessor:
                 failed_blocks.append((date, location))
 
         if failed_blocks:
-            print("Removing awkward gaps FAILED in some cases! " + "The following blocks require manual adjustment:")
-            for date, location in failed_blocks:
-                print(f"{utils.prettify_date(date)} at {location}")
+            reporter.message(
+                "Removing awkward gaps FAILED in some cases! The following blocks require manual adjustment:\n"
+                + "\n".join(f"{utils.prettify_date(date)} at {location}" for date, location in failed_blocks),
+                LogLevel.QUIET,
+            )
         else:
-            print("Removing awkward gaps was successful in all cases. " + "No manual adjustment required.")
+            reporter.message("Removing awkward gaps was successful in all cases. No manual adjustment required.")
 
     def squeeze_matchups_in_block(self, gameslots_in_block: list[Gameslot]) -> bool:
         """
@@ -239,17 +257,22 @@ class PostProcessor:
                         matchup.select_gameslot(gameslot)
 
                     if attempt_number > 1:
-                        print(f"Took {attempt_number} tries to squeeze matchups " + f"on {pretty_date} at {location}.")
+                        reporter.message(
+                            f"Took {attempt_number} tries to squeeze matchups on {pretty_date} at {location}.",
+                            LogLevel.VERBOSE,
+                        )
                     return True
 
                 attempt_number += 1
 
-        print(f"Squeezing matchups FAILED on {pretty_date} at {location}.")
+        reporter.message(f"Squeezing matchups FAILED on {pretty_date} at {location}.", LogLevel.VERBOSE)
         return False
 
     def place_younger_teams_at_start_of_evening_blocks(self):
         if not all(matchup.division.startswith(("5/6", "7/8")) for matchup in self.matchups):
-            print("Placing younger divisions earlier in evenings was skipped: unsupported divisions are present.")
+            reporter.message(
+                "Placing younger divisions earlier in evenings was skipped: unsupported divisions are present."
+            )
             return
 
         gameslots_by_block: dict[tuple[datetime.date, Location], list[Gameslot]] = defaultdict(list)
@@ -299,9 +322,10 @@ class PostProcessor:
                     break
 
             if reorder_failure_reason:
-                print(
+                reporter.message(
                     f"Gave up placing younger divisions earlier on {utils.prettify_date(date)} at {location} "
-                    f"because {reorder_failure_reason}."
+                    f"because {reorder_failure_reason}.",
+                    LogLevel.VERBOSE,
                 )
                 all_blocks_succeeded = False
                 continue
@@ -312,4 +336,4 @@ class PostProcessor:
                 matchup.select_gameslot(target_gameslot)
 
         if all_blocks_succeeded:
-            print("Successfully placed younger divisions earlier in all evening blocks.")
+            reporter.message("Successfully placed younger divisions earlier in all evening blocks.")
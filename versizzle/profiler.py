@@ -0,0 +1,135 @@
+import json
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class PhaseProfile:
+    """
+    The cost of one phase of generating a schedule. Nested phases are named with the path of the phases they are in,
+    like "post-processing/local search". Peak memory is the most memory allocated at once during the phase, and is
+    only measured when memory tracking is on.
+    """
+
+    name: str
+    wall_seconds: float
+    cpu_seconds: float
+    peak_memory_bytes: int | None = None
+
+
+class Profiler:
+    """
+    Records the timings of the phases of a run, along with counters of how often the hot paths run. Nothing is recorded
+    unless the profiler is enabled, and memory is only tracked if it was enabled with `track_memory`, since tracking
+    allocations slows everything down. The hottest call sites check `enabled` themselves, to skip even the call.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.tracks_memory = False
+        self.phases: list[PhaseProfile] = []
+        self.counters: Counter[str] = Counter()
+
+        self.start_wall_time = 0.0
+        self.start_cpu_time = 0.0
+
+        # The names of the phases currently running, outermost first, and the peak memory seen in each so far. The
+        # first entry stands for the whole run.
+        self.phase_names: list[str] = []
+        self.phase_peaks: list[int] = [0]
+
+    def enable(self, track_memory: bool = False):
+        self.enabled = True
+        self.tracks_memory = track_memory
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if self.tracks_memory:
+            tracemalloc.stop()
+            self.tracks_memory = False
+
+    def reset(self):
+        """Forgets the phases and counters recorded so far, to start profiling a new run."""
+
+        self.phases = []
+        self.counters = Counter()
+        self.start_wall_time = time.perf_counter()
+        self.start_cpu_time = time.process_time()
+        self.phase_names = []
+        self.phase_peaks = [0]
+
+        if self.tracks_memory:
+            tracemalloc.reset_peak()
+
+    def count(self, counter: str, amount: int = 1):
+        if self.enabled:
+            self.counters[counter] += amount
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        # The phase's slot is taken up front, so that phases are listed in the order they started.
+        self.phase_names.append(name)
+        phase_profile = PhaseProfile("/".join(self.phase_names), 0.0, 0.0)
+        self.phases.append(phase_profile)
+
+        if self.tracks_memory:
+            # The allocation peak is global, so the enclosing phases take note of their peak before it is reset.
+            self.phase_peaks = [max(peak, tracemalloc.get_traced_memory()[1]) for peak in self.phase_peaks]
+            tracemalloc.reset_peak()
+        self.phase_peaks.append(0)
+
+        start_wall_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+
+        try:
+            yield
+        finally:
+            phase_profile.wall_seconds = round(time.perf_counter() - start_wall_time, 6)
+            phase_profile.cpu_seconds = round(time.process_time() - start_cpu_time, 6)
+
+            self.phase_names.pop()
+            peak = self.phase_peaks.pop()
+            if self.tracks_memory:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                phase_profile.peak_memory_bytes = peak
+                self.phase_peaks[-1] = max(self.phase_peaks[-1], peak)
+
+    def get_profile(self) -> dict:
+        """Returns the profile of the run so far, as it is written to `profile.json`."""
+
+        total_peak_memory_bytes = None
+        if self.tracks_memory:
+            total_peak_memory_bytes = max(self.phase_peaks[0], tracemalloc.get_traced_memory()[1])
+
+        return {
+            "total": asdict(
+                PhaseProfile(
+                    "total",
+                    round(time.perf_counter() - self.start_wall_time, 6),
+                    round(time.process_time() - self.start_cpu_time, 6),
+                    total_peak_memory_bytes,
+                )
+            ),
+            "phases": [asdict(p) for p in self.phases],
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def write(self, file_path: str):
+        """Writes the profile of the run so far as JSON."""
+
+        with open(file_path, "w") as file:
+            json.dump(self.get_profile(), file, indent=2)
+
+
+# The profiler for the current run. Like the league in the scheduler module, there is one per process.
+profiler = Profiler()
@@ -0,0 +1,223 @@
+"""
+The scheduler reports what it is doing as typed events, rather than printing, so that the same run can be shown as
+plain text, as JSON lines for another program to read, or as a single live progress line. Each event has a log level,
+and only the events at or below the reporter's log level are shown.
+"""
+
+import json
+import sys
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, fields
+from enum import IntEnum
+
+
+class LogLevel(IntEnum):
+    """How much a run reports. `QUIET` only shows problems, `VERBOSE` shows everything, including every input line."""
+
+    QUIET = 0
+    NORMAL = 1
+    VERBOSE = 2
+
+
+LOG_LEVELS = [level.name.lower() for level in LogLevel]
+PROGRESS_FORMATS = ["text", "json", "live"]
+
+
+@dataclass
+class Event(ABC):
+    """Something a run reports. Every kind of event describes itself as text."""
+
+    def get_level(self) -> LogLevel:
+        return LogLevel.NORMAL
+
+    @abstractmethod
+    def describe(self) -> str: ...
+
+
+@dataclass
+class Message(Event):
+    """A line of text that has no event of its own. Problems that need attention are at the `QUIET` level."""
+
+    text: str
+    level: LogLevel = LogLevel.NORMAL
+
+    def get_level(self) -> LogLevel:
+        return self.level
+
+    def describe(self) -> str:
+        return self.text
+
+
+@dataclass
+class IngestionSummary(Event):
+    """What was read from an input file, one line per item."""
+
+    title: str
+    lines: list[str]
+
+    def get_level(self) -> LogLevel:
+        return LogLevel.VERBOSE
+
+    def describe(self) -> str:
+        return "\n".join([f"======================== {self.title}: ========================", *self.lines, ""])
+
+
+@dataclass
+class PhaseStarted(Event):
+    phase: str
+
+    def describe(self) -> str:
+        return f"{self.phase.capitalize()} phase started."
+
+
+@dataclass
+class PhaseCompleted(Event):
+    phase: str
+
+    def describe(self) -> str:
+        return f"{self.phase.capitalize()} phase complete."
+
+
+@dataclass
+class ProgressEvent(Event):
+    """An update on a long loop. A live progress line shows these in place, whatever the log level."""
+
+    def get_level(self) -> LogLevel:
+        return LogLevel.VERBOSE
+
+
+@dataclass
+class MatchupsRemaining(ProgressEvent):
+    """How many matchups a step of the preferred selection phase has left."""
+
+    step: str
+    remaining: int
+    total: int
+
+    def describe(self) -> str:
+        return f"{self.remaining} remaining"
+
+
+@dataclass
+class BackupDepthReached(ProgressEvent):
+    """The backup selection phase placed more matchups at once than ever before."""
+
+    depth: int
+    total: int
+
+    def describe(self) -> str:
+        return f"New depth reached: {self.depth} / {self.total}"
+
+
+@dataclass
+class BackupDeadEnds(ProgressEvent):
+    dead_ends: int
+
+    def describe(self) -> str:
+        return f"Backup selection has hit {self.dead_ends} dead ends"
+
+
+@dataclass
+class SeedFinished(ProgressEvent):
+    """A seed search finished a seed, or skipped it because it already had a result."""
+
+    label: str
+    outcome: str
+    seeds_done: int
+    total_seeds: int
+
+    def get_level(self) -> LogLevel:
+        return LogLevel.NORMAL
+
+    def describe(self) -> str:
+        return f"Seed {self.label} {self.outcome} ({self.seeds_done} / {self.total_seeds} seeds done)."
+
+
+class TextRenderer:
+    """Prints each event as the lines of text the scheduler has always printed."""
+
+    def shows(self, event: Event, log_level: LogLevel) -> bool:
+        return event.get_level() <= log_level
+
+    def render(self, event: Event):
+        print(event.describe())
+
+
+class JsonLinesRenderer(TextRenderer):
+    """Prints each event as one line of JSON, with its type, its time and its fields."""
+
+    def render(self, event: Event):
+        record: dict[str, object] = {"event": type(event).__name__, "time": round(time.time(), 3)}
+        for f in fields(event):
+            value = getattr(event, f.name)
+            record[f.name] = value.name.lower() if isinstance(value, LogLevel) else value
+
+        print(json.dumps(record))
+
+
+class LiveRenderer(TextRenderer):
+    """
+    Shows the latest progress event on a single line that is rewritten in place, and prints the other events as text.
+    Progress is shown at every log level but `QUIET`, since it takes up only the one line.
+    """
+
+    def __init__(self):
+        self.progress_line = ""
+
+    def shows(self, event: Event, log_level: LogLevel) -> bool:
+        if isinstance(event, ProgressEvent):
+            return log_level > LogLevel.QUIET
+        return super().shows(event, log_level)
+
+    def render(self, event: Event):
+        if self.progress_line:
+            sys.stdout.write("\r" + " " * len(self.progress_line) + "\r")
+
+        # Anything else that happens makes the progress out of date, so it is only redrawn by the next progress event.
+        if isinstance(event, ProgressEvent):
+            self.progress_line = event.describe()
+            sys.stdout.write(self.progress_line)
+            sys.stdout.flush()
+        else:
+            self.progress_line = ""
+            print(event.describe())
+
+
+class Reporter:
+    """
+    Passes the events of a run to a renderer, leaving out those above the log level. Everything is shown by default, so
+    that a library caller sees what the command line shows.
+    """
+
+    def __init__(self):
+        self.log_level = LogLevel.VERBOSE
+        self.renderer: TextRenderer = TextRenderer()
+
+    def configure(self, log_level: str, progress_format: str):
+        if log_level not in LOG_LEVELS:
+            raise Exception(f"Unknown log level '{log_level}'. Choose from: {', '.join(LOG_LEVELS)}")
+        if progress_format not in PROGRESS_FORMATS:
+            raise Exception(f"Unknown progress format '{progress_format}'. Choose from: {', '.join(PROGRESS_FORMATS)}")
+
+        self.log_level = LogLevel[log_level.upper()]
+        self.renderer = {"text": TextRenderer, "json": JsonLinesRenderer, "live": LiveRenderer}[progress_format]()
+
+    def shows(self, level: LogLevel) -> bool:
+        """
+        Returns whether an event at the level would be shown. Events that are costly to build are skipped when they
+        wouldn't be.
+        """
+
+        return level <= self.log_level
+
+    def emit(self, event: Event):
+        if self.renderer.shows(event, self.log_level):
+            self.renderer.render(event)
+
+    def message(self, text: str, level: LogLevel = LogLevel.NORMAL):
+        self.emit(Message(text, level))
+
+
+# The reporter for the current run. Like the profiler, there is one per process.
+reporter = Reporter()
@@ -0,0 +1,40 @@
+"""
+Ranks the seeds recorded by seed searches. Seeds are ordered by the given metrics in turn, each in its better direction.
+By default only seeds run with the current input files and config are considered. Example:
+
+    uv run -m versizzle.rank_seeds total_weekday_games most_consecutive_pairs --limit 10
+"""
+
+import argparse
+
+from versizzle import fingerprint, utils
+from versizzle.config import load_config
+from versizzle.seed_store import RANKABLE_METRICS, SeedStore
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="versizzle.rank_seeds", description="Rank the seeds recorded by seed searches."
+    )
+    parser.add_argument(
+        "metrics", nargs="*", choices=list(RANKABLE_METRICS), metavar="metric", help="metrics to rank by"
+    )
+    parser.add_argument("--limit", type=int, default=20, help="number of seeds to show (default: 20)")
+    parser.add_argument("--all", action="store_true", help="include seeds run with other input files or configs")
+    args = parser.parse_args()
+
+    config = load_config()
+
+    seed_store = SeedStore(config["output_dir"] + "/seeds.sqlite3")
+    results = seed_store.rank_results(
+        args.metrics,
+        args.limit,
+        input_hash=None if args.all else fingerprint.hash_input_files(config["input_dir"]),
+        config_hash=None if args.all else fingerprint.hash_config(config),
+    )
+    seed_store.close()
+
+    table: list[list[object]] = [["seed", *RANKABLE_METRICS], ["----", *("-" * len(m) for m in RANKABLE_METRICS)]]
+    for result in results:
+        table.append([result.get_label(), *(getattr(result, m) for m in RANKABLE_METRICS)])
+
+    utils.pretty_print_table(table)
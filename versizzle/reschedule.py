@@ -0,0 +1,326 @@
+"""
+Reschedules a season that has already been published, changing as little of it as possible. This is for mid-season
+changes, like a gym closing: update the input files (for example, add blackouts or remove gameslots), then run this
+with the `schedule.csv` of the published schedule. Example:
+
+    uv run -m versizzle.reschedule published/schedule.csv --neighborhood-days 2
+
+Every previous game that is still valid stays where it is. The games that aren't (because their gameslot is gone or
+taken, or a blackout or window constraint now prohibits it) are displaced, and only they are scheduled again, along
+with the other games of their teams within `--neighborhood-days` of the displaced game, to give them room to move.
+Matchups that weren't in the previous schedule at all are scheduled too. The seed and other settings come from
+`config.yml`, and the new schedule is written to the output directory.
+"""
+
+import argparse
+import csv
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, time
+
+from versizzle import scheduler
+from versizzle.config import load_config
+from versizzle.gameslot import Gameslot
+from versizzle.home_balancing import orient_matchups
+from versizzle.location import Location
+from versizzle.matchup import Matchup
+from versizzle.progress import reporter
+from versizzle.scarcity import AUTO_SCARCE_LOCATIONS, ScarceLocationNames, mark_scarce_locations
+from versizzle.team import Team
+from versizzle.utils import parse_input_date, parse_input_time, unwrap
+from versizzle.window_constraint import WindowConstraint
+
+
+@dataclass
+class PreviousGame:
+    """A game of the previous schedule, read from a line of its `schedule.csv`."""
+
+    date: date
+    time: time
+    location_name: str
+    division: str
+    home_team_name: str
+    away_team_name: str
+
+    def __str__(self):
+        return (
+            f"< {self.division} - {self.home_team_name} vs {self.away_team_name} - "
+            + f"{self.date.isoformat()} {self.time.isoformat('minutes')} at {self.location_name} >"
+        )
+
+
+def read_previous_schedule(file_path: str) -> list[PreviousGame]:
+    with open(file_path, newline="") as file:
+        lines = list(csv.reader(file))
+
+    if not lines or lines[0] != ["date", "time", "location", "division", "team a", "team b"]:
+        raise Exception(
+            f"{file_path} should have 6 columns: 'date', 'time', 'location', 'division', 'team a', and 'team b'"
+        )
+
+    return [
+        PreviousGame(
+            parse_input_date(date_string),
+            parse_input_time(time_string),
+            location_name,
+            division,
+            home_team_name,
+            away_team_name,
+        )
+        for date_string, time_string, location_name, division, home_team_name, away_team_name in lines[1:]
+    ]
+
+
+def reschedule(
+    input_dir_path: str,
+    output_dir_path: str,
+    previous_games: list[PreviousGame],
+    random_seed: int,
+    window_constraints: list[WindowConstraint],
+    scarce_location_names: ScarceLocationNames,
+    neighborhood_days: int,
+    local_search_seconds: float = 0,
+    ejection_chain_depth: int = 0,
+    backup_order: str = scheduler.DEFAULT_BACKUP_ORDER,
+    home_balancing: str = scheduler.DEFAULT_HOME_BALANCING,
+) -> bool:
+    """
+    Schedules the league from the previous games, and writes the output files. Returns `False` if the displaced games
+    couldn't all be placed, in which case nothing is written.
+
+    The previous games are matched to matchups and gameslots through lookup tables, rather than one scan of every
+    matchup and gameslot per game like a preassignment, so the cost of keeping a game is constant. The kept games are
+    then fixed like preassignments, which leaves the phases and post-processing to work on the rescheduled matchups
+    only.
+
+    The order of the teams in `schedule.csv` is only how they are displayed, so the preferred home team of a previous
+    game is recovered from its location: a game at one team's home location is that team's home game. The other
+    matchups get their preferred home team with `home_balancing`, as in a full run.
+    """
+
+    if home_balancing not in scheduler.HOME_BALANCINGS:
+        raise Exception(
+            f"Unknown home balancing '{home_balancing}'. Choose from: {', '.join(scheduler.HOME_BALANCINGS)}"
+        )
+
+    scheduler.load_league(input_dir_path, window_constraints, scarce_location_names)
+    rng = scheduler.get_phase_rng(random_seed, "reschedule")
+
+    gameslots_by_key: dict[tuple[date, time, str], Gameslot] = {
+        (g.date, g.time, g.location.name): g for g in scheduler.gameslots
+    }
+
+    unmatched_matchups_by_key: defaultdict[tuple[str, frozenset[str]], list[Matchup]] = defaultdict(list)
+    for m in reversed(scheduler.matchups):
+        if not m.is_preassigned:
+            unmatched_matchups_by_key[get_matchup_key(m.division, m.team_a.name, m.team_b.name)].append(m)
+
+    for g in scheduler.gameslots:
+        if not g.is_preassigned:
+            g.matchups_that_prefer_this_slot = set()
+
+    kept_matchups: list[Matchup] = []
+    displaced_matchups_to_dates: dict[Matchup, date] = {}
+
+    for game in previous_games:
+        key = get_matchup_key(game.division, game.home_team_name, game.away_team_name)
+        gameslot = gameslots_by_key.get((game.date, game.time, game.location_name))
+
+        if gameslot is not None and gameslot.is_preassigned:
+            m = unwrap(gameslot.selected_matchup)
+            if get_matchup_key(m.division, m.team_a.name, m.team_b.name) == key:
+                # The game is still preassigned, so it is already in place.
+                continue
+
+        if not unmatched_matchups_by_key[key]:
+            reporter.message(f"Dropping previous game {game} because it is no longer in matchups.csv.")
+            continue
+
+        matchup = unmatched_matchups_by_key[key].pop()
+        home_team = get_team_at_home(matchup, scheduler.locations.get(game.location_name))
+        if home_team is not None:
+            matchup.select_preferred_home_team(home_team)
+
+        if (
+            gameslot is None
+            or gameslot.selected_matchup is not None
+            or any(b.prohibits_matchup_in_slot(matchup, gameslot) for b in scheduler.blackouts)
+            or not all(w.is_satisfied_by_selection(matchup, gameslot) for w in window_constraints)
+        ):
+            displaced_matchups_to_dates[matchup] = game.date
+            continue
+
+        # Whichever team ends up the preferred home team, a game at either team's home location is at its preferred
+        # location: the team at home is the preferred home team, unless both teams share the location.
+        if gameslot.location in (matchup.team_a.home_location, matchup.team_b.home_location):
+            unwrap(gameslot.matchups_that_prefer_this_slot).add(matchup)
+        matchup.select_gameslot(gameslot)
+        kept_matchups.append(matchup)
+
+    released_matchups = release_neighborhood(displaced_matchups_to_dates, neighborhood_days)
+
+    for m in kept_matchups:
+        if m not in released_matchups:
+            fix_matchup_in_selected_gameslot(m)
+
+    new_matchups = [m for keyed in unmatched_matchups_by_key.values() for m in keyed]
+    select_remaining_preferred_home_teams(rng, home_balancing)
+
+    matchups_to_schedule = [m for m in scheduler.matchups if m.selected_gameslot is None]
+    for m in matchups_to_schedule:
+        scheduler.assign_candidate_gameslots_to_matchup(m, rng)
+    if scarce_location_names == AUTO_SCARCE_LOCATIONS:
+        mark_scarce_locations(scheduler.matchups, scheduler.gameslots)
+
+    reporter.message(
+        f"Kept {len(kept_matchups) - len(released_matchups)} previous games. Rescheduling "
+        f"{len(displaced_matchups_to_dates)} displaced games, {len(released_matchups)} of their neighbors and "
+        f"{len(new_matchups)} new matchups."
+    )
+    for m, previous_date in displaced_matchups_to_dates.items():
+        reporter.message(f"Displaced {m} from {previous_date.isoformat()}")
+
+    matchups_using_backup_slots = scheduler.select_gameslots_in_preferred_phase(
+        window_constraints, scheduler.get_phase_rng(random_seed, "preferred")
+    )
+
+    success = scheduler.finish_schedule(
+        matchups_using_backup_slots,
+        window_constraints,
+        ejection_chain_depth,
+        backup_order,
+        local_search_seconds,
+        scheduler.get_phase_rng(random_seed, "local_search"),
+    )
+
+    if success:
+        scheduler.write_output_files(output_dir_path)
+
+    return success
+
+
+def get_matchup_key(division: str, team_name: str, other_team_name: str) -> tuple[str, frozenset[str]]:
+    return division, frozenset((team_name, other_team_name))
+
+
+def release_neighborhood(displaced_matchups_to_dates: dict[Matchup, date], neighborhood_days: int) -> set[Matchup]:
+    """
+    Deselects the kept games of the displaced matchups' teams that are within `neighborhood_days` of the displaced
+    games, so they can be rescheduled along with them. Returns the released matchups.
+    """
+
+    released_matchups: set[Matchup] = set()
+
+    for matchup, previous_date in displaced_matchups_to_dates.items():
+        for team in matchup.team_a, matchup.team_b:
+            for m in team.matchups:
+                if m.is_preassigned or m.selected_gameslot is None:
+                    continue
+                if abs((m.selected_gameslot.date - previous_date).days) <= neighborhood_days:
+                    m.deselect_gameslot()
+                    released_matchups.add(m)
+
+    return released_matchups
+
+
+def fix_matchup_in_selected_gameslot(matchup: Matchup):
+    """Fixes a kept game in its gameslot, the same way a preassignment does, so that nothing moves it."""
+
+    gameslot = unwrap(matchup.selected_gameslot)
+
+    matchup.is_preassigned = True
+    matchup.preferred_gameslots = [gameslot]
+    matchup.backup_gameslots = []
+
+    gameslot.is_preassigned = True
+
+
+def get_team_at_home(matchup: Matchup, location: Location | None) -> Team | None:
+    """Returns the team of the matchup whose home location this is, or `None` if it is neither team's or both teams'."""
+
+    if location is None:
+        return None
+    if location == matchup.team_a.home_location and location != matchup.team_b.home_location:
+        return matchup.team_a
+    if location == matchup.team_b.home_location and location != matchup.team_a.home_location:
+        return matchup.team_b
+    return None
+
+
+def select_remaining_preferred_home_teams(rng: random.Random, home_balancing: str):
+    """
+    Selects the preferred home team of every matchup whose home team the previous schedule didn't settle. A preassigned
+    matchup at one team's home location goes to that team. With `exact` home balancing, the other asymmetric matchups
+    are then oriented with an exact matching, so that every team gets half its asymmetric matchups at home if the
+    settled ones leave a way to do so. Whatever is left follows the rules of preferred home selection in a division with
+    preassignments.
+    """
+
+    for m in scheduler.matchups:
+        if m.preferred_home_team is None and m.selected_gameslot is not None:
+            home_team = get_team_at_home(m, m.selected_gameslot.location)
+            if home_team is not None:
+                m.select_preferred_home_team(home_team)
+
+    if home_balancing == "exact":
+        remaining_matchups = [
+            m
+            for m in scheduler.matchups
+            if m.preferred_home_team is None and m.team_a.home_location != m.team_b.home_location
+        ]
+        needs = {
+            t: max(0, t.num_asymmetric_matchups // 2 - t.num_asymmetric_matchups_preferring_this_team_as_home)
+            for t in scheduler.teams.values()
+        }
+        for matchup, home_team in orient_matchups(remaining_matchups, needs, rng).items():
+            matchup.select_preferred_home_team(home_team)
+
+    for m in scheduler.matchups:
+        if m.preferred_home_team is None:
+            m.select_preferred_home_team(get_home_team_for_new_matchup(m, rng))
+
+
+def get_home_team_for_new_matchup(matchup: Matchup, rng: random.Random) -> Team:
+    """
+    Picks the preferred home team of a matchup that has none from the previous schedule, following the rules of
+    preferred home selection in a division with preassignments.
+    """
+
+    if matchup.team_a.home_location != matchup.team_b.home_location:
+        home_team = scheduler.get_team_who_needs_home_in_asymmetric_matchup(matchup)
+        if home_team is not None:
+            return home_team
+
+    return scheduler.get_team_with_lower_asymmetric_preferred_home_ratio(matchup.team_a, matchup.team_b, rng)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="versizzle.reschedule", description="Reschedule part of a published season.")
+    parser.add_argument("previous_schedule", help="schedule.csv of the published schedule")
+    parser.add_argument(
+        "--neighborhood-days",
+        type=int,
+        default=1,
+        help="also reschedule the displaced teams' games within this many days of a displaced game (default: 1)",
+    )
+    args = parser.parse_args()
+
+    config = load_config()
+    reporter.configure(config["log_level"], config["progress"])
+    success = reschedule(
+        config["input_dir"],
+        config["output_dir"],
+        read_previous_schedule(args.previous_schedule),
+        config["seed"],
+        [WindowConstraint(w["days"], w["max_games"]) for w in config["window_constraints"]],
+        config["scarce_locations"],
+        args.neighborhood_days,
+        local_search_seconds=config["local_search"]["seconds"],
+        ejection_chain_depth=config["backup_repair"]["max_chain_depth"],
+        backup_order=config["backup_order"],
+        home_balancing=config["home_balancing"],
+    )
+
+    if not success:
+        raise SystemExit(1)
@@ -0,0 +1,147 @@
+"""
+Finds the scarce locations: those with too few gameslots for the home games their teams are meant to get there. Once
+the preferred home teams are chosen, every matchup is meant to be played at its preferred home team's location, so a
+location's demand is the number of matchups that prefer it. Its supply is the number of its gameslots that at least one
+of those matchups can use, leaving out the preassigned ones and the ones blacked out for all of them. A location is
+scarce if its demand is at least `SCARCITY_THRESHOLD` times its supply.
+
+Setting `scarce_locations: auto` in `config.yml` marks the scarce locations this way on every run. To see the analysis,
+and a list to paste into `config.yml` instead, run:
+
+    uv run -m versizzle.scarcity
+"""
+
+import argparse
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Literal
+
+from versizzle.config import load_config
+from versizzle.gameslot import Gameslot
+from versizzle.location import Location
+from versizzle.matchup import Matchup
+
+# The value of `scarce_locations` that has them found automatically.
+AUTO_SCARCE_LOCATIONS = "auto"
+
+# Either the names of the scarce locations, or `AUTO_SCARCE_LOCATIONS`.
+type ScarceLocationNames = list[str] | Literal["auto"]
+
+# A location is scarce once its demand is this much of its supply. Matchups rarely get every gameslot they could, since
+# window constraints and other matchups get in the way, so a location is already tight before its demand reaches the
+# whole of its supply.
+SCARCITY_THRESHOLD = 0.8
+
+
+@dataclass
+class LocationSupply:
+    """The home games a location is asked for, and the gameslots it has for them."""
+
+    location: Location
+    num_teams: int
+    demand: int
+    supply: int
+
+    def get_ratio(self) -> float:
+        if self.supply == 0:
+            return float("inf") if self.demand else 0.0
+        return self.demand / self.supply
+
+    def is_scarce(self, threshold: float = SCARCITY_THRESHOLD) -> bool:
+        return self.demand > 0 and self.get_ratio() >= threshold
+
+
+def get_location_supplies(matchups: Sequence[Matchup], gameslots: Iterable[Gameslot]) -> list[LocationSupply]:
+    """
+    Returns the supply and demand of each location that is some team's home, scarcest first. The preferred home teams
+    must be chosen, and the candidate gameslots assigned, for the matchups that aren't scheduled yet.
+    """
+
+    supplies: dict[Location, LocationSupply] = {}
+
+    for m in matchups:
+        for team in m.team_a, m.team_b:
+            if team.home_location is not None and team.home_location not in supplies:
+                supplies[team.home_location] = LocationSupply(team.home_location, 0, 0, 0)
+
+    for team in {t for m in matchups for t in (m.team_a, m.team_b)}:
+        if team.home_location is not None:
+            supplies[team.home_location].num_teams += 1
+
+    for m in matchups:
+        if m.selected_gameslot is not None or m.preferred_home_team is None:
+            continue
+        if m.preferred_home_team.home_location is not None:
+            supplies[m.preferred_home_team.home_location].demand += 1
+
+    for g in gameslots:
+        if g.location in supplies and g.selected_matchup is None and g.matchups_that_prefer_this_slot:
+            supplies[g.location].supply += 1
+
+    return sorted(supplies.values(), key=lambda s: (-s.get_ratio(), s.location.name))
+
+
+def mark_scarce_locations(matchups: Sequence[Matchup], gameslots: Iterable[Gameslot]) -> list[Location]:
+    """Marks each location as scarce or not, by its supply and demand. Returns the scarce locations."""
+
+    scarce_locations = []
+
+    for s in get_location_supplies(matchups, gameslots):
+        s.location.is_scarce = s.is_scarce()
+        if s.location.is_scarce:
+            scarce_locations.append(s.location)
+
+    return scarce_locations
+
+
+if __name__ == "__main__":
+    # Declaring imports here to prevent circular import.
+    from versizzle import scheduler, utils
+    from versizzle.progress import reporter
+    from versizzle.window_constraint import WindowConstraint
+
+    parser = argparse.ArgumentParser(
+        prog="versizzle.scarcity", description="Compare each home location's gameslots with its teams' home games."
+    )
+    parser.add_argument("--seed", type=int, help="seed to choose the home teams with (default: seed in config)")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=SCARCITY_THRESHOLD,
+        help=f"demand, as a fraction of supply, that makes a location scarce (default: {SCARCITY_THRESHOLD})",
+    )
+    args = parser.parse_args()
+
+    config = load_config()
+    reporter.configure("quiet", config["progress"])
+
+    # Only the split of each pair's home games depends on the seed, so any seed gives nearly the same demand.
+    seed = args.seed if args.seed is not None else config.get("seed", 0)
+    window_constraints = [WindowConstraint(w["days"], w["max_games"]) for w in config["window_constraints"]]
+    scheduler.load_league(config["input_dir"], window_constraints, [])
+    scheduler.select_preferred_home_teams(scheduler.get_phase_rng(seed, "home_teams"), config["home_balancing"])
+    scheduler.assign_candidate_gameslots_to_matchups(scheduler.get_phase_rng(seed, "candidates"))
+    supplies = get_location_supplies(scheduler.matchups, scheduler.gameslots)
+
+    table: list[list[object]] = [
+        ["location", "teams", "demand", "supply", "ratio", "scarce"],
+        ["--------", "-----", "------", "------", "-----", "------"],
+    ]
+    for s in supplies:
+        table.append(
+            [
+                s.location,
+                s.num_teams,
+                s.demand,
+                s.supply,
+                f"{s.get_ratio():.2f}",
+                "yes" if s.is_scarce(args.threshold) else "",
+            ]
+        )
+    utils.pretty_print_table(table)
+
+    scarce_location_names = [s.location.name for s in supplies if s.is_scarce(args.threshold)]
+    print()
+    print("scarce_locations:" if scarce_location_names else "scarce_locations: []")
+    for name in scarce_location_names:
+        print(f'  - "{name}"')
@@ -0,0 +1,56 @@
+import json
+import os
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from versizzle.gameslot import Gameslot
+from versizzle.matchup import Matchup
+from versizzle.utils import unwrap
+
+
+@dataclass
+class CachedSchedule:
+    """
+    A finished schedule in compact form. Matchups and gameslots are identified by their index in the ingested lists. For
+    each matchup, we store the index of its selected gameslot and whether team A (rather than team B) is its preferred
+    home team.
+    """
+
+    gameslot_indexes: list[int]
+    team_a_is_preferred_home: list[bool]
+
+
+def get_cache_file_path(
+    cache_dir_path: str, input_hash: str, config_hash: str, random_seed: int, sub_seed: int | None = None
+) -> str:
+    seed_label = random_seed if sub_seed is None else f"{random_seed}.{sub_seed}"
+    return f"{cache_dir_path}/{input_hash[:16]}-{config_hash[:16]}-{seed_label}.json"
+
+
+def load_schedule(file_path: str) -> CachedSchedule | None:
+    """Returns the schedule cached at the given path, or `None` if there isn't one."""
+
+    if not os.path.exists(file_path):
+        return None
+
+    with open(file_path) as file:
+        return CachedSchedule(**json.load(file))
+
+
+def capture_schedule(matchups: Sequence[Matchup], gameslots: list[Gameslot]) -> CachedSchedule:
+    """Returns the finished schedule of the given matchups in compact form."""
+
+    gameslot_indexes = {gameslot: i for i, gameslot in enumerate(gameslots)}
+
+    return CachedSchedule(
+        gameslot_indexes=[gameslot_indexes[unwrap(m.selected_gameslot)] for m in matchups],
+        team_a_is_preferred_home=[m.preferred_home_team == m.team_a for m in matchups],
+    )
+
+
+def save_schedule(file_path: str, matchups: Sequence[Matchup], gameslots: list[Gameslot]):
+    cached_schedule = capture_schedule(matchups, gameslots)
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w") as file:
+        json.dump(cached_schedule.__dict__, file, separators=(",", ":"))
@@ -1,16 +1,37 @@
 import calendar
+import copy
+import csv
+import io
+import os
 import random
 from collections import defaultdict
-from collections.abc import Sequence
-from datetime import timedelta
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import date, timedelta
 from heapq import nlargest
+from itertools import chain
 
-from versizzle import ingestion, postprocessor, utils
+from versizzle import fingerprint, ingestion, postprocessor, scarcity, schedule_cache, utils, validation
 from versizzle.blackout import Blackout
 from versizzle.gameslot import Gameslot
+from versizzle.home_balancing import orient_matchups
 from versizzle.location import Location
 from versizzle.matchup import Matchup
+from versizzle.metrics import ScheduleMetrics
 from versizzle.preassignment import Preassignment
+from versizzle.profiler import profiler
+from versizzle.progress import (
+    BackupDeadEnds,
+    BackupDepthReached,
+    LogLevel,
+    MatchupsRemaining,
+    PhaseCompleted,
+    PhaseStarted,
+    SeedFinished,
+    reporter,
+)
+from versizzle.scarcity import ScarceLocationNames
+from versizzle.seed_ranking import SeedRanking
+from versizzle.seed_store import SEED_FILE_HEADER, SeedResult, SeedStore
 from versizzle.team import Team
 from versizzle.utils import unwrap
 from versizzle.window_constraint import WindowConstraint
@@ -22,9 +43,20 @@ gameslots: list[Gameslot] = []
 locations: dict[str, Location] = dict()  # maps location name -> location object
 blackouts: Sequence[Blackout] = []
 preassignments: list[Preassignment] = []
+schedule_metrics: ScheduleMetrics = ScheduleMetrics([])
+
+# The orders in which the backup selection phase can place matchups.
+BACKUP_ORDERS = ["fewest_backup_gameslots", "team_load"]
+DEFAULT_BACKUP_ORDER = "fewest_backup_gameslots"
+
+# The ways preferred home teams can be chosen. `greedy` balances home games as it goes, so some seeds leave a team
+# short; `exact` finds a balance whenever one exists (see `home_balancing`).
+HOME_BALANCINGS = ["greedy", "exact"]
+DEFAULT_HOME_BALANCING = "greedy"
 
 backup_selection_dead_ends: int
 backup_selection_depth: int
+backup_selection_ejection_chains: int
 
 
 def generate_schedule(
@@ -32,9 +64,209 @@ def generate_schedule(
     output_dir_path: str,
     random_seed: int,
     window_constraints: list[WindowConstraint],
-    scarce_location_names: list[str],
+    scarce_location_names: ScarceLocationNames,
     is_test_run_for_seed: bool = False,
+    local_search_seconds: float = 0,
+    ejection_chain_depth: int = 0,
+    backup_order: str = DEFAULT_BACKUP_ORDER,
+    home_balancing: str = DEFAULT_HOME_BALANCING,
+    config_hash: str = "",
+    cache_dir_path: str | None = None,
+    max_non_preferred_matchups: int | None = None,
+    max_isolated_games: int | None = None,
+    schedule_to_restore: schedule_cache.CachedSchedule | None = None,
+    sub_seed: int | None = None,
+    ingestion_result: ingestion.IngestionResult | None = None,
+) -> SeedResult | None:
+    """
+    Generates a schedule and writes it to the output files. For a test run, nothing is written; instead the result for
+    the seed is returned.
+
+    A test run is aborted after the preferred selection phase if more matchups than `max_non_preferred_matchups` missed
+    a preferred gameslot, or more games than `max_isolated_games` are isolated.
+
+    If a sub-seed is given, the backup selection is reshuffled with it after the preferred selection phase, which
+    reproduces one of the schedules of `do_test_runs_from_checkpoint`.
+
+    If a cache directory is given, finished schedules are cached there by input files, config and seed. When the cache
+    already has the schedule, it is restored instead of searching for it again. A schedule can also be passed in
+    directly, to be restored in the same way.
+    """
+
+    profiler.reset()
+    load_league(input_dir_path, window_constraints, scarce_location_names, ingestion_result)
+
+    cache_file_path = None
+    num_preferred_phase_misses = None
+    cached_schedule = schedule_to_restore
+    if cached_schedule is None and cache_dir_path is not None:
+        input_hash = fingerprint.hash_input_files(input_dir_path)
+        cache_file_path = schedule_cache.get_cache_file_path(
+            cache_dir_path, input_hash, config_hash, random_seed, sub_seed
+        )
+        cached_schedule = schedule_cache.load_schedule(cache_file_path)
+
+    if cached_schedule is not None:
+        reporter.message(f"Restoring cached schedule from {cache_file_path or 'memory'}")
+        with profiler.phase("cache restore"):
+            restore_cached_schedule(cached_schedule)
+        # A restored schedule skips the phases that check the schedule they finish, so it is checked here.
+        check_schedule(window_constraints, "restored")
+    else:
+        with profiler.phase("home team selection"):
+            select_preferred_home_teams(get_phase_rng(random_seed, "home_teams"), home_balancing)
+        with profiler.phase("candidate assignment"):
+            assign_candidate_gameslots_to_matchups(get_phase_rng(random_seed, "candidates"))
+        if scarce_location_names == scarcity.AUTO_SCARCE_LOCATIONS:
+            with profiler.phase("scarcity analysis"):
+                scarcity.mark_scarce_locations(matchups, gameslots)
+
+        matchups_using_backup_slots = select_gameslots_in_preferred_phase(
+            window_constraints, get_phase_rng(random_seed, "preferred")
+        )
+        num_preferred_phase_misses = len(matchups_using_backup_slots)
+
+        if is_test_run_for_seed:
+            abort_reason = get_early_abort_reason(
+                num_preferred_phase_misses, max_non_preferred_matchups, max_isolated_games
+            )
+            if abort_reason is not None:
+                reporter.message(f"Aborting seed early because {abort_reason}.")
+                return SeedResult(
+                    random_seed,
+                    succeeded=False,
+                    num_preferred_phase_misses=num_preferred_phase_misses,
+                    aborted=True,
+                    sub_seed=sub_seed,
+                )
+
+        if sub_seed is not None:
+            reshuffle_for_sub_seed(matchups_using_backup_slots, random_seed, sub_seed)
+
+        success = finish_schedule(
+            matchups_using_backup_slots,
+            window_constraints,
+            ejection_chain_depth,
+            backup_order,
+            local_search_seconds,
+            get_phase_rng(random_seed, "local_search", sub_seed),
+        )
+
+        if not success:
+            if not is_test_run_for_seed:
+                return None
+            return SeedResult(
+                random_seed,
+                succeeded=False,
+                num_preferred_phase_misses=num_preferred_phase_misses,
+                sub_seed=sub_seed,
+            )
+
+        if cache_file_path is not None:
+            schedule_cache.save_schedule(cache_file_path, matchups, gameslots)
+
+    if is_test_run_for_seed:
+        return get_seed_result(random_seed, sub_seed, num_preferred_phase_misses)
+
+    write_output_files(output_dir_path)
+    return None
+
+
+def do_test_runs_from_checkpoint(
+    input_dir_path: str,
+    random_seed: int,
+    sub_seeds: list[int],
+    window_constraints: list[WindowConstraint],
+    scarce_location_names: ScarceLocationNames,
+    local_search_seconds: float = 0,
+    ejection_chain_depth: int = 0,
+    backup_order: str = DEFAULT_BACKUP_ORDER,
+    home_balancing: str = DEFAULT_HOME_BALANCING,
+    config_hash: str = "",
+    cache_dir_path: str | None = None,
+    max_non_preferred_matchups: int | None = None,
+    max_isolated_games: int | None = None,
+    ingestion_result: ingestion.IngestionResult | None = None,
+) -> Iterator[SeedResult]:
+    """
+    Runs the seed up to the end of the preferred selection phase once, and saves a checkpoint there. Then, for each
+    sub-seed, restores the checkpoint, reshuffles the backup selection with the seed and sub-seed, and finishes the
+    schedule. Yields the result for each sub-seed while its schedule is still loaded.
+
+    The preferred selection phase is the expensive one on big leagues, and a good preferred selection is often let down
+    by an unlucky backup selection, so this is a cheap way to give good seeds several tries at the backup phase.
+    """
+
+    load_league(input_dir_path, window_constraints, scarce_location_names, ingestion_result)
+    select_preferred_home_teams(get_phase_rng(random_seed, "home_teams"), home_balancing)
+    assign_candidate_gameslots_to_matchups(get_phase_rng(random_seed, "candidates"))
+    if scarce_location_names == scarcity.AUTO_SCARCE_LOCATIONS:
+        scarcity.mark_scarce_locations(matchups, gameslots)
+
+    matchups_using_backup_slots = select_gameslots_in_preferred_phase(
+        window_constraints, get_phase_rng(random_seed, "preferred")
+    )
+
+    num_preferred_phase_misses = len(matchups_using_backup_slots)
+    abort_reason = get_early_abort_reason(num_preferred_phase_misses, max_non_preferred_matchups, max_isolated_games)
+    if abort_reason is not None:
+        reporter.message(f"Aborting seed early because {abort_reason}.")
+        for sub_seed in sub_seeds:
+            yield SeedResult(
+                random_seed,
+                succeeded=False,
+                num_preferred_phase_misses=num_preferred_phase_misses,
+                aborted=True,
+                sub_seed=sub_seed,
+            )
+        return
+
+    checkpoint = capture_checkpoint()
+    input_hash = fingerprint.hash_input_files(input_dir_path) if cache_dir_path is not None else ""
+
+    for sub_seed in sub_seeds:
+        reporter.message(f"Running sub-seed {sub_seed} of seed {random_seed} from the checkpoint.")
+
+        restore_checkpoint(checkpoint)
+        sub_seed_matchups_using_backup_slots = list(matchups_using_backup_slots)
+        reshuffle_for_sub_seed(sub_seed_matchups_using_backup_slots, random_seed, sub_seed)
+
+        success = finish_schedule(
+            sub_seed_matchups_using_backup_slots,
+            window_constraints,
+            ejection_chain_depth,
+            backup_order,
+            local_search_seconds,
+            get_phase_rng(random_seed, "local_search", sub_seed),
+        )
+
+        if not success:
+            yield SeedResult(
+                random_seed, succeeded=False, num_preferred_phase_misses=num_preferred_phase_misses, sub_seed=sub_seed
+            )
+            continue
+
+        if cache_dir_path is not None:
+            schedule_cache.save_schedule(
+                schedule_cache.get_cache_file_path(cache_dir_path, input_hash, config_hash, random_seed, sub_seed),
+                matchups,
+                gameslots,
+            )
+
+        yield get_seed_result(random_seed, sub_seed, num_preferred_phase_misses)
+
+
+def load_league(
+    input_dir_path: str,
+    window_constraints: list[WindowConstraint],
+    scarce_location_names: ScarceLocationNames,
+    ingestion_result: ingestion.IngestionResult | None = None,
 ):
+    """
+    Ingests the input files and performs the preassignments. If an ingestion result is given, a copy of it is used
+    instead of ingesting the files again. It must not have been used for scheduling yet.
+    """
+
     global divisions_to_counts
     global teams
     global matchups
@@ -42,15 +274,19 @@ def generate_schedule(
     global locations
     global blackouts
     global preassignments
+    global schedule_metrics
     global backup_selection_dead_ends
     global backup_selection_depth
 
     backup_selection_dead_ends = 0
     backup_selection_depth = 0
 
-    random.seed(random_seed)
+    with profiler.phase("ingestion"):
+        if ingestion_result is None:
+            ingestion_result = ingestion.ingest_files(input_dir_path, scarce_location_names)
+        else:
+            ingestion_result = copy.deepcopy(ingestion_result)
 
-    ingestion_result = ingestion.ingest_files(input_dir_path, scarce_location_names)
     divisions_to_counts = ingestion_result.divisions_to_counts
     teams = ingestion_result.teams
     matchups = ingestion_result.matchups
@@ -59,48 +295,164 @@ def generate_schedule(
     blackouts = ingestion_result.blackouts
     preassignments = ingestion_result.preassignments
 
-    do_preassignments(window_constraints)
-    select_preferred_home_teams()
-    assign_candidate_gameslots_to_matchups()
+    schedule_metrics = ScheduleMetrics(teams.values())
+    for m in matchups:
+        m.metrics = schedule_metrics
+
+    with profiler.phase("preassignments"):
+        do_preassignments(window_constraints)
 
-    success = select_gameslots_for_matchups(window_constraints)
+
+def finish_schedule(
+    matchups_using_backup_slots: list[Matchup],
+    window_constraints: list[WindowConstraint],
+    ejection_chain_depth: int,
+    backup_order: str,
+    local_search_seconds: float,
+    local_search_rng: random.Random,
+) -> bool:
+    """Runs the backup selection phase and post-processing. Returns `False` if no valid schedule was found."""
+
+    with profiler.phase("backup selection"):
+        success = select_gameslots_in_backup_phase(
+            matchups_using_backup_slots, window_constraints, ejection_chain_depth, backup_order
+        )
 
     if not success:
-        print("Failed to find a schedule. Try relaxing your window constraints.")
-        return
+        reporter.message("Failed to find a schedule. Try relaxing your window constraints.", LogLevel.QUIET)
+        return False
 
-    print("A valid schedule was found!")
+    reporter.message("A valid schedule was found!")
 
-    postprocessor.PostProcessor(matchups, gameslots, window_constraints).post_process()
+    with profiler.phase("post-processing"):
+        postprocessor.PostProcessor(
+            matchups, gameslots, window_constraints, local_search_seconds, local_search_rng
+        ).post_process()
 
-    if is_test_run_for_seed:
-        log_seed_info_from_test_run(output_dir_path, random_seed)
-        return
+    check_schedule(window_constraints, "finished")
 
-    write_output_files(output_dir_path)
+    return True
+
+
+def check_schedule(window_constraints: list[WindowConstraint], description: str):
+    """Raises an exception listing the problems of the current schedule, if it breaks any hard rule."""
+
+    with profiler.phase("validation"):
+        problems = validation.validate_schedule(matchups, blackouts, window_constraints, preassignments)
+    if problems:
+        raise Exception(f"The {description} schedule is invalid:\n" + "\n".join(problems))
+
+
+def get_phase_rng(random_seed: int, phase: str, sub_seed: int | None = None) -> random.Random:
+    """
+    Returns a random number generator for one phase of generating the schedule, seeded with the seed, the phase name
+    and the sub-seed (if any). Each phase has its own stream, so changing how one phase uses randomness doesn't change
+    what the other phases do.
+    """
+
+    return random.Random(f"{random_seed}:{phase}" if sub_seed is None else f"{random_seed}:{phase}:{sub_seed}")
+
+
+def reshuffle_for_sub_seed(matchups_using_backup_slots: list[Matchup], random_seed: int, sub_seed: int):
+    """
+    Reshuffles the backup gameslots of the given matchups and the order in which they are placed (among matchups with
+    equally many backup gameslots), using the backup phase's random number generator for the sub-seed. This gives each
+    sub-seed its own backup selection phase.
+    """
+
+    rng = get_phase_rng(random_seed, "backup", sub_seed)
+
+    for m in matchups_using_backup_slots:
+        rng.shuffle(unwrap(m.backup_gameslots))
+    rng.shuffle(matchups_using_backup_slots)
+
+
+def capture_checkpoint() -> list[tuple[Gameslot | None, list[Gameslot]]]:
+    """Returns the gameslot currently selected by each matchup, along with the current order of its backup gameslots."""
+
+    return [(m.selected_gameslot, list(unwrap(m.backup_gameslots))) for m in matchups]
+
+
+def restore_checkpoint(checkpoint: list[tuple[Gameslot | None, list[Gameslot]]]):
+    """
+    Takes a checkpoint from `capture_checkpoint`, moves every matchup back to the gameslot it had then and restores the
+    order of its backup gameslots.
+    """
+
+    for m, (gameslot, _) in zip(matchups, checkpoint, strict=True):
+        if m.selected_gameslot is not None and m.selected_gameslot != gameslot:
+            m.deselect_gameslot()
+
+    for m, (gameslot, backup_gameslots) in zip(matchups, checkpoint, strict=True):
+        m.backup_gameslots = list(backup_gameslots)
+        if gameslot is not None and m.selected_gameslot is None:
+            m.select_gameslot(gameslot)
+
+
+def restore_cached_schedule(cached_schedule: schedule_cache.CachedSchedule):
+    """
+    Takes a cached schedule for the ingested matchups and gameslots, and selects the cached preferred home teams and
+    gameslots. Preassignments must already be done.
+
+    As in `assign_candidate_gameslots_to_matchup`, each matchup is recorded as preferring every gameslot it could use at
+    its preferred home team's location, not only the one it selected, so that moving it to another of them later still
+    counts as preferred.
+    """
+
+    gameslots_by_location: dict[Location, list[Gameslot]] = defaultdict(list)
+    for g in gameslots:
+        if not g.is_preassigned:
+            g.matchups_that_prefer_this_slot = set()
+            gameslots_by_location[g.location].append(g)
+
+    blackouts_by_date: dict[date, list[Blackout]] = defaultdict(list)
+    for b in blackouts:
+        blackouts_by_date[b.date].append(b)
+
+    for m, gameslot_index, team_a_is_preferred_home in zip(
+        matchups, cached_schedule.gameslot_indexes, cached_schedule.team_a_is_preferred_home, strict=True
+    ):
+        m.select_preferred_home_team(m.team_a if team_a_is_preferred_home else m.team_b)
+
+        if m.is_preassigned:
+            continue
+
+        home_location = unwrap(m.preferred_home_team).home_location
+        for g in gameslots_by_location.get(home_location, []) if home_location is not None else []:
+            if not any(b.prohibits_matchup_in_slot(m, g) for b in blackouts_by_date.get(g.date, [])):
+                unwrap(g.matchups_that_prefer_this_slot).add(m)
+
+        m.select_gameslot(gameslots[gameslot_index])
 
 
 def do_preassignments(window_constraints: list[WindowConstraint]):
-    print(f"Performing {len(preassignments)} preassignments")
+    reporter.message(f"Performing {len(preassignments)} preassignments")
 
     for preassignment in preassignments:
         preassignment.assign(matchups, gameslots, blackouts, window_constraints)
 
-    print("Preassignments complete.")
-    print()
+    reporter.message("Preassignments complete.")
 
 
-def select_preferred_home_teams():
-    """For each matchup, selects which team is the preferred home team."""
+def select_preferred_home_teams(rng: random.Random, home_balancing: str = DEFAULT_HOME_BALANCING):
+    """
+    For each matchup, selects which team is the preferred home team. With `exact` home balancing, every team gets half
+    its asymmetric matchups at home whenever the preassignments allow it, rather than only on a lucky seed.
+    """
+
+    if home_balancing not in HOME_BALANCINGS:
+        raise Exception(f"Unknown home balancing '{home_balancing}'. Choose from: {', '.join(HOME_BALANCINGS)}")
 
     for division in divisions_to_counts:
-        if any(m.is_preassigned for m in matchups if m.division == division):
-            select_preferred_home_teams_in_preassigned_division(division)
+        if home_balancing == "exact":
+            select_preferred_home_teams_in_division_exactly(division, rng)
+        elif any(m.is_preassigned for m in matchups if m.division == division):
+            select_preferred_home_teams_in_preassigned_division(division, rng)
         else:
-            select_preferred_home_teams_in_nonpreassigned_division(division)
+            select_preferred_home_teams_in_nonpreassigned_division(division, rng)
 
 
-def select_preferred_home_teams_in_nonpreassigned_division(division: str):
+def select_preferred_home_teams_in_nonpreassigned_division(division: str, rng: random.Random):
     """
     Takes a division with no preassignments. For every matchup in that division, selects which team is the preferred
     home team. The lack of preassignments allows us to use a more ambitious home selection algorithm. Not only will we
@@ -110,7 +462,7 @@ def select_preferred_home_teams_in_nonpreassigned_division(division: str):
     """
 
     division_matchups = [m for m in matchups if m.division == division]
-    random.shuffle(division_matchups)  # TODO: Maybe remove all local shuffling and shuffle once right after ingestion
+    rng.shuffle(division_matchups)  # TODO: Maybe remove all local shuffling and shuffle once right after ingestion
 
     team_pairs_to_matchups: defaultdict[tuple[str, str], list[Matchup]] = defaultdict(list)
     for m in division_matchups:
@@ -146,7 +498,7 @@ def select_preferred_home_teams_in_nonpreassigned_division(division: str):
 
             home_team = get_team_who_needs_home_in_asymmetric_matchup(m)
             if home_team is None:
-                home_team = get_team_with_lower_asymmetric_preferred_home_ratio(m.team_a, m.team_b)
+                home_team = get_team_with_lower_asymmetric_preferred_home_ratio(m.team_a, m.team_b, rng)
 
             m.select_preferred_home_team(home_team)
 
@@ -155,19 +507,10 @@ def select_preferred_home_teams_in_nonpreassigned_division(division: str):
     # which we display the teams. From an aesthetic standpoint, it is nice to balance our symmetric matchups, meaning if
     # two teams play each other multiple times, we call each team the home team half of the time.
 
-    for group in groups_of_identical_symmetric_matchups:
-        team_a, team_b = group[0].team_a, group[0].team_b
+    select_preferred_home_teams_in_symmetric_groups(groups_of_identical_symmetric_matchups, rng)
 
-        for _ in range(len(group) // 2):
-            group.pop().select_preferred_home_team(team_a)
-            group.pop().select_preferred_home_team(team_b)
 
-        if group:
-            # If there's an extra matchup, give it to the team with the lower asymmetric home ratio.
-            group[0].select_preferred_home_team(get_team_with_lower_asymmetric_preferred_home_ratio(team_a, team_b))
-
-
-def select_preferred_home_teams_in_preassigned_division(division: str):
+def select_preferred_home_teams_in_preassigned_division(division: str, rng: random.Random):
     """
     Takes a division with at least one preassignment. For every matchup in that division, selects which team is the
     preferred home team. Preassignments can seriously complicate preferred home selection, so we use a less ambitious
@@ -176,7 +519,7 @@ def select_preferred_home_teams_in_preassigned_division(division: str):
     """
 
     division_matchups = [m for m in matchups if m.division == division]
-    random.shuffle(division_matchups)  # TODO: Maybe remove all local shuffling and shuffle once right after ingestion
+    rng.shuffle(division_matchups)  # TODO: Maybe remove all local shuffling and shuffle once right after ingestion
 
     # First, handle preassigned asymmetric matchups. The preferred home team is obvious here: we just use whichever home
     # location was preassigned.
@@ -187,17 +530,7 @@ def select_preferred_home_teams_in_preassigned_division(division: str):
         if matchup.team_a.home_location == matchup.team_b.home_location:
             continue
 
-        location = unwrap(matchup.selected_gameslot).location
-        if location == matchup.team_a.home_location:
-            home_team = matchup.team_a
-        elif location == matchup.team_b.home_location:
-            home_team = matchup.team_b
-        else:
-            # A preassigned matchup being placed at neither team's home is rare. Rather than carefully considering this
-            # case, We'll let randomness find a good solution over many seeds.
-            home_team = random.choice((matchup.team_a, matchup.team_b))
-
-        matchup.select_preferred_home_team(home_team)
+        matchup.select_preferred_home_team(get_home_team_of_preassigned_matchup(matchup, rng))
 
     # Second, handle nonpreassigned asymmetric matchups. This is the interesting case. Our strategy is to take as the
     # home team whichever team has a lower asymmetric home ratio so far. However, there is a caveat: if either team
@@ -212,7 +545,7 @@ def select_preferred_home_teams_in_preassigned_division(division: str):
 
         home_team = get_team_who_needs_home_in_asymmetric_matchup(matchup)
         if home_team is None:
-            home_team = get_team_with_lower_asymmetric_preferred_home_ratio(matchup.team_a, matchup.team_b)
+            home_team = get_team_with_lower_asymmetric_preferred_home_ratio(matchup.team_a, matchup.team_b, rng)
 
         matchup.select_preferred_home_team(home_team)
 
@@ -228,7 +561,91 @@ def select_preferred_home_teams_in_preassigned_division(division: str):
             first_team_name, second_team_name = sorted((matchup.team_a.name, matchup.team_b.name))
             groups_of_identical_symmetric_matchups[(first_team_name, second_team_name)].append(matchup)
 
-    for group in groups_of_identical_symmetric_matchups.values():
+    select_preferred_home_teams_in_symmetric_groups(groups_of_identical_symmetric_matchups.values(), rng)
+
+
+def select_preferred_home_teams_in_division_exactly(division: str, rng: random.Random):
+    """
+    Takes a division, with or without preassignments. For every matchup in that division, selects which team is the
+    preferred home team, such that every team has at least half its asymmetric matchups (rounded down) at home, if the
+    preassigned home teams leave any way to do so. Otherwise as many teams as possible get their half.
+
+    The asymmetric matchups preassigned to one team's home location keep that team as their home team. Those
+    preassigned to a neutral location are left to the matching, since the preassignment doesn't say which way they go.
+    Without preassignments, pairs of teams that play each other more than once split their home games evenly first, as
+    in the greedy selection. The rest of the asymmetric matchups are then oriented with an exact matching (see
+    `home_balancing`), and the symmetric ones are split evenly.
+    """
+
+    division_matchups = [m for m in matchups if m.division == division]
+    rng.shuffle(division_matchups)
+
+    asymmetric_matchups = [m for m in division_matchups if m.team_a.home_location != m.team_b.home_location]
+
+    if any(m.is_preassigned for m in division_matchups):
+        for matchup in asymmetric_matchups:
+            if matchup.is_preassigned and unwrap(matchup.selected_gameslot).location in (
+                matchup.team_a.home_location,
+                matchup.team_b.home_location,
+            ):
+                matchup.select_preferred_home_team(get_home_team_of_preassigned_matchup(matchup, rng))
+    else:
+        team_pairs_to_matchups: defaultdict[tuple[str, str], list[Matchup]] = defaultdict(list)
+        for m in asymmetric_matchups:
+            first_team_name, second_team_name = sorted([m.team_a.name, m.team_b.name])
+            team_pairs_to_matchups[(first_team_name, second_team_name)].append(m)
+
+        for group in team_pairs_to_matchups.values():
+            for i in range(len(group) // 2 * 2):
+                group[i].select_preferred_home_team(group[0].team_a if i % 2 == 0 else group[0].team_b)
+
+    remaining_matchups = [m for m in asymmetric_matchups if m.preferred_home_team is None]
+    division_teams = {t for m in division_matchups for t in (m.team_a, m.team_b)}
+    needs = {
+        t: max(0, t.num_asymmetric_matchups // 2 - t.num_asymmetric_matchups_preferring_this_team_as_home)
+        for t in division_teams
+    }
+
+    for matchup, home_team in orient_matchups(remaining_matchups, needs, rng).items():
+        matchup.select_preferred_home_team(home_team)
+
+    # The matchups that no team needs can go either way, so they go to the team with fewer home games so far.
+    for matchup in remaining_matchups:
+        if matchup.preferred_home_team is None:
+            matchup.select_preferred_home_team(
+                get_team_with_lower_asymmetric_preferred_home_ratio(matchup.team_a, matchup.team_b, rng)
+            )
+
+    groups_of_identical_symmetric_matchups: defaultdict[tuple[str, str], list[Matchup]] = defaultdict(list)
+    for matchup in division_matchups:
+        if matchup.team_a.home_location == matchup.team_b.home_location:
+            first_team_name, second_team_name = sorted((matchup.team_a.name, matchup.team_b.name))
+            groups_of_identical_symmetric_matchups[(first_team_name, second_team_name)].append(matchup)
+
+    select_preferred_home_teams_in_symmetric_groups(groups_of_identical_symmetric_matchups.values(), rng)
+
+
+def get_home_team_of_preassigned_matchup(matchup: Matchup, rng: random.Random) -> Team:
+    """Takes a preassigned asymmetric matchup. Returns the team whose home location it was preassigned to."""
+
+    location = unwrap(matchup.selected_gameslot).location
+    if location == matchup.team_a.home_location:
+        return matchup.team_a
+    if location == matchup.team_b.home_location:
+        return matchup.team_b
+
+    # A preassigned matchup being placed at neither team's home is rare. Rather than carefully considering this case,
+    # We'll let randomness find a good solution over many seeds.
+    return rng.choice((matchup.team_a, matchup.team_b))
+
+
+def select_preferred_home_teams_in_symmetric_groups(groups: Iterable[list[Matchup]], rng: random.Random):
+    """
+    Takes groups of identical symmetric matchups. It doesn't matter which home team we pick for these from a scheduling
+    standpoint, but it does determine the order in which we display the teams, so each pair of teams takes turns.
+    """
+
+    for group in groups:
         team_a, team_b = group[0].team_a, group[0].team_b
 
         for _ in range(len(group) // 2):
@@ -237,7 +654,9 @@ def select_preferred_home_teams_in_preassigned_division(division: str):
 
         if group:
             # If there's an extra matchup, give it to the team with the lower asymmetric home ratio.
-            group[0].select_preferred_home_team(get_team_with_lower_asymmetric_preferred_home_ratio(team_a, team_b))
+            group[0].select_preferred_home_team(
+                get_team_with_lower_asymmetric_preferred_home_ratio(team_a, team_b, rng)
+            )
 
 
 def get_team_who_needs_home_in_asymmetric_matchup(matchup: Matchup) -> Team | None:
@@ -271,7 +690,7 @@ def get_team_who_needs_home_in_asymmetric_matchup(matchup: Matchup) -> Team | No
     return None
 
 
-def get_team_with_lower_asymmetric_preferred_home_ratio(team_1: Team, team_2: Team):
+def get_team_with_lower_asymmetric_preferred_home_ratio(team_1: Team, team_2: Team, rng: random.Random):
     team_1_home_ratio = (
         0.5
         if team_1.num_asymmetric_matchups_with_home_preference_chosen == 0
@@ -285,12 +704,12 @@ def get_team_with_lower_asymmetric_preferred_home_ratio(team_1: Team, team_2: Te
         / float(team_2.num_asymmetric_matchups_with_home_preference_chosen)
     )
     if abs(team_1_home_ratio - team_2_home_ratio) < 0.0001:
-        return random.choice((team_1, team_2))
+        return rng.choice((team_1, team_2))
 
     return team_1 if team_1_home_ratio < team_2_home_ratio else team_2
 
 
-def assign_candidate_gameslots_to_matchups():
+def assign_candidate_gameslots_to_matchups(rng: random.Random):
     for g in gameslots:
         if g.is_preassigned:
             continue
@@ -301,72 +720,136 @@ def assign_candidate_gameslots_to_matchups():
         if m.is_preassigned:
             continue
 
-        assert m.preferred_home_team is not None
+        assign_candidate_gameslots_to_matchup(m, rng)
 
-        m.preferred_gameslots = []
-        m.backup_gameslots = []
 
-        for g in gameslots:
-            if g.is_preassigned:
-                continue
-            if any(b.prohibits_matchup_in_slot(m, g) for b in blackouts):
-                continue
+def assign_candidate_gameslots_to_matchup(matchup: Matchup, rng: random.Random):
+    """
+    Sorts the gameslots that the matchup could use (those that aren't preassigned or blacked out for it) into its
+    preferred gameslots, at its preferred home team's location, and its backup gameslots. Both lists are shuffled.
+    """
 
-            assert g.matchups_that_prefer_this_slot is not None
+    assert matchup.preferred_home_team is not None
 
-            if m.preferred_home_team.home_location == g.location:
-                m.preferred_gameslots.append(g)
-                g.matchups_that_prefer_this_slot.add(m)
-            else:
-                m.backup_gameslots.append(g)
+    matchup.preferred_gameslots = []
+    matchup.backup_gameslots = []
 
-        random.shuffle(m.preferred_gameslots)
-        random.shuffle(m.backup_gameslots)
+    for g in gameslots:
+        if g.is_preassigned:
+            continue
+        if any(b.prohibits_matchup_in_slot(matchup, g) for b in blackouts):
+            continue
 
+        assert g.matchups_that_prefer_this_slot is not None
 
-def select_gameslots_for_matchups(window_constraints: list[WindowConstraint]):
-    print("Preferred selection phase started.")
+        if matchup.preferred_home_team.home_location == g.location:
+            matchup.preferred_gameslots.append(g)
+            g.matchups_that_prefer_this_slot.add(matchup)
+        else:
+            matchup.backup_gameslots.append(g)
 
-    select_preferred_gameslots(window_constraints)
+    rng.shuffle(matchup.preferred_gameslots)
+    rng.shuffle(matchup.backup_gameslots)
 
-    print("Preferred selection phase complete.")
+
+def select_gameslots_in_preferred_phase(
+    window_constraints: list[WindowConstraint], rng: random.Random
+) -> list[Matchup]:
+    """Runs the preferred selection phase and returns the matchups that still need a gameslot."""
+
+    reporter.emit(PhaseStarted("preferred selection"))
+
+    with profiler.phase("preferred selection"):
+        select_preferred_gameslots(window_constraints, rng)
+
+    reporter.emit(PhaseCompleted("preferred selection"))
 
     matchups_using_backup_slots = list(filter(lambda m: m.selected_gameslot is None, matchups))
 
-    print(f"Number of matchups that did not get preferred selection: {len(matchups_using_backup_slots)}")
-    print("Block sizes after preferred selection phase:")
-    print()
-    print_block_size_metrics()
+    reporter.message(f"Number of matchups that did not get preferred selection: {len(matchups_using_backup_slots)}")
+    if reporter.shows(LogLevel.VERBOSE):
+        block_size_metrics = io.StringIO()
+        print_block_size_metrics(block_size_metrics)
+        reporter.message(
+            "Block sizes after preferred selection phase:\n\n" + block_size_metrics.getvalue(), LogLevel.VERBOSE
+        )
 
-    print("Backup selection phase started.")
+    return matchups_using_backup_slots
+
+
+def select_gameslots_in_backup_phase(
+    matchups_using_backup_slots: list[Matchup],
+    window_constraints: list[WindowConstraint],
+    ejection_chain_depth: int = 0,
+    backup_order: str = DEFAULT_BACKUP_ORDER,
+) -> bool:
+    reporter.emit(PhaseStarted("backup selection"))
+
+    if backup_order == "fewest_backup_gameslots":
+        matchups_using_backup_slots.sort(key=lambda m: len(unwrap(m.backup_gameslots)))
+    elif backup_order == "team_load":
+        # Matchups between the busiest teams go first, since their teams have the least room to spare.
+        matchups_using_backup_slots.sort(
+            key=lambda m: (-len(m.team_a.matchups) - len(m.team_b.matchups), len(unwrap(m.backup_gameslots)))
+        )
+    else:
+        raise Exception(f"Unknown backup order '{backup_order}'. Choose from: {', '.join(BACKUP_ORDERS)}")
+
+    if ejection_chain_depth > 0:
+        success = repair_backup_gameslots(matchups_using_backup_slots, window_constraints, ejection_chain_depth)
+        reporter.message(f"Backup selection completed with {backup_selection_ejection_chains} ejection chains.")
+        return success
 
-    matchups_using_backup_slots.sort(key=lambda m: len(unwrap(m.backup_gameslots)))
     success = select_backup_gameslots(matchups_using_backup_slots, 0, window_constraints)
 
-    print(f"Backup selection completed with {backup_selection_dead_ends} dead ends.")
+    reporter.message(f"Backup selection completed with {backup_selection_dead_ends} dead ends.")
 
     return success
 
 
-def select_preferred_gameslots(window_constraints: list[WindowConstraint]):
+def get_early_abort_reason(
+    num_preferred_phase_misses: int, max_non_preferred_matchups: int | None, max_isolated_games: int | None
+) -> str | None:
+    """
+    Checks the schedule after the preferred selection phase against the early abort thresholds. Returns why the seed
+    should be aborted, or `None` if it should be finished.
+
+    The number of matchups that missed a preferred gameslot is only known for certain at this point. Post-processing
+    and local search can give some of them a preferred gameslot later, so the final count can only be lower. That is
+    why the threshold relative to the best seed is set from the best seed's count at this same point (see
+    `get_max_non_preferred_matchups`), rather than from its final count.
+    """
+
+    if max_non_preferred_matchups is not None and num_preferred_phase_misses > max_non_preferred_matchups:
+        return f"{num_preferred_phase_misses} matchups missed a preferred gameslot (max {max_non_preferred_matchups})"
+
+    num_isolated_games = schedule_metrics.get_block_sizes_to_counts().get(1, 0)
+    if max_isolated_games is not None and num_isolated_games > max_isolated_games:
+        return f"{num_isolated_games} games are isolated (max {max_isolated_games})"
+
+    return None
+
+
+def select_preferred_gameslots(window_constraints: list[WindowConstraint], rng: random.Random):
     # Randomize processing order for matchups. If we don't do this, matchups near the end
     # of matchups.csv get processed later, meaning their preferences are less likely to be
     # satisified.
     unprocessed_matchups = [m for m in matchups if m.selected_gameslot is None]
-    random.shuffle(unprocessed_matchups)
+    rng.shuffle(unprocessed_matchups)
 
-    print("Starting step 1 of preferred selection phase (same home matchups)")
+    reporter.message("Starting step 1 of preferred selection phase (same home matchups)", LogLevel.VERBOSE)
 
     # If both teams in a matchup have the same home location, it would be egregious
     # for them to have to travel elsewhere. So those matchups are processed early to
     # make sure they get their preferred location.
     same_home_matchups = [m for m in unprocessed_matchups if m.team_a.home_location == m.team_b.home_location]
-    print(f"{len(same_home_matchups)} same home matchups to process")
-    for matchup in same_home_matchups:
-        select_preferred_gameslot_for_matchup(matchup, window_constraints)
-        unprocessed_matchups.remove(matchup)
+    reporter.message(f"{len(same_home_matchups)} same home matchups to process", LogLevel.VERBOSE)
+    with profiler.phase("step 1 (same home)"):
+        for matchup in same_home_matchups:
+            select_preferred_gameslot_for_matchup(matchup, window_constraints)
+            unprocessed_matchups.remove(matchup)
 
-    print("Starting step 2 of preferred selection phase (scarce home matchups)")
+    reporter.message("Starting step 2 of preferred selection phase (scarce home matchups)", LogLevel.VERBOSE)
 
     # Next we process the matchups with scarce home locations. A location is scarce if it
     # does not have enough gameslots to comfortably give all the teams with that home
@@ -381,39 +864,46 @@ def select_preferred_gameslots(window_constraints: list[WindowConstraint]):
         and m.preferred_home_team.home_location is not None
         and m.preferred_home_team.home_location.is_scarce
     ]
-    print(f"Scarce location(s): {', '.join([str(l) for l in locations.values() if l.is_scarce])}")
-    print(f"{len(scarce_home_matchups)} scarce home matchups to process")
+    reporter.message(
+        f"Scarce location(s): {', '.join([str(l) for l in locations.values() if l.is_scarce])}", LogLevel.VERBOSE
+    )
+    reporter.message(f"{len(scarce_home_matchups)} scarce home matchups to process", LogLevel.VERBOSE)
     unprocessed_scarce_home_matchups = scarce_home_matchups.copy()
-    while unprocessed_scarce_home_matchups:
-        if len(unprocessed_scarce_home_matchups) % 10 == 0:
-            print(f"{len(unprocessed_scarce_home_matchups)} remaining")
-
-        smallest_home_percentage = min(
-            unwrap(m.preferred_home_team).get_home_percentage() for m in unprocessed_scarce_home_matchups
-        )
-        matchups_with_smallest_home_percentage = [
-            m
-            for m in unprocessed_scarce_home_matchups
-            if abs(unwrap(m.preferred_home_team).get_home_percentage() - smallest_home_percentage) < 0.0001
-        ]
-        matchup_to_process = get_most_constrained_matchup_in_list(
-            matchups_with_smallest_home_percentage, window_constraints
-        )
-        select_preferred_gameslot_for_matchup(matchup_to_process, window_constraints)
-        unprocessed_scarce_home_matchups.remove(matchup_to_process)
-        unprocessed_matchups.remove(matchup_to_process)
+    with profiler.phase("step 2 (scarce home)"):
+        while unprocessed_scarce_home_matchups:
+            if len(unprocessed_scarce_home_matchups) % 10 == 0:
+                reporter.emit(
+                    MatchupsRemaining("scarce home", len(unprocessed_scarce_home_matchups), len(scarce_home_matchups))
+                )
+
+            smallest_home_percentage = min(
+                unwrap(m.preferred_home_team).get_home_percentage() for m in unprocessed_scarce_home_matchups
+            )
+            matchups_with_smallest_home_percentage = [
+                m
+                for m in unprocessed_scarce_home_matchups
+                if abs(unwrap(m.preferred_home_team).get_home_percentage() - smallest_home_percentage) < 0.0001
+            ]
+            matchup_to_process = get_most_constrained_matchup_in_list(
+                matchups_with_smallest_home_percentage, window_constraints
+            )
+            select_preferred_gameslot_for_matchup(matchup_to_process, window_constraints)
+            unprocessed_scarce_home_matchups.remove(matchup_to_process)
+            unprocessed_matchups.remove(matchup_to_process)
 
-    print("Starting step 3 of preferred selection phase (ordinary matchups)")
+    reporter.message("Starting step 3 of preferred selection phase (ordinary matchups)", LogLevel.VERBOSE)
 
     # Finally we process the matchups with no special properties.
-    print(f"{len(unprocessed_matchups)} ordinary matchups to process")
-    while unprocessed_matchups:
-        if len(unprocessed_matchups) % 10 == 0:
-            print(f"{len(unprocessed_matchups)} remaining")
+    num_ordinary_matchups = len(unprocessed_matchups)
+    reporter.message(f"{num_ordinary_matchups} ordinary matchups to process", LogLevel.VERBOSE)
+    with profiler.phase("step 3 (ordinary)"):
+        while unprocessed_matchups:
+            if len(unprocessed_matchups) % 10 == 0:
+                reporter.emit(MatchupsRemaining("ordinary", len(unprocessed_matchups), num_ordinary_matchups))
 
-        matchup_to_process = get_most_constrained_matchup_in_list(unprocessed_matchups, window_constraints)
-        select_preferred_gameslot_for_matchup(matchup_to_process, window_constraints)
-        unprocessed_matchups.remove(matchup_to_process)
+            matchup_to_process = get_most_constrained_matchup_in_list(unprocessed_matchups, window_constraints)
+            select_preferred_gameslot_for_matchup(matchup_to_process, window_constraints)
+            unprocessed_matchups.remove(matchup_to_process)
 
 
 def select_preferred_gameslot_for_matchup(matchup: Matchup, window_constraints: list[WindowConstraint]) -> bool:
@@ -427,6 +917,8 @@ def select_preferred_gameslot_for_matchup(matchup: Matchup, window_constraints:
     for reuse_location in True, False:
         for use_weekend in True, False:
             for avoid_consecutive_days in True, False:
+                # Counted a pass at a time, to keep the profiler out of the innermost loop.
+                profiler.count("gameslots_scanned", len(matchup.preferred_gameslots))
                 for gameslot in matchup.preferred_gameslots:
                     if gameslot.selected_matchup is not None:
                         continue
@@ -510,9 +1002,11 @@ def select_backup_gameslots(
         backup_selection_dead_ends = 0
         backup_selection_depth = 0
 
+    profiler.count("backup_selection_calls")
+
     if start > backup_selection_depth:
         backup_selection_depth = start
-        print(f"New depth reached: {backup_selection_depth} / {len(matchups_using_backup_slots)}")
+        reporter.emit(BackupDepthReached(backup_selection_depth, len(matchups_using_backup_slots)))
 
     if backup_selection_dead_ends >= 10000:
         # It's taking too long. We assume it will not complete in a reasonable time.
@@ -522,6 +1016,63 @@ def select_backup_gameslots(
         return True
 
     matchup = matchups_using_backup_slots[start]
+
+    for gameslot in get_selectable_backup_gameslots(matchup, window_constraints):
+        matchup.select_gameslot(gameslot)
+
+        if select_backup_gameslots(matchups_using_backup_slots, start + 1, window_constraints):
+            return True
+
+        matchup.deselect_gameslot()
+        profiler.count("backup_backtracks")
+
+    backup_selection_dead_ends += 1
+    profiler.count("backup_dead_ends")
+    if backup_selection_dead_ends % 1000 == 0:
+        reporter.emit(BackupDeadEnds(backup_selection_dead_ends))
+
+    return False
+
+
+def repair_backup_gameslots(
+    matchups_using_backup_slots: list[Matchup],
+    window_constraints: list[WindowConstraint],
+    ejection_chain_depth: int,
+) -> bool:
+    """
+    An alternative to `select_backup_gameslots` that never backtracks. Each matchup takes its best free backup gameslot.
+    If it has none, an ejection chain makes room for it by moving matchups that were placed earlier. Returns `False` if
+    some matchup could not be placed even with an ejection chain.
+    """
+
+    global backup_selection_ejection_chains
+    backup_selection_ejection_chains = 0
+
+    for i, matchup in enumerate(matchups_using_backup_slots):
+        gameslot = next(get_selectable_backup_gameslots(matchup, window_constraints), None)
+        if gameslot is not None:
+            matchup.select_gameslot(gameslot)
+            continue
+
+        if not try_ejection_chain(matchup, ejection_chain_depth, window_constraints, set()):
+            reporter.message(
+                f"No ejection chain found for matchup {i + 1} / {len(matchups_using_backup_slots)}: {matchup}"
+            )
+            return False
+
+        backup_selection_ejection_chains += 1
+        profiler.count("ejection_chains")
+
+    return True
+
+
+def get_selectable_backup_gameslots(matchup: Matchup, window_constraints: list[WindowConstraint]) -> Iterator[Gameslot]:
+    """
+    Yields the free backup gameslots that the given matchup could select without violating a window constraint, best
+    first. Each gameslot is checked right before it is yielded, so the caller may select and deselect gameslots between
+    iterations.
+    """
+
     assert matchup.backup_gameslots is not None
 
     for reuse_single_use_location, reuse_multi_use_location in (
@@ -532,6 +1083,7 @@ def select_backup_gameslots(
         for give_nonpreferred_team_home in True, False:
             for use_weekend in True, False:
                 for avoid_consecutive_days in True, False:
+                    profiler.count("gameslots_scanned", len(matchup.backup_gameslots))
                     for gameslot in matchup.backup_gameslots:
                         if gameslot.selected_matchup is not None:
                             continue
@@ -560,20 +1112,101 @@ def select_backup_gameslots(
                         if not all(w.is_satisfied_by_selection(matchup, gameslot) for w in window_constraints):
                             continue
 
-                        matchup.select_gameslot(gameslot)
+                        yield gameslot
 
-                        if select_backup_gameslots(matchups_using_backup_slots, start + 1, window_constraints):
-                            return True
 
-                        matchup.deselect_gameslot()
+def try_ejection_chain(
+    matchup: Matchup,
+    depth: int,
+    window_constraints: list[WindowConstraint],
+    chain_matchups: set[Matchup],
+) -> bool:
+    """
+    Takes an unplaced matchup that has no free gameslot it can select. Tries to make one of its gameslots usable by
+    evicting a single non-preassigned matchup: either the matchup occupying the gameslot, or a game of one of the
+    teams that would otherwise violate a window constraint. The evicted matchup is then re-placed in a free gameslot. If
+    it has no free gameslot either, the chain continues with it, up to `depth` evictions in total. Matchups already
+    moved by the chain are never evicted again.
 
-    backup_selection_dead_ends += 1
-    if backup_selection_dead_ends % 1000 == 0:
-        print(f"Backup selection has hit {backup_selection_dead_ends} dead ends")
+    Returns `True` if the matchup was placed. Otherwise returns `False` and leaves the assignments unchanged.
+    """
+
+    for gameslot in unwrap(matchup.preferred_gameslots) + unwrap(matchup.backup_gameslots):
+        if gameslot.selected_matchup is None and all(
+            w.is_satisfied_by_selection(matchup, gameslot) for w in window_constraints
+        ):
+            # An earlier eviction may have freed up this gameslot, so no eviction is needed.
+            matchup.select_gameslot(gameslot)
+            return True
+
+        for evicted_matchup in get_eviction_candidates(matchup, gameslot, window_constraints):
+            if evicted_matchup.is_preassigned or evicted_matchup in chain_matchups:
+                continue
+
+            evicted_gameslot = unwrap(evicted_matchup.selected_gameslot)
+            evicted_matchup.deselect_gameslot()
+
+            if gameslot.selected_matchup is not None or not all(
+                w.is_satisfied_by_selection(matchup, gameslot) for w in window_constraints
+            ):
+                evicted_matchup.select_gameslot(evicted_gameslot)
+                continue
+
+            matchup.select_gameslot(gameslot)
+
+            new_gameslot = find_selectable_gameslot(evicted_matchup, window_constraints)
+            if new_gameslot is not None:
+                evicted_matchup.select_gameslot(new_gameslot)
+                return True
+
+            if depth > 1 and try_ejection_chain(
+                evicted_matchup, depth - 1, window_constraints, chain_matchups | {matchup}
+            ):
+                return True
+
+            matchup.deselect_gameslot()
+            evicted_matchup.select_gameslot(evicted_gameslot)
 
     return False
 
 
+def get_eviction_candidates(
+    matchup: Matchup, gameslot: Gameslot, window_constraints: list[WindowConstraint]
+) -> list[Matchup]:
+    """
+    Returns the matchups whose eviction could let the given matchup select the given gameslot. If the gameslot is taken,
+    only its occupant qualifies. Otherwise, the games of either team that fall within a window of the gameslot qualify.
+    """
+
+    if gameslot.selected_matchup is not None:
+        return [gameslot.selected_matchup]
+
+    largest_window_size = max((w.window_size for w in window_constraints), default=1)
+
+    candidates = []
+    for offset in range(1 - largest_window_size, largest_window_size):
+        window_date = gameslot.date + timedelta(days=offset)
+        for team in matchup.team_a, matchup.team_b:
+            candidates.extend(m for m in team.games_by_date.get(window_date, []) if m not in candidates)
+
+    return candidates
+
+
+def find_selectable_gameslot(matchup: Matchup, window_constraints: list[WindowConstraint]) -> Gameslot | None:
+    """
+    Returns a free gameslot that the given matchup could select without violating a window constraint, or `None` if
+    there is no such gameslot. Preferred gameslots are considered before backup gameslots.
+    """
+
+    for gameslot in unwrap(matchup.preferred_gameslots):
+        if gameslot.selected_matchup is None and all(
+            w.is_satisfied_by_selection(matchup, gameslot) for w in window_constraints
+        ):
+            return gameslot
+
+    return next(get_selectable_backup_gameslots(matchup, window_constraints), None)
+
+
 def selection_gives_either_team_home(matchup: Matchup, gameslot: Gameslot):
     return gameslot.location == matchup.team_a.home_location or gameslot.location == matchup.team_b.home_location
 
@@ -593,17 +1226,24 @@ def selection_will_create_consecutive_game_days(matchup: Matchup, gameslot: Game
 
 
 def write_output_files(output_dir_path: str):
-    with open(f"{output_dir_path}/master.txt", "w") as f:
-        print_master_schedule(f)
+    with profiler.phase("output files"):
+        with open(f"{output_dir_path}/master.txt", "w") as f:
+            print_master_schedule(f)
+
+        with open(f"{output_dir_path}/pasteable.txt", "w") as f:
+            print_pasteable_schedule(f)
+
+        with open(f"{output_dir_path}/breakout.txt", "w") as f:
+            print_breakout_schedule(f)
 
-    with open(f"{output_dir_path}/pasteable.txt", "w") as f:
-        print_pasteable_schedule(f)
+        with open(f"{output_dir_path}/metrics.txt", "w") as f:
+            print_metrics(f)
 
-    with open(f"{output_dir_path}/breakout.txt", "w") as f:
-        print_breakout_schedule(f)
+        with open(f"{output_dir_path}/schedule.csv", "w", newline="") as f:
+            write_schedule_csv(f)
 
-    with open(f"{output_dir_path}/metrics.txt", "w") as f:
-        print_metrics(f)
+    if profiler.enabled:
+        profiler.write(f"{output_dir_path}/profile.json")
 
 
 def print_master_schedule(file=None):
@@ -655,8 +1295,7 @@ def print_pasteable_schedule(file=None):
                 matchup_str = "\t\tOPEN"
             else:
                 matchup = gameslot.selected_matchup
-                division = matchup.division
-                division_str = "7/8B" if division in ["7/8B South", "7/8B North"] else division
+                division_str = get_pasteable_division(matchup.division)
                 home_team, away_team = matchup.get_teams_in_home_away_order()
 
                 matchup_str = f"{division_str}\t{home_team.name}\t{away_team.name}"
@@ -666,6 +1305,36 @@ def print_pasteable_schedule(file=None):
         # print(file=file)
 
 
+def get_pasteable_division(division: str) -> str:
+    return "7/8B" if division in ["7/8B South", "7/8B North"] else division
+
+
+def write_schedule_csv(file):
+    """
+    Writes every game in the same format as preassignments.csv, with the home team as team a. This is the schedule that
+    `versizzle.reschedule` starts from.
+    """
+
+    writer = csv.writer(file)
+    writer.writerow(["date", "time", "location", "division", "team a", "team b"])
+
+    for g in sorted(gameslots, key=lambda g: (g.date, g.time, g.location.name)):
+        if g.selected_matchup is None:
+            continue
+
+        home_team, away_team = g.selected_matchup.get_teams_in_home_away_order()
+        writer.writerow(
+            [
+                utils.format_input_date(g.date),
+                utils.format_input_time(g.time),
+                g.location.name,
+                g.selected_matchup.division,
+                home_team.name,
+                away_team.name,
+            ]
+        )
+
+
 def print_breakout_schedule(file=None):
     for team in teams.values():
         table = []
@@ -747,13 +1416,8 @@ def print_home_preference_metrics(file=None):
 
     team_metrics = []
     for team in teams.values():
-        asymmetric_matchups = [
-            matchup for matchup in team.matchups if matchup.team_a.home_location != matchup.team_b.home_location
-        ]
-        denominator = len(asymmetric_matchups)
-        numerator = sum(
-            unwrap(matchup.selected_gameslot).location == team.home_location for matchup in asymmetric_matchups
-        )
+        denominator = team.num_asymmetric_matchups
+        numerator = schedule_metrics.get_num_asymmetric_home_games(team)
         percentage = numerator / denominator
         team_metrics.append((percentage, str(team), numerator, denominator))
 
@@ -782,19 +1446,8 @@ def print_consecutive_game_day_metrics(file=None):
     utils.pretty_print_table(table, file=file)
 
 
-def get_num_consecutive_pairs_to_num_teams():
-    num_pairs_to_num_teams = defaultdict(int)
-
-    for team in teams.values():
-        num_pairs_for_team = 0
-        for date in list(team.games_by_date.keys()):
-            next_day = date + timedelta(days=1)
-            if team.games_by_date[date] and team.games_by_date[next_day]:
-                num_pairs_for_team += 1
-
-        num_pairs_to_num_teams[num_pairs_for_team] += 1
-
-    return num_pairs_to_num_teams
+def get_num_consecutive_pairs_to_num_teams() -> dict[int, int]:
+    return schedule_metrics.get_num_consecutive_pairs_to_num_teams()
 
 
 def print_non_preferred_gameslot_metrics(file=None):
@@ -871,13 +1524,7 @@ def print_block_size_metrics(file=None):
 
 
 def get_block_sizes_to_counts() -> dict[int, int]:
-    block_sizes_to_counts = defaultdict(int)
-    for location in locations.values():
-        for num_games in location.num_games_by_date.values():
-            if num_games != 0:
-                block_sizes_to_counts[num_games] += 1
-
-    return block_sizes_to_counts
+    return schedule_metrics.get_block_sizes_to_counts()
 
 
 def print_weekday_metrics(file=None):
@@ -901,26 +1548,14 @@ def print_weekday_metrics(file=None):
     utils.pretty_print_table(table, file=file)
 
 
-def get_num_weekday_games_to_num_teams():
-    num_weekday_games_to_num_teams = defaultdict(int)
-
-    for team in teams.values():
-        num_weekday_games = 0
-
-        for matchup in team.matchups:
-            game_is_weekend = unwrap(matchup.selected_gameslot).date.weekday() in [4, 5]
-            if not game_is_weekend:
-                num_weekday_games += 1
-
-        num_weekday_games_to_num_teams[num_weekday_games] += 1
-
-    return num_weekday_games_to_num_teams
+def get_num_weekday_games_to_num_teams() -> dict[int, int]:
+    return schedule_metrics.get_num_weekday_games_to_num_teams()
 
 
 def get_largest_team_gap_pairs() -> list[tuple[Team, int]]:
     gaps = []
     for team in teams.values():
-        game_dates = sorted(unwrap(matchup.selected_gameslot).date for matchup in team.matchups)
+        game_dates = schedule_metrics.get_game_dates(team)
         gaps.extend(
             (team, (second_date - first_date).days)
             for first_date, second_date in zip(game_dates, game_dates[1:], strict=False)
@@ -936,70 +1571,319 @@ def do_test_run_for_seeds(
     output_dir_path,
     window_constraints,
     scarce_location_names,
+    config_hash,
+    local_search_seconds=0,
+    ejection_chain_depth=0,
+    backup_order=DEFAULT_BACKUP_ORDER,
+    home_balancing=DEFAULT_HOME_BALANCING,
+    cache_dir_path=None,
+    early_abort=None,
+    seed_ranking=None,
+    backup_sub_seeds=0,
 ):
+    """
+    Does a test run for every seed in the range and writes the results to `seeds.txt`. Results are also recorded in
+    `seeds.sqlite3`, so seeds that already have a result for the same input files and config are not run again.
+
+    If early abort thresholds are given, seeds whose partial schedule is already too poor are abandoned after the
+    preferred selection phase. Aborted seeds are run again on a rerun, since the thresholds may have changed.
+
+    If a seed ranking is given, the schedules of the best seeds are kept in memory during the search, and the output
+    files for each winner are written to a `seed_<seed>` directory at the end.
+
+    If a number of backup sub-seeds is given, each seed is run from a checkpoint at the end of the preferred selection
+    phase once per sub-seed (see `do_test_runs_from_checkpoint`), and each sub-seed gets its own result.
+    """
+
     seed_file_path = output_dir_path + "/seeds.txt"
+    seed_store = SeedStore(output_dir_path + "/seeds.sqlite3")
+    input_hash = fingerprint.hash_input_files(input_dir_path)
+
+    early_abort = early_abort or {}
+    best_num_preferred_phase_misses = None
 
-    header = (
-        "seed - "
-        "num weekday games - "
-        "bad asymmetric home percentages - "
-        "smallest block size, num smallest blocks - "
-        "most consec pairs, teams with most consec - "
-        "longest gaps between games"
-    )
     with open(seed_file_path, "w") as f:
-        f.write(header + "\n")
+        f.write(SEED_FILE_HEADER + "\n")
+
+    # Without sub-seeds, each seed has a single run, which has no sub-seed.
+    sub_seeds: list[int | None] = list(range(backup_sub_seeds)) if backup_sub_seeds else [None]
+    num_runs = (end_seed - start_seed + 1) * len(sub_seeds)
+    num_runs_done = 0
 
     for i in range(start_seed, end_seed + 1):
-        generate_schedule(
-            input_dir_path=input_dir_path,
-            output_dir_path=output_dir_path,
+        stored_results = [seed_store.get_result(input_hash, config_hash, i, sub_seed) for sub_seed in sub_seeds]
+        skipped_results = [r for r in stored_results if r is not None and not r.aborted]
+        sub_seeds_to_run = [s for s, r in zip(sub_seeds, stored_results, strict=True) if r not in skipped_results]
+
+        new_results = do_test_runs_for_seed(
             random_seed=i,
+            sub_seeds=sub_seeds_to_run,
+            input_dir_path=input_dir_path,
             window_constraints=window_constraints,
             scarce_location_names=scarce_location_names,
-            is_test_run_for_seed=True,
+            local_search_seconds=local_search_seconds,
+            ejection_chain_depth=ejection_chain_depth,
+            backup_order=backup_order,
+            home_balancing=home_balancing,
+            config_hash=config_hash,
+            cache_dir_path=cache_dir_path,
+            max_non_preferred_matchups=get_max_non_preferred_matchups(early_abort, best_num_preferred_phase_misses),
+            max_isolated_games=early_abort.get("max_isolated_games"),
         )
 
+        # A new result's schedule is still loaded when it comes out of `new_results`.
+        for result, was_skipped in chain(((r, True) for r in skipped_results), ((r, False) for r in new_results)):
+            if not was_skipped:
+                seed_store.record_result(input_hash, config_hash, result)
 
-def log_seed_info_from_test_run(output_dir_path: str, random_seed: int):
-    seed_file_path = output_dir_path + "/seeds.txt"
+            num_runs_done += 1
+            reporter.emit(
+                SeedFinished(result.get_label(), get_seed_outcome(result, was_skipped), num_runs_done, num_runs)
+            )
 
-    with open(seed_file_path, "a") as f:
-        num_weekday_games_to_num_teams = get_num_weekday_games_to_num_teams()
-        total_weekday_games = sum(g * t for g, t in num_weekday_games_to_num_teams.items())
+            if not result.succeeded:
+                continue
 
-        asymmetric_home_fractions = []
-        for team in teams.values():
-            asymmetric_matchups = [
-                matchup for matchup in team.matchups if matchup.team_a.home_location != matchup.team_b.home_location
-            ]
-            home_fraction = sum(
-                unwrap(matchup.selected_gameslot).location == team.home_location for matchup in asymmetric_matchups
-            ) / len(asymmetric_matchups)
-            asymmetric_home_fractions.append(home_fraction)
-
-        # List of all asymmetric home percentages less than 50% starting with the lowest
-        bad_asymmetric_home_percentages = [
-            f"{fraction:.1%}"[:-1] for fraction in sorted(asymmetric_home_fractions) if fraction < 0.5
+            if seed_ranking is not None:
+                # The schedule for a skipped seed isn't in memory, so it has to be regenerated if it wins.
+                schedule = None if was_skipped else schedule_cache.capture_schedule(matchups, gameslots)
+                seed_ranking.consider(result, schedule)
+
+            best_num_preferred_phase_misses = get_best_num_preferred_phase_misses(
+                best_num_preferred_phase_misses, result
+            )
+            with open(seed_file_path, "a") as f:
+                f.write(result.to_seed_file_line() + "\n")
+
+    seed_store.close()
+
+    if seed_ranking is not None:
+        write_winning_seeds(
+            seed_ranking,
+            input_dir_path,
+            output_dir_path,
+            window_constraints,
+            scarce_location_names,
+            config_hash,
+            local_search_seconds,
+            ejection_chain_depth,
+            backup_order,
+            home_balancing,
+            cache_dir_path,
+        )
+
+
+def do_test_runs_for_seed(
+    random_seed: int,
+    sub_seeds: list[int | None],
+    input_dir_path: str,
+    window_constraints: list[WindowConstraint],
+    scarce_location_names: ScarceLocationNames,
+    local_search_seconds: float = 0,
+    ejection_chain_depth: int = 0,
+    backup_order: str = DEFAULT_BACKUP_ORDER,
+    home_balancing: str = DEFAULT_HOME_BALANCING,
+    config_hash: str = "",
+    cache_dir_path: str | None = None,
+    max_non_preferred_matchups: int | None = None,
+    max_isolated_games: int | None = None,
+    ingestion_result: ingestion.IngestionResult | None = None,
+) -> Iterable[SeedResult]:
+    """
+    Does a test run for each of the given sub-seeds of the seed, where a sub-seed of `None` stands for the plain seed.
+    The results may be produced lazily; each one comes out while its schedule is still loaded.
+    """
+
+    if not sub_seeds:
+        return []
+
+    if sub_seeds == [None]:
+        return [
+            unwrap(
+                generate_schedule(
+                    input_dir_path=input_dir_path,
+                    output_dir_path="",
+                    random_seed=random_seed,
+                    window_constraints=window_constraints,
+                    scarce_location_names=scarce_location_names,
+                    is_test_run_for_seed=True,
+                    local_search_seconds=local_search_seconds,
+                    ejection_chain_depth=ejection_chain_depth,
+                    backup_order=backup_order,
+                    home_balancing=home_balancing,
+                    config_hash=config_hash,
+                    cache_dir_path=cache_dir_path,
+                    max_non_preferred_matchups=max_non_preferred_matchups,
+                    max_isolated_games=max_isolated_games,
+                    ingestion_result=ingestion_result,
+                )
+            )
         ]
-        bad_asymmetric_home_percentages_str = ",".join(bad_asymmetric_home_percentages)
 
-        block_sizes_to_counts = get_block_sizes_to_counts()
-        smallest_block_size_to_count = min(block_sizes_to_counts.items())
-        smallest_block_size, num_smallest_blocks = smallest_block_size_to_count
+    return do_test_runs_from_checkpoint(
+        input_dir_path=input_dir_path,
+        random_seed=random_seed,
+        sub_seeds=[unwrap(s) for s in sub_seeds],
+        window_constraints=window_constraints,
+        scarce_location_names=scarce_location_names,
+        local_search_seconds=local_search_seconds,
+        ejection_chain_depth=ejection_chain_depth,
+        backup_order=backup_order,
+        home_balancing=home_balancing,
+        config_hash=config_hash,
+        cache_dir_path=cache_dir_path,
+        max_non_preferred_matchups=max_non_preferred_matchups,
+        max_isolated_games=max_isolated_games,
+        ingestion_result=ingestion_result,
+    )
+
+
+def get_seed_outcome(result: SeedResult, was_skipped: bool) -> str:
+    if was_skipped:
+        return "was skipped because it already has a result"
+    if result.aborted:
+        return "was aborted early"
+    return "succeeded" if result.succeeded else "failed"
+
+
+def get_max_non_preferred_matchups(early_abort: dict, best_num_preferred_phase_misses: int | None) -> int | None:
+    """
+    Returns the most matchups that may miss a preferred gameslot in the preferred selection phase before a seed is
+    aborted, given the early abort thresholds and the fewest misses in that phase of any finished seed so far.
+    """
+
+    max_non_preferred_matchups = early_abort.get("max_non_preferred_matchups")
+    if best_num_preferred_phase_misses is not None and "max_non_preferred_above_best" in early_abort:
+        max_above_best = best_num_preferred_phase_misses + early_abort["max_non_preferred_above_best"]
+        if max_non_preferred_matchups is None or max_above_best < max_non_preferred_matchups:
+            max_non_preferred_matchups = max_above_best
+
+    return max_non_preferred_matchups
+
+
+def get_best_num_preferred_phase_misses(best: int | None, result: SeedResult) -> int | None:
+    """
+    Returns the fewest preferred phase misses of any finished seed, counting the given one. Seeds restored from the
+    cache didn't run the preferred phase, so they don't count.
+    """
+
+    if result.num_preferred_phase_misses is None:
+        return best
+    if best is None:
+        return result.num_preferred_phase_misses
+    return min(best, result.num_preferred_phase_misses)
+
+
+def write_winning_seeds(
+    seed_ranking: SeedRanking,
+    input_dir_path: str,
+    output_dir_path: str,
+    window_constraints: list[WindowConstraint],
+    scarce_location_names: ScarceLocationNames,
+    config_hash: str,
+    local_search_seconds: float,
+    ejection_chain_depth: int,
+    backup_order: str,
+    home_balancing: str,
+    cache_dir_path: str | None,
+):
+    """
+    Prints the winners of a seed ranking and writes the output files for each of them. A winner whose result was
+    recorded by an earlier search has no schedule in memory, so it is searched for again. That finds the same schedule
+    unless it depends on timing, like a time-bounded local search, so its metrics are compared with the ones it was
+    ranked on, and any difference is reported.
+    """
+
+    winners = seed_ranking.get_winners()
 
-        num_consec_pairs_to_num_teams = get_num_consecutive_pairs_to_num_teams()
-        largest_consec_pairs_to_num_teams = max(num_consec_pairs_to_num_teams.items())
-        most_consec_pairs, teams_with_most_consec = largest_consec_pairs_to_num_teams
+    table: list[list[object]] = [["seed", "score", *seed_ranking.weights]]
+    table.append(["-" * len(str(heading)) for heading in table[0]])
+    for result, _ in winners:
+        table.append(
+            [result.get_label(), seed_ranking.get_score(result), *(getattr(result, m) for m in seed_ranking.weights)]
+        )
+    winners_table = io.StringIO()
+    utils.pretty_print_table(table, winners_table)
+    reporter.message("\nWINNING SEEDS\n\n" + winners_table.getvalue())
 
-        longest_gaps_str = ",".join(str(gap) for _, gap in get_largest_team_gap_pairs())
+    for result, schedule in winners:
+        seed_output_dir_path = f"{output_dir_path}/seed_{result.get_label()}"
+        os.makedirs(seed_output_dir_path, exist_ok=True)
 
-        file_line = (
-            f"{random_seed}"
-            + f" - {total_weekday_games}"
-            + f" - {bad_asymmetric_home_percentages_str}"
-            + f" - {smallest_block_size} {num_smallest_blocks}"
-            + f" - {most_consec_pairs} {teams_with_most_consec}"
-            + f" - {longest_gaps_str}"
+        reporter.message(f"Writing the schedule for seed {result.get_label()} to {seed_output_dir_path}")
+        new_result = generate_schedule(
+            input_dir_path=input_dir_path,
+            output_dir_path=seed_output_dir_path,
+            random_seed=result.seed,
+            window_constraints=window_constraints,
+            scarce_location_names=scarce_location_names,
+            is_test_run_for_seed=True,
+            local_search_seconds=local_search_seconds,
+            ejection_chain_depth=ejection_chain_depth,
+            backup_order=backup_order,
+            home_balancing=home_balancing,
+            config_hash=config_hash,
+            cache_dir_path=cache_dir_path,
+            schedule_to_restore=schedule,
+            sub_seed=result.sub_seed,
         )
-        f.write(file_line + "\n")
+
+        if new_result is None or not new_result.succeeded:
+            reporter.message(
+                f"Seed {result.get_label()} found no schedule this time, so nothing was written for it.", LogLevel.QUIET
+            )
+            continue
+
+        write_output_files(seed_output_dir_path)
+
+        differences = [
+            f"{metric} is {getattr(new_result, metric)} rather than {getattr(result, metric)}"
+            for metric in seed_ranking.weights
+            if getattr(new_result, metric) != getattr(result, metric)
+        ]
+        if differences:
+            reporter.message(
+                f"Warning: the schedule written for seed {result.get_label()} differs from the one it was ranked on: "
+                + ", ".join(differences)
+                + ". Set `cache_dir` to keep the schedules of a seed search.",
+                LogLevel.QUIET,
+            )
+
+
+def get_seed_result(
+    random_seed: int, sub_seed: int | None = None, num_preferred_phase_misses: int | None = None
+) -> SeedResult:
+    """
+    Summarizes the metrics of the current (valid) schedule. The preferred phase misses are only known if the schedule
+    was searched for rather than restored.
+    """
+
+    # All asymmetric home fractions less than 50%, starting with the lowest
+    asymmetric_home_fractions = schedule_metrics.get_asymmetric_home_fractions()
+    bad_asymmetric_home_fractions = [fraction for fraction in asymmetric_home_fractions if fraction < 0.5]
+
+    block_sizes_to_counts = get_block_sizes_to_counts()
+    smallest_block_size, num_smallest_blocks = min(block_sizes_to_counts.items())
+
+    num_consec_pairs_to_num_teams = get_num_consecutive_pairs_to_num_teams()
+    most_consec_pairs, teams_with_most_consec = max(num_consec_pairs_to_num_teams.items())
+
+    longest_gaps = schedule_metrics.get_largest_gaps(5)
+
+    return SeedResult(
+        seed=random_seed,
+        succeeded=True,
+        total_weekday_games=schedule_metrics.total_weekday_games,
+        num_bad_asymmetric_home_teams=len(bad_asymmetric_home_fractions),
+        lowest_asymmetric_home_percentage=round(100 * asymmetric_home_fractions[0], 1),
+        bad_asymmetric_home_percentages=",".join(f"{fraction:.1%}"[:-1] for fraction in bad_asymmetric_home_fractions),
+        smallest_block_size=smallest_block_size,
+        num_smallest_blocks=num_smallest_blocks,
+        most_consecutive_pairs=most_consec_pairs,
+        teams_with_most_consecutive_pairs=teams_with_most_consec,
+        longest_gap=longest_gaps[0],
+        longest_gaps=",".join(str(gap) for gap in longest_gaps),
+        num_non_preferred_matchups=schedule_metrics.get_num_non_preferred_matchups(),
+        num_preferred_phase_misses=num_preferred_phase_misses,
+        sub_seed=sub_seed,
+    )
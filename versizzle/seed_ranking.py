@@ -0,0 +1,76 @@
+from versizzle.schedule_cache import CachedSchedule
+from versizzle.seed_store import RANKABLE_METRICS, SeedResult
+
+RANKING_METHODS = ["weighted", "pareto"]
+
+
+class SeedRanking:
+    """
+    Keeps the best seeds of a seed search, along with their schedules, so the winners can be written out at the end of
+    the search without running them again.
+
+    With the "weighted" method, each seed gets a score that sums its metrics multiplied by their weights (lower is
+    better), and the `top` seeds with the lowest scores win, with ties going to the lower seed. With the "pareto"
+    method, the winners are all the seeds that no other seed beats on every weighted metric at once; the weights only
+    select which metrics are compared, and `top` is ignored.
+    """
+
+    def __init__(self, method: str, weights: dict[str, float], top: int):
+        if method not in RANKING_METHODS:
+            raise Exception(f"Unknown seed ranking method '{method}'. Choose from: {', '.join(RANKING_METHODS)}")
+
+        for metric in weights:
+            if metric not in RANKABLE_METRICS:
+                raise Exception(f"Can't rank seeds by '{metric}'. Choose from: {', '.join(RANKABLE_METRICS)}")
+
+        if top < 1:
+            raise Exception("The seed ranking must keep at least one seed")
+
+        self.method = method
+        self.weights = weights
+        self.top = top
+
+        # Each entry is a result along with its schedule, which is `None` if the schedule isn't in memory (because the
+        # seed was skipped in favor of a recorded result).
+        self.entries: list[tuple[SeedResult, CachedSchedule | None]] = []
+
+    def consider(self, result: SeedResult, schedule: CachedSchedule | None):
+        """Takes the result of a successful seed and keeps it if it is among the best so far."""
+
+        if self.method == "weighted":
+            self.entries.append((result, schedule))
+            self.entries.sort(key=lambda entry: (self.get_score(entry[0]), entry[0].seed))
+            del self.entries[self.top :]
+        elif not any(self.dominates(r, result) for r, _ in self.entries):
+            self.entries = [(r, s) for r, s in self.entries if not self.dominates(result, r)]
+            self.entries.append((result, schedule))
+            self.entries.sort(key=lambda entry: entry[0].seed)
+
+    def get_winners(self) -> list[tuple[SeedResult, CachedSchedule | None]]:
+        return self.entries
+
+    def get_score(self, result: SeedResult) -> float:
+        """Returns the weighted score of the result. Metrics where larger values are better count negatively."""
+
+        score = 0.0
+        for metric, weight in self.weights.items():
+            value = getattr(result, metric)
+            score += weight * value if RANKABLE_METRICS[metric] else -weight * value
+
+        return score
+
+    def dominates(self, a: SeedResult, b: SeedResult) -> bool:
+        """Returns whether result `a` is at least as good as `b` on every weighted metric and better on at least one."""
+
+        strictly_better = False
+        for metric in self.weights:
+            a_value, b_value = getattr(a, metric), getattr(b, metric)
+            if not RANKABLE_METRICS[metric]:
+                a_value, b_value = -a_value, -b_value
+
+            if a_value > b_value:
+                return False
+            if a_value < b_value:
+                strictly_better = True
+
+        return strictly_better
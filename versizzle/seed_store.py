@@ -0,0 +1,179 @@
+import sqlite3
+from dataclasses import astuple, dataclass, fields
+
+# Bump this whenever the schema changes. Stores with an older schema are rebuilt from scratch, which only costs a rerun.
+SCHEMA_VERSION = 4
+
+# Maps each metric that seeds can be ranked by to whether smaller values are better.
+RANKABLE_METRICS = {
+    "total_weekday_games": True,
+    "num_bad_asymmetric_home_teams": True,
+    "lowest_asymmetric_home_percentage": False,
+    "smallest_block_size": False,
+    "num_smallest_blocks": True,
+    "most_consecutive_pairs": True,
+    "teams_with_most_consecutive_pairs": True,
+    "longest_gap": True,
+    "num_non_preferred_matchups": True,
+}
+
+SEED_FILE_HEADER = (
+    "seed - "
+    "num weekday games - "
+    "bad asymmetric home percentages - "
+    "smallest block size, num smallest blocks - "
+    "most consec pairs, teams with most consec - "
+    "longest gaps between games"
+)
+
+
+@dataclass
+class SeedResult:
+    """
+    The outcome of a test run for one seed. Metrics are only present if a valid schedule was found. A seed is aborted if
+    its partial schedule was already too poor to be worth finishing. Seeds that were run from a checkpoint have a
+    sub-seed.
+    """
+
+    seed: int
+    succeeded: bool
+    total_weekday_games: int | None = None
+    num_bad_asymmetric_home_teams: int | None = None
+    lowest_asymmetric_home_percentage: float | None = None
+    bad_asymmetric_home_percentages: str | None = None
+    smallest_block_size: int | None = None
+    num_smallest_blocks: int | None = None
+    most_consecutive_pairs: int | None = None
+    teams_with_most_consecutive_pairs: int | None = None
+    longest_gap: int | None = None
+    longest_gaps: str | None = None
+    num_non_preferred_matchups: int | None = None
+    # The matchups that missed a preferred gameslot in the preferred selection phase, before the backup selection phase
+    # and post-processing. Early aborts compare seeds by this count, since it is all an aborted seed has.
+    num_preferred_phase_misses: int | None = None
+    aborted: bool = False
+    sub_seed: int | None = None
+
+    def get_label(self) -> str:
+        """Returns the seed, followed by the sub-seed if there is one (e.g. "12.3")."""
+
+        return str(self.seed) if self.sub_seed is None else f"{self.seed}.{self.sub_seed}"
+
+    def to_seed_file_line(self) -> str:
+        return (
+            f"{self.get_label()}"
+            + f" - {self.total_weekday_games}"
+            + f" - {self.bad_asymmetric_home_percentages}"
+            + f" - {self.smallest_block_size} {self.num_smallest_blocks}"
+            + f" - {self.most_consecutive_pairs} {self.teams_with_most_consecutive_pairs}"
+            + f" - {self.longest_gaps}"
+        )
+
+
+class SeedStore:
+    """
+    A SQLite database of seed search results. Results are keyed by a hash of the input files, a hash of the config, the
+    seed and the sub-seed, so a rerun of the same search can skip every seed that already has a result.
+    """
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.connection.execute("DROP TABLE IF EXISTS seed_results")
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        result_columns = ", ".join(f.name for f in fields(SeedResult))
+        self.connection.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS seed_results (
+                input_hash TEXT NOT NULL,
+                config_hash TEXT NOT NULL,
+                {result_columns}
+            )
+            """
+        )
+        # Not a primary key, since the sub-seed is NULL for seeds that weren't run from a checkpoint.
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS seed_results_key ON seed_results (input_hash, config_hash, seed, sub_seed)"
+        )
+        for metric in RANKABLE_METRICS:
+            self.connection.execute(
+                f"CREATE INDEX IF NOT EXISTS seed_results_{metric} ON seed_results (input_hash, config_hash, {metric})"
+            )
+        self.connection.commit()
+
+    def get_result(
+        self, input_hash: str, config_hash: str, seed: int, sub_seed: int | None = None
+    ) -> SeedResult | None:
+        row = self.connection.execute(
+            f"SELECT {self._result_columns()} FROM seed_results "
+            + "WHERE input_hash = ? AND config_hash = ? AND seed = ? AND sub_seed IS ?",
+            (input_hash, config_hash, seed, sub_seed),
+        ).fetchone()
+
+        return None if row is None else self._result_from_row(row)
+
+    def record_result(self, input_hash: str, config_hash: str, result: SeedResult):
+        """Records the result, replacing any earlier result for the same seed and sub-seed."""
+
+        self.connection.execute(
+            "DELETE FROM seed_results WHERE input_hash = ? AND config_hash = ? AND seed = ? AND sub_seed IS ?",
+            (input_hash, config_hash, result.seed, result.sub_seed),
+        )
+        placeholders = ", ".join("?" for _ in range(len(fields(SeedResult)) + 2))
+        self.connection.execute(
+            f"INSERT INTO seed_results (input_hash, config_hash, {self._result_columns()}) "
+            + f"VALUES ({placeholders})",
+            (input_hash, config_hash, *astuple(result)),
+        )
+        self.connection.commit()
+
+    def rank_results(
+        self,
+        metrics: list[str],
+        limit: int,
+        input_hash: str | None = None,
+        config_hash: str | None = None,
+    ) -> list[SeedResult]:
+        """
+        Returns the best successful results, ordered by the given metrics in turn (each in its better direction). If an
+        input hash or config hash is given, only results with that hash are considered.
+        """
+
+        for metric in metrics:
+            if metric not in RANKABLE_METRICS:
+                raise Exception(f"Can't rank seeds by '{metric}'. Choose from: {', '.join(RANKABLE_METRICS)}")
+
+        conditions = ["succeeded"]
+        parameters: list[object] = []
+        if input_hash is not None:
+            conditions.append("input_hash = ?")
+            parameters.append(input_hash)
+        if config_hash is not None:
+            conditions.append("config_hash = ?")
+            parameters.append(config_hash)
+
+        ordering = "".join(f"{m} {'ASC' if RANKABLE_METRICS[m] else 'DESC'}, " for m in metrics) + "seed, sub_seed"
+
+        rows = self.connection.execute(
+            f"SELECT {self._result_columns()} FROM seed_results WHERE {' AND '.join(conditions)} "
+            + f"ORDER BY {ordering} LIMIT ?",
+            (*parameters, limit),
+        ).fetchall()
+
+        return [self._result_from_row(row) for row in rows]
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def _result_from_row(row: tuple) -> SeedResult:
+        result = SeedResult(*row)
+        result.succeeded = bool(result.succeeded)
+        result.aborted = bool(result.aborted)
+        return result
+
+    @staticmethod
+    def _result_columns() -> str:
+        return ", ".join(f.name for f in fields(SeedResult))
@@ -0,0 +1,399 @@
+"""
+Generates the input files for a made-up league of any size, to test how the scheduler scales. Each division plays a
+number of round robins, and each location hosts games on Saturdays and on two weekdays (more if it needs them), with
+scarce locations offering fewer gameslots than the others. Blackouts and preassignments are sprinkled in at random.
+Example:
+
+    uv run -m versizzle.synthetic_league in/synthetic --divisions 40 --teams-per-division 12 --locations 60
+
+The generated files are valid: every preassignment is in a gameslot of its home team's location (or another free one),
+avoids its teams' blackouts, and keeps its teams' preassigned games at least 4 days apart, so it satisfies the window
+constraints in the `config.yml` that ships with the repo. With the default settings, the scheduler finds a schedule for
+the generated league under those window constraints, so a benchmark on it measures the search rather than its failure.
+The scarce locations are printed, ready for `config.yml`.
+"""
+
+import argparse
+import csv
+import math
+import os
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from versizzle import utils
+
+# The days of the week each location hosts games on. Saturday comes first, and each location's weekdays start from a
+# different day, so that games spread over the week.
+SATURDAY = 5
+WEEKDAYS = [0, 1, 2, 3, 4]
+
+# Each location's gameslots in a week are spread evenly over this many of its days (Saturday and its first weekdays).
+# Further weekdays are only opened once those days are full.
+GAME_DAYS_PER_WEEK = 3
+
+# The gameslots of a game day are consecutive hours, starting at these times.
+FIRST_SATURDAY_HOUR = 9
+FIRST_WEEKDAY_HOUR = 17
+MAX_GAMESLOTS_ON_SATURDAY = 8
+MAX_GAMESLOTS_ON_WEEKDAY = 4
+
+# A team's preassigned games are at least this many days apart.
+MIN_DAYS_BETWEEN_PREASSIGNED_GAMES = 4
+
+# The number of gameslots away from home that a preassignment tries when no gameslot at home fits it.
+MAX_OTHER_GAMESLOTS_TO_TRY = 200
+
+
+@dataclass
+class SyntheticTeam:
+    division: str
+    name: str
+    home_location_name: str
+
+
+@dataclass
+class SyntheticGameslot:
+    date: date
+    time: time
+    location_name: str
+
+
+@dataclass
+class SyntheticLeague:
+    teams: list[SyntheticTeam]
+    matchups: list[tuple[SyntheticTeam, SyntheticTeam]]
+    gameslots: list[SyntheticGameslot]
+    blackouts: list[tuple[date, SyntheticTeam]]
+    preassignments: list[tuple[SyntheticGameslot, SyntheticTeam, SyntheticTeam]]
+    scarce_location_names: list[str]
+
+
+def generate_league(
+    num_divisions: int,
+    teams_per_division: int,
+    round_robins: int,
+    num_locations: int,
+    scarce_fraction: float,
+    scarcity_ratio: float,
+    start_date: date,
+    num_weeks: int,
+    gameslots_per_matchup: float,
+    blackout_density: float,
+    preassignment_fraction: float,
+    rng: random.Random,
+) -> SyntheticLeague:
+    """
+    Generates a league. A `scarce_fraction` of the locations are scarce, and offer `scarcity_ratio` times as many
+    gameslots as the others. There are `gameslots_per_matchup` gameslots per matchup overall. Each team is blacked out
+    on a `blackout_density` fraction of the game dates, and a `preassignment_fraction` of the matchups are preassigned.
+    """
+
+    location_names = [f"Gym {i + 1}" for i in range(num_locations)]
+    scarce_location_names = location_names[: round(num_locations * scarce_fraction)]
+
+    teams = get_teams(num_divisions, teams_per_division, location_names)
+    matchups = get_matchups(teams, round_robins)
+
+    gameslots = get_gameslots(
+        location_names,
+        {name: scarcity_ratio if name in scarce_location_names else 1.0 for name in location_names},
+        math.ceil(len(matchups) * gameslots_per_matchup),
+        start_date,
+        num_weeks,
+    )
+
+    game_dates = sorted({g.date for g in gameslots})
+    blackouts = [(d, team) for team in teams for d in game_dates if rng.random() < blackout_density]
+
+    preassignments = get_preassignments(
+        matchups, gameslots, blackouts, round(len(matchups) * preassignment_fraction), rng
+    )
+
+    return SyntheticLeague(teams, matchups, gameslots, blackouts, preassignments, scarce_location_names)
+
+
+def get_teams(num_divisions: int, teams_per_division: int, location_names: list[str]) -> list[SyntheticTeam]:
+    """
+    Gives each division one team per location, in turn, so that every location is home to teams in many divisions, like
+    a parish. When a division has more teams than there are locations, the teams at the same location are told apart by
+    a letter.
+    """
+
+    teams = []
+    num_teams_per_location = math.ceil(teams_per_division / len(location_names))
+
+    for d in range(num_divisions):
+        division = f"D{d + 1}"
+        # Each division starts from a different location, so that the first locations aren't home to every division.
+        for i in range(teams_per_division):
+            location_index = (d * teams_per_division + i) % len(location_names)
+            location_name = location_names[location_index]
+            letter = f" {chr(ord('A') + i // len(location_names))}" if num_teams_per_location > 1 else ""
+            teams.append(SyntheticTeam(division, f"{location_name}{letter}", location_name))
+
+    return teams
+
+
+def get_matchups(teams: list[SyntheticTeam], round_robins: int) -> list[tuple[SyntheticTeam, SyntheticTeam]]:
+    teams_by_division: dict[str, list[SyntheticTeam]] = defaultdict(list)
+    for team in teams:
+        teams_by_division[team.division].append(team)
+
+    matchups = []
+    for division_teams in teams_by_division.values():
+        for r in range(round_robins):
+            for i, team in enumerate(division_teams):
+                for other_team in division_teams[i + 1 :]:
+                    # The teams trade places in every other round robin, like home and away.
+                    matchups.append((team, other_team) if r % 2 == 0 else (other_team, team))
+
+    return matchups
+
+
+def get_gameslots(
+    location_names: list[str],
+    weights_by_location_name: dict[str, float],
+    num_gameslots: int,
+    start_date: date,
+    num_weeks: int,
+) -> list[SyntheticGameslot]:
+    """
+    Shares out about `num_gameslots` gameslots among the locations in proportion to their weights, then spreads each
+    location's share evenly over the weeks. Each week, a location's gameslots are dealt out evenly over its Saturday and
+    first weekdays (see `GAME_DAYS_PER_WEEK`), so that the games of a week are spread over several dates rather than
+    piled onto one, which would leave a team at most one game a week. Gameslots that don't fit in a week are dropped.
+    """
+
+    gameslots = []
+    total_weight = sum(weights_by_location_name.values())
+    num_dropped_gameslots = 0
+
+    for i, location_name in enumerate(location_names):
+        gameslots_per_week = num_gameslots * weights_by_location_name[location_name] / total_weight / num_weeks
+        weekdays = WEEKDAYS[i % len(WEEKDAYS) :] + WEEKDAYS[: i % len(WEEKDAYS)]
+
+        for week in range(num_weeks):
+            # Rounding the running total, rather than each week, keeps the location's total close to its share.
+            num_gameslots_in_week = round((week + 1) * gameslots_per_week) - round(week * gameslots_per_week)
+            week_start_date = start_date + timedelta(weeks=week)
+
+            num_gameslots_by_weekday = spread_gameslots_over_week(num_gameslots_in_week, [SATURDAY, *weekdays])
+            for weekday, num_gameslots_on_date in num_gameslots_by_weekday.items():
+                first_hour = FIRST_SATURDAY_HOUR if weekday == SATURDAY else FIRST_WEEKDAY_HOUR
+                game_date = week_start_date + timedelta(days=(weekday - week_start_date.weekday()) % 7)
+                for hour in range(first_hour, first_hour + num_gameslots_on_date):
+                    gameslots.append(SyntheticGameslot(game_date, time(hour), location_name))
+
+            num_dropped_gameslots += num_gameslots_in_week - sum(num_gameslots_by_weekday.values())
+
+    if num_dropped_gameslots > 0:
+        print(
+            f"The locations have no room for {num_dropped_gameslots} of the gameslots in {num_weeks} weeks. Consider "
+            "more locations or weeks."
+        )
+
+    return gameslots
+
+
+def spread_gameslots_over_week(num_gameslots: int, weekdays: list[int]) -> dict[int, int]:
+    """
+    Deals out a location's gameslots for one week, one at a time, each to the game day that has the fewest so far (the
+    earliest in `weekdays` on a tie). The first `GAME_DAYS_PER_WEEK` days are used, and the next ones only once those
+    are full. Returns the number of gameslots on each day that gets any; gameslots that fit on no day are left out.
+    """
+
+    num_gameslots_by_weekday: dict[int, int] = {}
+    num_days_in_use = min(GAME_DAYS_PER_WEEK, len(weekdays))
+
+    for _ in range(num_gameslots):
+        open_days = [d for d in weekdays[:num_days_in_use] if num_gameslots_by_weekday.get(d, 0) < get_max_gameslots(d)]
+        while not open_days and num_days_in_use < len(weekdays):
+            num_days_in_use += 1
+            open_days = [weekdays[num_days_in_use - 1]]
+        if not open_days:
+            break
+
+        weekday = min(open_days, key=lambda d: num_gameslots_by_weekday.get(d, 0))
+        num_gameslots_by_weekday[weekday] = num_gameslots_by_weekday.get(weekday, 0) + 1
+
+    return num_gameslots_by_weekday
+
+
+def get_max_gameslots(weekday: int) -> int:
+    return MAX_GAMESLOTS_ON_SATURDAY if weekday == SATURDAY else MAX_GAMESLOTS_ON_WEEKDAY
+
+
+def get_preassignments(
+    matchups: list[tuple[SyntheticTeam, SyntheticTeam]],
+    gameslots: list[SyntheticGameslot],
+    blackouts: list[tuple[date, SyntheticTeam]],
+    num_preassignments: int,
+    rng: random.Random,
+) -> list[tuple[SyntheticGameslot, SyntheticTeam, SyntheticTeam]]:
+    """
+    Preassigns randomly chosen matchups, each to a random free gameslot at the home location of its first team if there
+    is a suitable one, or else anywhere. Matchups that fit nowhere are skipped, so there may be fewer preassignments
+    than asked for.
+    """
+
+    blacked_out_dates_by_team: dict[tuple[str, str], set[date]] = defaultdict(set)
+    for d, team in blackouts:
+        blacked_out_dates_by_team[team.division, team.name].add(d)
+
+    gameslots_by_location_name: dict[str, list[SyntheticGameslot]] = defaultdict(list)
+    for g in gameslots:
+        gameslots_by_location_name[g.location_name].append(g)
+
+    taken_gameslot_ids: set[int] = set()
+    preassigned_dates_by_team: dict[tuple[str, str], list[date]] = defaultdict(list)
+    preassignments = []
+
+    def fits(gameslot: SyntheticGameslot, team: SyntheticTeam) -> bool:
+        key = team.division, team.name
+        return gameslot.date not in blacked_out_dates_by_team[key] and all(
+            abs((gameslot.date - d).days) >= MIN_DAYS_BETWEEN_PREASSIGNED_GAMES for d in preassigned_dates_by_team[key]
+        )
+
+    for home_team, away_team in rng.sample(matchups, len(matchups)):
+        if len(preassignments) == num_preassignments:
+            break
+
+        # Checking every gameslot of a big league for every preassignment would be slow, so a matchup that doesn't fit
+        # at its home location only tries a sample of the others.
+        home_gameslots = gameslots_by_location_name[home_team.home_location_name]
+        other_gameslots = rng.sample(gameslots, min(len(gameslots), MAX_OTHER_GAMESLOTS_TO_TRY))
+
+        for candidates in home_gameslots, other_gameslots:
+            suitable_gameslots = [
+                g for g in candidates if id(g) not in taken_gameslot_ids and fits(g, home_team) and fits(g, away_team)
+            ]
+            if suitable_gameslots:
+                gameslot = rng.choice(suitable_gameslots)
+                break
+        else:
+            continue
+
+        taken_gameslot_ids.add(id(gameslot))
+        for team in home_team, away_team:
+            preassigned_dates_by_team[team.division, team.name].append(gameslot.date)
+        preassignments.append((gameslot, home_team, away_team))
+
+    return preassignments
+
+
+def write_league(league: SyntheticLeague, output_dir_path: str):
+    os.makedirs(output_dir_path, exist_ok=True)
+
+    def write_file(file_name: str, header: list[str], rows: list[list[str]]):
+        with open(os.path.join(output_dir_path, file_name), "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    write_file(
+        "teams.csv",
+        ["division", "team", "home location"],
+        [[t.division, t.name, t.home_location_name] for t in league.teams],
+    )
+    write_file(
+        "matchups.csv",
+        ["division", "team a", "team b"],
+        [[a.division, a.name, b.name] for a, b in league.matchups],
+    )
+    write_file(
+        "gameslots.csv",
+        ["date", "time", "location"],
+        [[utils.format_input_date(g.date), utils.format_input_time(g.time), g.location_name] for g in league.gameslots],
+    )
+    write_file(
+        "blackouts.csv",
+        ["date", "start time", "end time", "division", "team"],
+        [[utils.format_input_date(d), "-", "-", t.division, t.name] for d, t in league.blackouts],
+    )
+    write_file(
+        "preassignments.csv",
+        ["date", "time", "location", "division", "team a", "team b"],
+        [
+            [
+                utils.format_input_date(g.date),
+                utils.format_input_time(g.time),
+                g.location_name,
+                a.division,
+                a.name,
+                b.name,
+            ]
+            for g, a, b in sorted(league.preassignments, key=lambda p: (p[0].date, p[0].time, p[0].location_name))
+        ],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="versizzle.synthetic_league", description="Generate a made-up league.")
+    parser.add_argument("output_dir", help="directory to write the input files to")
+    parser.add_argument("--divisions", type=int, default=6, help="number of divisions (default: 6)")
+    parser.add_argument("--teams-per-division", type=int, default=6, help="number of teams per division (default: 6)")
+    parser.add_argument("--round-robins", type=int, default=1, help="times each pair of teams meets (default: 1)")
+    parser.add_argument("--locations", type=int, default=8, help="number of locations (default: 8)")
+    parser.add_argument(
+        "--scarce-fraction", type=float, default=0.25, help="fraction of locations that are scarce (default: 0.25)"
+    )
+    parser.add_argument(
+        "--scarcity-ratio",
+        type=float,
+        default=0.3,
+        help="gameslots at a scarce location, as a fraction of those at another location (default: 0.3)",
+    )
+    parser.add_argument("--start-date", default="1/6/2025", help="first day of the season (default: 1/6/2025)")
+    parser.add_argument("--weeks", type=int, default=7, help="length of the season in weeks (default: 7)")
+    parser.add_argument(
+        "--gameslots-per-matchup", type=float, default=2.0, help="gameslots per matchup overall (default: 2.0)"
+    )
+    parser.add_argument(
+        "--blackout-density",
+        type=float,
+        default=0.03,
+        help="fraction of game dates each team is blacked out on (default: 0.03)",
+    )
+    parser.add_argument(
+        "--preassignment-fraction",
+        type=float,
+        default=0.1,
+        help="fraction of matchups to preassign (default: 0.1)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random choices (default: 0)")
+    args = parser.parse_args()
+
+    league = generate_league(
+        args.divisions,
+        args.teams_per_division,
+        args.round_robins,
+        args.locations,
+        args.scarce_fraction,
+        args.scarcity_ratio,
+        datetime.strptime(args.start_date, "%m/%d/%Y").date(),
+        args.weeks,
+        args.gameslots_per_matchup,
+        args.blackout_density,
+        args.preassignment_fraction,
+        random.Random(args.seed),
+    )
+    write_league(league, args.output_dir)
+
+    print(
+        f"Wrote {len(league.teams)} teams, {len(league.matchups)} matchups, {len(league.gameslots)} gameslots, "
+        f"{len(league.blackouts)} blackouts and {len(league.preassignments)} preassignments to {args.output_dir}."
+    )
+
+    games_per_team_per_week = (args.teams_per_division - 1) * args.round_robins / args.weeks
+    if games_per_team_per_week > 3:
+        print(
+            f"Each team plays {games_per_team_per_week:.1f} games a week, which is more than a window constraint of 2 "
+            "games in 4 days allows. Consider more weeks."
+        )
+
+    print()
+    print("scarce_locations:")
+    for name in league.scarce_location_names:
+        print(f'  - "{name}"')
@@ -1,5 +1,6 @@
 from collections.abc import Sequence
-from datetime import date, time
+from datetime import date, datetime, time
+from functools import cache
 
 
 def prettify_time(time: time):
@@ -10,6 +11,35 @@ def prettify_date(date: date):
     return date.strftime("%#m/%#d/%#y")
 
 
+def format_input_date(date: date) -> str:
+    """Formats a date the way the input files write them, like 1/6/2025."""
+
+    return f"{date.month}/{date.day}/{date.year}"
+
+
+def format_input_time(time: time) -> str:
+    """Formats a time the way the input files write them, like 5:00PM."""
+
+    return time.strftime("%I:%M%p").lstrip("0")
+
+
+@cache
+def parse_input_date(date_string: str) -> date:
+    """
+    Parses a date the way the input files write them, like 1/6/2025. A season only has a few hundred dates, written
+    over and over, so each string is only parsed once.
+    """
+
+    return datetime.strptime(date_string, "%m/%d/%Y").date()
+
+
+@cache
+def parse_input_time(time_string: str) -> time:
+    """Parses a time the way the input files write them, like 5:00PM. Each string is only parsed once."""
+
+    return datetime.strptime(time_string, "%I:%M%p").time()
+
+
 def pretty_print_table(table: Sequence[Sequence[object]], file=None):
     if not table:
         return
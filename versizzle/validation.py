@@ -0,0 +1,221 @@
+"""
+Checks that a schedule satisfies every hard rule: each matchup is scheduled exactly once, each gameslot holds at most
+one game, and no blackout, window constraint or preassignment is violated. The scheduler checks every schedule it
+produces. A schedule that was edited by hand or produced elsewhere can be checked against the input files in
+`config.yml`, from its `schedule.csv` or `pasteable.txt`. Example:
+
+    uv run -m versizzle.validation out/schedule.csv
+"""
+
+import argparse
+from collections import defaultdict
+from collections.abc import Sequence
+from datetime import date, time
+
+from versizzle.blackout import Blackout
+from versizzle.config import load_config
+from versizzle.gameslot import Gameslot
+from versizzle.matchup import Matchup
+from versizzle.preassignment import Preassignment
+from versizzle.team import Team
+from versizzle.window_constraint import WindowConstraint
+
+
+def validate_schedule(
+    matchups: Sequence[Matchup],
+    blackouts: Sequence[Blackout],
+    window_constraints: list[WindowConstraint],
+    preassignments: list[Preassignment],
+) -> list[str]:
+    """Validates the gameslots currently selected by the matchups. Returns the problems found, if any."""
+
+    assignments = [(m, m.selected_gameslot) for m in matchups if m.selected_gameslot is not None]
+    return validate_assignments(assignments, matchups, blackouts, window_constraints, preassignments)
+
+
+def validate_assignments(
+    assignments: list[tuple[Matchup, Gameslot]],
+    matchups: Sequence[Matchup],
+    blackouts: Sequence[Blackout],
+    window_constraints: list[WindowConstraint],
+    preassignments: list[Preassignment],
+) -> list[str]:
+    """
+    Validates a schedule given as a list of games, each a matchup and its gameslot. Returns the problems found, if any.
+
+    Unlike checking `WindowConstraint.is_satisfied_by_selection` for each game, which looks at every day of every window
+    around it, the window constraints are checked with one sweep over each team's sorted game dates. Each game is only
+    checked against the blackouts on its own date.
+    """
+
+    problems = []
+
+    blackouts_by_date: dict[date, list[Blackout]] = defaultdict(list)
+    for b in blackouts:
+        blackouts_by_date[b.date].append(b)
+
+    scheduled_matchups: set[Matchup] = set()
+    matchups_by_gameslot: dict[Gameslot, list[Matchup]] = defaultdict(list)
+    game_dates_by_team: dict[Team, list[date]] = defaultdict(list)
+
+    for matchup, gameslot in assignments:
+        if matchup in scheduled_matchups:
+            problems.append(f"{matchup} is scheduled more than once")
+        scheduled_matchups.add(matchup)
+
+        matchups_by_gameslot[gameslot].append(matchup)
+        game_dates_by_team[matchup.team_a].append(gameslot.date)
+        game_dates_by_team[matchup.team_b].append(gameslot.date)
+
+        for b in blackouts_by_date.get(gameslot.date, []):
+            if b.prohibits_matchup_in_slot(matchup, gameslot):
+                problems.append(f"{matchup} at {gameslot} violates blackout {b}")
+
+    for m in matchups:
+        if m not in scheduled_matchups:
+            problems.append(f"{m} is not scheduled")
+
+    for gameslot, matchups_in_gameslot in matchups_by_gameslot.items():
+        if len(matchups_in_gameslot) > 1:
+            problems.append(
+                f"{gameslot} holds {len(matchups_in_gameslot)} games: " + ", ".join(map(str, matchups_in_gameslot))
+            )
+
+    for team, game_dates in game_dates_by_team.items():
+        game_dates.sort()
+        for w in window_constraints:
+            problems.extend(get_window_constraint_problems(team, game_dates, w))
+
+    matchups_by_slot_key: dict[tuple[date, time, str], list[Matchup]] = {
+        (g.date, g.time, g.location.name): matchups_in_gameslot
+        for g, matchups_in_gameslot in matchups_by_gameslot.items()
+    }
+    for p in preassignments:
+        matchups_in_gameslot = matchups_by_slot_key.get((p.date, p.time, p.location.name), [])
+        if not any(p.describes_matchup(m) for m in matchups_in_gameslot):
+            problems.append(f"Preassignment {p} is not in the schedule")
+
+    return problems
+
+
+def get_window_constraint_problems(
+    team: Team, game_dates: list[date], window_constraint: WindowConstraint
+) -> list[str]:
+    """
+    Takes a team's game dates in order. Slides a window of the constraint's size along them, and reports each stretch
+    of dates where the team has too many games in the window (once per stretch, rather than once per window).
+    """
+
+    problems = []
+    start = 0
+    in_violation = False
+
+    for end, end_date in enumerate(game_dates):
+        while (end_date - game_dates[start]).days >= window_constraint.window_size:
+            start += 1
+
+        if end - start + 1 > window_constraint.max_games_in_window:
+            if not in_violation:
+                problems.append(
+                    f"{team} has {end - start + 1} games from {game_dates[start].isoformat()} to "
+                    + f"{end_date.isoformat()} (max {window_constraint.max_games_in_window} in "
+                    + f"{window_constraint.window_size} days)"
+                )
+            in_violation = True
+        else:
+            in_violation = False
+
+    return problems
+
+
+def check_schedule_file(schedule_file_path: str, config: dict) -> list[str]:
+    """
+    Checks a `schedule.csv` or `pasteable.txt` against the input files and settings in the config. Returns the problems
+    found, if any.
+    """
+
+    # Declaring imports here to prevent circular import.
+    from versizzle import ingestion, scheduler
+    from versizzle.reschedule import get_matchup_key, read_previous_schedule
+
+    league = ingestion.ingest_files(config["input_dir"], config["scarce_locations"])
+    window_constraints = [WindowConstraint(w["days"], w["max_games"]) for w in config["window_constraints"]]
+
+    unscheduled_matchups_by_key: defaultdict[tuple[str, frozenset[str]], list[Matchup]] = defaultdict(list)
+    for m in reversed(league.matchups):
+        unscheduled_matchups_by_key[get_matchup_key(m.division, m.team_a.name, m.team_b.name)].append(m)
+
+    # Each game of the schedule file: a description, its gameslot (or `None` if it isn't one from gameslots.csv), the
+    # divisions it could be from and its teams.
+    games: list[tuple[str, Gameslot | None, list[str], str, str]] = []
+
+    if schedule_file_path.endswith(".txt"):
+        # A line of pasteable.txt for every gameslot, ordered by date. Some divisions are merged in pasteable.txt, so
+        # the division on a line stands for every division that is shown that way.
+        divisions_by_pasteable_division: dict[str, list[str]] = defaultdict(list)
+        for division in league.divisions_to_counts:
+            divisions_by_pasteable_division[scheduler.get_pasteable_division(division)].append(division)
+
+        with open(schedule_file_path) as file:
+            lines = file.read().splitlines()
+
+        ordered_gameslots = sorted(league.gameslots, key=lambda g: g.date)
+        if len(lines) != len(ordered_gameslots):
+            raise Exception(
+                f"{schedule_file_path} has {len(lines)} lines, but there are {len(ordered_gameslots)} gameslots"
+            )
+
+        for gameslot, line in zip(ordered_gameslots, lines, strict=True):
+            pasteable_division, home_team_name, away_team_name = line.split("\t")
+            if away_team_name != "OPEN":
+                description = f"< {pasteable_division} - {home_team_name} vs {away_team_name} - {gameslot} >"
+                divisions = divisions_by_pasteable_division[pasteable_division]
+                games.append((description, gameslot, divisions, home_team_name, away_team_name))
+    else:
+        for game in read_previous_schedule(schedule_file_path):
+            gameslots_on_date = league.gameslots_by_date_and_location.get((game.date, game.location_name), [])
+            gameslot = next((g for g in gameslots_on_date if g.time == game.time), None)
+            games.append((str(game), gameslot, [game.division], game.home_team_name, game.away_team_name))
+
+    problems = []
+    assignments = []
+
+    for description, gameslot, divisions, home_team_name, away_team_name in games:
+        keys = [get_matchup_key(division, home_team_name, away_team_name) for division in divisions]
+        key = next((k for k in keys if unscheduled_matchups_by_key[k]), None)
+
+        if gameslot is None:
+            problems.append(f"{description} is not in a gameslot from gameslots.csv")
+        elif key is None:
+            problems.append(f"{description} is not a remaining matchup from matchups.csv")
+        else:
+            assignments.append((unscheduled_matchups_by_key[key].pop(), gameslot))
+
+    problems += validate_assignments(
+        assignments, league.matchups, league.blackouts, window_constraints, league.preassignments
+    )
+
+    return problems
+
+
+def print_problems(problems: list[str]):
+    print()
+    if not problems:
+        print("The schedule is valid.")
+    else:
+        print(f"Found {len(problems)} problems:")
+        for problem in problems:
+            print(problem)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="versizzle.validation", description="Check a schedule against the input files."
+    )
+    parser.add_argument("schedule", help="schedule.csv or pasteable.txt of the schedule to check")
+    args = parser.parse_args()
+
+    problems = check_schedule_file(args.schedule, load_config())
+    print_problems(problems)
+    if problems:
+        raise SystemExit(1)
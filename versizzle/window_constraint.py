@@ -2,6 +2,7 @@ from datetime import timedelta
 
 from versizzle.gameslot import Gameslot
 from versizzle.matchup import Matchup
+from versizzle.profiler import profiler
 
 
 class WindowConstraint:
@@ -19,6 +20,9 @@ class WindowConstraint:
         if matchup.selected_gameslot is not None:
             raise Exception("Cannot test window constraint if matchup is already assigned to a gameslot")
 
+        if profiler.enabled:
+            profiler.count("window_constraint_checks")
+
         candidate_date = gameslot.date
 
         for team in matchup.team_a, matchup.team_b: